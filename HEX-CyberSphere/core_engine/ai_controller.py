@@ -3,32 +3,186 @@ HEX-CyberSphere AI Controller
 Python-based AI workflow engine
 """
 
+import copy
 import json
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-import torch
-import torch.nn as nn
-import pandas as pd
+from datetime import datetime
 import logging
+import os
+import re
+import threading
+from collections.abc import Iterator
+from column_summary import ColumnarSummary
+from lazy_imports import lazy_import, load
+from online_detector import OnlineAnomalyDetector
+from trend_engine import TrendEngine
+
+# Heavy libraries are imported on first use, not when the core engine starts
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+joblib = lazy_import('joblib')
+ensemble = lazy_import('sklearn.ensemble')
 
 class AIFramework:
-    def __init__(self):
+    def __init__(self, state_dir: str = "../database/ai_state",
+                 model_dir: str = "../database/models"):
         self.logger = logging.getLogger(__name__)
         self.models = {}
-        self.load_models()
+        self.model_features = {}
+        self.state_dir = state_dir
+        self.model_dir = model_dir
+        self.online_detectors = {}
+        self._online_lock = threading.Lock()
+        self.trend_engines = {}
+        self._trend_lock = threading.Lock()
+        self._models_loaded = False
+        self._models_lock = threading.Lock()
+    
+    def _ensure_models(self):
+        """Load models on first use"""
+        if not self._models_loaded:
+            with self._models_lock:
+                if not self._models_loaded:
+                    self.load_models()
+                    self._models_loaded = True
+    
+    def warm_up(self):
+        """Import the numeric libraries and load models ahead of the first task"""
+        load(np, pd, joblib, ensemble)
+        self._ensure_models()
+        self.logger.info("AI framework warmed up")
     
     def load_models(self):
         """Load pre-trained AI models"""
         try:
-            # Initialize a simple model for demonstration
-            self.models['anomaly_detector'] = RandomForestClassifier(n_estimators=100)
+            path = self._model_path('anomaly_detector')
+            if os.path.exists(path):
+                # Tree arrays are memory-mapped instead of copied into the heap
+                bundle = joblib.load(path, mmap_mode='r')
+                self.models['anomaly_detector'] = bundle['model']
+                self.model_features['anomaly_detector'] = bundle['features']
+                self.logger.info(f"Loaded anomaly detector trained at {bundle.get('trained_at')}")
+            else:
+                # Untrained until train_anomaly_model is called
+                self.models['anomaly_detector'] = ensemble.RandomForestClassifier(n_estimators=100)
             self.logger.info("AI models loaded successfully")
         except Exception as e:
             self.logger.error(f"Failed to load AI models: {e}")
     
+    def _model_path(self, name: str) -> str:
+        return os.path.join(self.model_dir, f"{name}.joblib")
+    
+    def _feature_matrix(self, records, features=None):
+        """Build a float32 feature matrix from records (list of dicts or dict of lists).
+
+        When features is None the numeric columns of the records are used;
+        otherwise columns are aligned to the given names and missing ones
+        are zero-filled, so prediction sees the training layout.
+        """
+        df = pd.DataFrame(records)
+        if features is None:
+            features = list(df.select_dtypes(include=[np.number, bool]).columns)
+        matrix = df.reindex(columns=features).apply(pd.to_numeric, errors='coerce')
+        return features, matrix.fillna(0).to_numpy(dtype=np.float32)
+    
+    def train_anomaly_model(self, records, labels=None, label_field: str = 'label',
+                            n_estimators: int = 100, n_jobs: int = -1):
+        """Train the RandomForest anomaly model on labelled event/scan features and persist it.
+
+        Labels come from `labels` or from each record's label_field. Trees
+        are fitted on all cores (n_jobs=-1).
+        """
+        try:
+            self._ensure_models()
+            df = pd.DataFrame(records)
+            if labels is None:
+                if label_field not in df.columns:
+                    return {'error': f'No labels given and records have no "{label_field}" field'}
+                labels = df.pop(label_field)
+            elif label_field in df.columns:
+                df = df.drop(columns=[label_field])
+            
+            features, matrix = self._feature_matrix(df)
+            if not features:
+                return {'error': 'Records have no numeric features to train on'}
+            
+            model = ensemble.RandomForestClassifier(n_estimators=n_estimators, n_jobs=n_jobs)
+            model.fit(matrix, np.asarray(labels))
+            
+            trained_at = datetime.now().isoformat()
+            os.makedirs(self.model_dir, exist_ok=True)
+            path = self._model_path('anomaly_detector')
+            tmp_path = f"{path}.tmp"
+            # Uncompressed so the arrays can be memory-mapped on load
+            joblib.dump({'model': model, 'features': features, 'trained_at': trained_at}, tmp_path)
+            os.replace(tmp_path, path)
+            
+            self.models['anomaly_detector'] = model
+            self.model_features['anomaly_detector'] = features
+            
+            return {
+                'model': 'anomaly_detector',
+                'samples': int(matrix.shape[0]),
+                'features': features,
+                'classes': [c.item() if hasattr(c, 'item') else c for c in model.classes_],
+                'trained_at': trained_at
+            }
+        except Exception as e:
+            self.logger.error(f"Model training failed: {e}")
+            return {'error': str(e)}
+    
+    def predict_anomalies(self, records, batch_size: int = 10000, n_jobs: int = -1):
+        """Score records with the trained anomaly model in batches.
+
+        Returns the predicted class and, for binary models, the probability
+        of the positive class for every record, as parallel lists.
+        """
+        try:
+            self._ensure_models()
+            features = self.model_features.get('anomaly_detector')
+            model = self.models.get('anomaly_detector')
+            if features is None or model is None:
+                return {'error': 'Anomaly model has not been trained'}
+            
+            _, matrix = self._feature_matrix(records, features)
+            # A shallow copy shares the fitted trees but not n_jobs with concurrent callers
+            model = copy.copy(model)
+            model.n_jobs = n_jobs
+            
+            predictions = []
+            scores = []
+            for start in range(0, matrix.shape[0], batch_size):
+                batch = matrix[start:start + batch_size]
+                probabilities = model.predict_proba(batch)
+                predictions.append(model.classes_[probabilities.argmax(axis=1)])
+                if probabilities.shape[1] == 2:
+                    scores.append(probabilities[:, 1])
+            
+            result = {
+                'predictions': np.concatenate(predictions).tolist() if predictions else [],
+                'count': int(matrix.shape[0])
+            }
+            if scores:
+                result['scores'] = np.concatenate(scores).tolist()
+            return result
+        except Exception as e:
+            self.logger.error(f"Anomaly prediction failed: {e}")
+            return {'error': str(e)}
+    
     def process_data(self, data):
-        """Process data with AI models"""
+        """Summarise the numeric columns of data like DataFrame.describe().
+
+        A dict of columns (lists, NumPy arrays or Arrow arrays), a pyarrow
+        Table, or an iterator of such chunks is summarised column by column
+        without building a DataFrame; quantiles switch to an approximate
+        sketch for very large inputs. Other shapes go through pandas.
+        """
         try:
+            if isinstance(data, Iterator):
+                return ColumnarSummary().update_chunks(data).result()
+            
+            if self._is_columnar(data):
+                return ColumnarSummary().update(data).result()
+            
             # Convert data to DataFrame
             df = pd.DataFrame(data)
             
@@ -44,50 +198,201 @@ class AIFramework:
             self.logger.error(f"AI processing failed: {e}")
             return {'error': str(e)}
     
-    def detect_anomalies(self, data):
-        """Detect anomalies in data"""
+    def _is_columnar(self, data) -> bool:
+        """True for inputs the columnar summary can read directly"""
+        if hasattr(data, 'column_names') and hasattr(data, 'column'):
+            return True
+        if not isinstance(data, dict) or not data:
+            return False
+        lengths = set()
+        for values in data.values():
+            if isinstance(values, (str, bytes, dict)) or not hasattr(values, '__len__'):
+                return False
+            lengths.add(len(values))
+        # Ragged or empty columns keep pandas' behaviour
+        return len(lengths) == 1 and lengths.pop() > 0
+    
+    def detect_anomalies(self, data, robust: bool = False, threshold: float = 2.0):
+        """Detect anomalies in data.
+
+        Thresholds for every numeric column are computed in one NumPy pass
+        over a 2-D block. With robust=True the median and MAD (scaled to be
+        comparable with the standard deviation) replace mean and std, so a
+        single large outlier cannot hide itself by inflating the spread. A
+        column whose MAD is 0 (mostly one value) uses the scaled mean
+        absolute deviation instead, so not every differing value is flagged.
+        Each anomalous column reports the row indices and values above its
+        threshold rather than copies of the full rows.
+        """
         try:
-            # Simple anomaly detection logic
-            df = pd.DataFrame(data)
+            columns, block = self._numeric_block(data)
             anomalies = []
+            if not columns:
+                return {'anomalies': anomalies}
+            
+            if np.isnan(block).any():
+                mean, median, std = np.nanmean, np.nanmedian, np.nanstd
+            else:
+                mean, median, std = np.mean, np.median, np.std
+            if robust:
+                center = median(block, axis=1)
+                deviations = np.abs(block - center[:, None])
+                spread = 1.4826 * median(deviations, axis=1)
+                # MAD is 0 once over half the values are equal; fall back to the
+                # mean absolute deviation, scaled to match the std of normal data
+                spread = np.where(spread > 0, spread, 1.2533 * mean(deviations, axis=1))
+            else:
+                center = mean(block, axis=1)
+                spread = std(block, axis=1, ddof=1)
+            limits = center + threshold * spread
             
-            for column in df.select_dtypes(include=[np.number]).columns:
-                mean = df[column].mean()
-                std = df[column].std()
-                threshold = mean + (2 * std)
-                
-                column_anomalies = df[df[column] > threshold]
-                if not column_anomalies.empty:
-                    anomalies.append({
-                        'column': column,
-                        'anomalies': column_anomalies.to_dict('records')
-                    })
+            # Rows of the block are columns of the data, so hits come out grouped by column
+            cols, rows = np.nonzero(block > limits[:, None])
+            boundaries = np.flatnonzero(np.diff(cols)) + 1
+            
+            for col_rows, col_ids in zip(np.split(rows, boundaries), np.split(cols, boundaries)):
+                if col_rows.size == 0:
+                    continue
+                col = int(col_ids[0])
+                anomalies.append({
+                    'column': columns[col],
+                    'threshold': float(limits[col]),
+                    'indices': col_rows.tolist(),
+                    'values': block[col, col_rows].tolist()
+                })
             
             return {'anomalies': anomalies}
         except Exception as e:
             self.logger.error(f"Anomaly detection failed: {e}")
             return {'error': str(e)}
     
-    def predict_trends(self, data):
-        """Predict trends based on historical data"""
+    def _numeric_block(self, data):
+        """Return (column names, 2-D float array) for the numeric columns of data.
+
+        The array has one row per column. A dict of equal-length lists is
+        stacked straight into NumPy; any other shape goes through a
+        DataFrame first. Either way missing values become NaN and bool
+        columns are left out, as select_dtypes(np.number) does.
+        """
+        if isinstance(data, dict) and data and all(isinstance(v, (list, tuple, np.ndarray)) for v in data.values()):
+            columns = []
+            arrays = []
+            for name, values in data.items():
+                array = self._numeric_column(values)
+                if array is not None:
+                    columns.append(name)
+                    arrays.append(array)
+            if not arrays:
+                return [], np.empty((0, 0))
+            return columns, np.vstack(arrays)
+        
+        df = pd.DataFrame(data).select_dtypes(include=[np.number])
+        return list(df.columns), df.to_numpy(dtype=np.float64).T
+    
+    def _numeric_column(self, values):
+        """Float array for a numeric column with None as NaN, or None for other columns"""
+        array = np.asarray(values)
+        if array.dtype.kind in 'iuf':
+            return array.astype(np.float64, copy=False)
+        if array.dtype.kind != 'O':
+            return None
+        # Mixed with None: numbers only, not bools or numeric-looking strings
+        if not all(value is None or (isinstance(value, (int, float, np.number))
+                                     and not isinstance(value, (bool, np.bool_)))
+                   for value in array.tolist()):
+            return None
         try:
-            # Simple trend prediction
-            df = pd.DataFrame(data)
-            trends = {}
-            
-            for column in df.select_dtypes(include=[np.number]).columns:
-                # Calculate trend direction
-                if len(df[column]) > 1:
-                    trend = 'increasing' if df[column].iloc[-1] > df[column].iloc[0] else 'decreasing'
-                    trends[column] = {
-                        'trend': trend,
-                        'change': float(df[column].iloc[-1] - df[column].iloc[0])
-                    }
-            
-            return {'trends': trends}
+            return np.asarray(array, dtype=np.float64)
+        except (TypeError, ValueError):
+            return None
+    
+    def update_anomalies(self, data, stream: str = "default", **options):
+        """Score newly arrived points with a persistent online detector.
+
+        data maps metric names to the new value(s) only; history is kept as
+        running statistics per stream and saved after every update. Options
+        (threshold, alpha, warmup, method) apply when a stream is created.
+        """
+        try:
+            if not re.fullmatch(r'[A-Za-z0-9_.-]+', stream):
+                return {'error': f'Invalid stream name: {stream}'}
+            
+            with self._online_lock:
+                detector = self._online_detector(stream, options)
+                result = detector.update(data)
+                detector.save(self._online_state_path(stream))
+            
+            result['stream'] = stream
+            return result
+        except Exception as e:
+            self.logger.error(f"Online anomaly detection failed: {e}")
+            return {'error': str(e)}
+    
+    def _online_state_path(self, stream: str) -> str:
+        return os.path.join(self.state_dir, f"online_{stream}.json")
+    
+    def _online_detector(self, stream: str, options) -> OnlineAnomalyDetector:
+        """Return the detector for a stream, restoring saved state on first use"""
+        detector = self.online_detectors.get(stream)
+        if detector is None:
+            path = self._online_state_path(stream)
+            if os.path.exists(path):
+                detector = OnlineAnomalyDetector.load(path)
+            else:
+                detector = OnlineAnomalyDetector(**options)
+            self.online_detectors[stream] = detector
+        return detector
+    
+    def predict_trends(self, data, window: int = None, season: int = None, horizon: int = 1):
+        """Estimate per-metric trends from historical data.
+
+        The slope is a least-squares fit over the last `window` points (the
+        whole series by default), computed for all metrics at once. With a
+        seasonal period, deltas compare against the same phase of the
+        previous season and forecasts follow the seasonal pattern.
+        """
+        try:
+            columns, block = self._numeric_block(data)
+            if block.shape[1] < 2:
+                return {'trends': {}}
+            
+            engine = TrendEngine(window, season, horizon)
+            return {'trends': engine.trends(columns, block)}
         except Exception as e:
             self.logger.error(f"Trend prediction failed: {e}")
             return {'error': str(e)}
+    
+    def update_trends(self, data, stream: str = "default", window: int = 30,
+                      season: int = None, horizon: int = 1):
+        """Append new points to a persistent trend stream and report its trends.
+
+        Only the last window (or season) of points is kept per metric, so an
+        update costs the same however long the stream has been running.
+        Window, season and horizon apply when a stream is created.
+        """
+        try:
+            if not re.fullmatch(r'[A-Za-z0-9_.-]+', stream):
+                return {'error': f'Invalid stream name: {stream}'}
+            
+            with self._trend_lock:
+                engine = self.trend_engines.get(stream)
+                path = self._trend_state_path(stream)
+                if engine is None:
+                    if os.path.exists(path):
+                        engine = TrendEngine.load(path)
+                    else:
+                        engine = TrendEngine(window, season, horizon)
+                    self.trend_engines[stream] = engine
+                trends = engine.append(data)
+                engine.save(path)
+            
+            return {'trends': trends, 'stream': stream}
+        except Exception as e:
+            self.logger.error(f"Trend update failed: {e}")
+            return {'error': str(e)}
+    
+    def _trend_state_path(self, stream: str) -> str:
+        return os.path.join(self.state_dir, f"trend_{stream}.json")
 
 # Example usage
 if __name__ == "__main__":
@@ -5,28 +5,169 @@ Main controller for automation workflows
 
 import json
 import logging
-import sqlite3
-import time
-from datetime import datetime
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any
-import requests
+import http_client
 from ai_controller import AIFramework
 from data_parser import DataParser
+from db_pool import ConnectionPool, create_pool, init_schema
+from event_writer import EventWriter
+from health_monitor import HealthMonitor
 from security_scanner import SecurityScanner
+from scan_store import ScanResultStore
 from notifier import NotificationManager
+from payload_schemas import SCHEMAS, register_schema
+from result_cache import ResultCache
+from task_queue import TaskQueue, TaskStore
+
+DATABASE_PATH = '../database/hex_data.db'
+
+# This process's entry in the "services" config section; never health-checked over HTTP
+SELF_SERVICE = 'python_core'
+
+TASK_EVENT_TYPES = ('task_execution', 'task_result', 'task_error')
+# Inlined as literals, not bound, so SQLite can match the partial index
+# idx_events_task_history, whose WHERE clause must be repeated verbatim
+TASK_EVENT_FILTER = f"event_type IN ({', '.join(repr(t) for t in TASK_EVENT_TYPES)})"
+
+MAX_HISTORY_PAGE = 1000
+
+# Stateless AI operations that are worth shipping to a worker process.
+# Streaming updates and training keep state in this process and run on threads.
+PROCESS_AI_OPERATIONS = ('process', 'anomaly_detect', 'predict_trends')
+
+_process_ai_framework = None
+
+
+def run_ai_operation(ai_framework: AIFramework, params: Dict[Any, Any]) -> Dict[Any, Any]:
+    """Dispatch an ai_process task to the matching AIFramework method"""
+    data = params.get('data', {})
+    operation = params.get('operation', 'process')
+    
+    if operation == 'process':
+        result = ai_framework.process_data(data)
+    elif operation == 'anomaly_detect':
+        result = ai_framework.detect_anomalies(
+            data,
+            robust=params.get('robust', False),
+            threshold=params.get('threshold', 2.0)
+        )
+    elif operation == 'anomaly_update':
+        options = {key: params[key] for key in ('threshold', 'alpha', 'warmup', 'method')
+                   if key in params}
+        result = ai_framework.update_anomalies(
+            data, stream=params.get('stream', 'default'), **options)
+    elif operation == 'train':
+        result = ai_framework.train_anomaly_model(
+            data,
+            labels=params.get('labels'),
+            label_field=params.get('label_field', 'label'),
+            n_estimators=params.get('n_estimators', 100)
+        )
+    elif operation == 'predict':
+        result = ai_framework.predict_anomalies(
+            data, batch_size=params.get('batch_size', 10000))
+    elif operation == 'predict_trends':
+        options = {key: params[key] for key in ('window', 'season', 'horizon')
+                   if key in params}
+        result = ai_framework.predict_trends(data, **options)
+    elif operation == 'trend_update':
+        options = {key: params[key] for key in ('window', 'season', 'horizon')
+                   if key in params}
+        result = ai_framework.update_trends(
+            data, stream=params.get('stream', 'default'), **options)
+    else:
+        result = {"error": f"Unknown AI operation: {operation}"}
+    
+    return result
+
+
+def _run_ai_task_in_process(params: Dict[Any, Any]) -> Dict[Any, Any]:
+    """Entry point of AI worker processes; each keeps one AIFramework"""
+    global _process_ai_framework
+    if _process_ai_framework is None:
+        _process_ai_framework = AIFramework()
+    return run_ai_operation(_process_ai_framework, params)
+
 
 class AutomationManager:
     def __init__(self, config_path="../config/config.json"):
         self.logger = self._setup_logger()
         self.config = self._load_config(config_path)
-        self.db_connection = self._setup_database()
-        self.ai_framework = AIFramework()
+        http_client.configure(self.config.get('http'))
+        self.db = self._setup_database()
+        self._ai_framework = None
+        self._ai_lock = threading.Lock()
         self.data_parser = DataParser()
+        self._register_schemas(self.config.get('schemas', {}))
         self.security_scanner = SecurityScanner()
         self.notifier = NotificationManager()
+        # Without a database scan results and events are not persisted
+        self.scan_store = ScanResultStore(self.db) if self.db is not None else None
+        self.event_writer = EventWriter(self.db) if self.db is not None else None
+        
+        task_config = self.config.get('tasks', {})
+        self._ai_process_pool = None
+        self._ai_process_workers = task_config.get('cpu_workers', 2)
+        self.task_queue = TaskQueue(
+            {"io": task_config.get('io_workers', 8), "cpu": self._ai_process_workers},
+            TaskStore(self.db),
+            max_pending=task_config.get('max_pending', 1000)
+        )
+        
+        health_config = self.config.get('health', {})
+        self.health_monitor = HealthMonitor(
+            self.config.get('services', {}),
+            {"database": self._check_database},
+            timeout=health_config.get('timeout', 5.0),
+            deadline=health_config.get('deadline', 6.0),
+            ttl=health_config.get('ttl', 5.0),
+            exclude=(SELF_SERVICE,)
+        )
+        if health_config.get('refresh_interval'):
+            self.health_monitor.start(health_config['refresh_interval'])
+        
+        self.result_cache = self._setup_result_cache()
+        
+        if self.config.get('ai', {}).get('prewarm', False):
+            self.prewarm_ai()
         
         self.logger.info("Automation Manager initialized")
     
+    @property
+    def ai_framework(self) -> AIFramework:
+        """AI framework, created on first use so non-AI tasks never pay for it"""
+        if self._ai_framework is None:
+            with self._ai_lock:
+                if self._ai_framework is None:
+                    self._ai_framework = AIFramework()
+        return self._ai_framework
+    
+    def prewarm_ai(self, background: bool = True):
+        """Load AI libraries and models ahead of the first AI task"""
+        if background:
+            thread = threading.Thread(target=self.prewarm_ai, args=(False,),
+                                      name="ai-prewarm", daemon=True)
+            thread.start()
+            return thread
+        try:
+            self.ai_framework.warm_up()
+        except Exception as e:
+            self.logger.error(f"AI pre-warm failed: {e}")
+    
+    def _register_schemas(self, schemas: Dict[str, Dict[str, str]]):
+        """Compile the payload schemas defined in the config"""
+        for name, fields in schemas.items():
+            if name in SCHEMAS and SCHEMAS[name].fields == fields:
+                continue
+            try:
+                register_schema(name, fields)
+                self.logger.info(f"Registered payload schema: {name}")
+            except ValueError as e:
+                self.logger.error(f"Invalid payload schema {name}: {e}")
+    
     def _setup_logger(self):
         """Setup logging configuration"""
         logging.basicConfig(
@@ -48,65 +189,172 @@ class AutomationManager:
             self.logger.error(f"Failed to load config: {e}")
             return {}
     
-    def _setup_database(self):
-        """Setup database connection"""
+    def _setup_database(self) -> ConnectionPool:
+        """Setup the database connection pool; None if the database is unavailable"""
         try:
-            conn = sqlite3.connect('../database/hex_data.db')
-            return conn
+            # One writer and several WAL readers, shared by the task workers
+            pool = create_pool(self.config.get('database', {}), DATABASE_PATH)
         except Exception as e:
-            self.logger.error(f"Failed to connect to database: {e}")
+            self.logger.error(f"Failed to connect to database: {e}; "
+                              "scan results, events and task history are disabled")
             return None
+        self._init_schema(pool)
+        return pool
+    
+    def _init_schema(self, pool: ConnectionPool):
+        """Apply pending schema migrations; a single query once gunicorn's
+        on_starting hook (or migrate.py) has brought the schema up to date"""
+        try:
+            init_schema(pool)
+        except Exception as e:
+            self.logger.error(f"Failed to initialise database schema: {e}")
+    
+    def _setup_result_cache(self) -> ResultCache:
+        """Result cache from the "cache" config section; None unless enabled"""
+        cache_config = self.config.get('cache', {})
+        if not cache_config.get('enabled', False):
+            return None
+        return ResultCache(
+            max_entries=cache_config.get('max_entries', 1024),
+            max_bytes=cache_config.get('max_bytes', 64 * 1024 * 1024),
+            disk_path=cache_config.get('disk_path'),
+            max_disk_entries=cache_config.get('max_disk_entries', 10000)
+        )
+    
+    def _cache_ttl(self, task_name: str, task_params: Dict[Any, Any]) -> float:
+        """Seconds to cache this call's result, or 0 if it must always run"""
+        if self.result_cache is None:
+            return 0
+        if task_name == "ai_process" and task_params.get('operation', 'process') not in PROCESS_AI_OPERATIONS:
+            return 0  # Streaming updates and models depend on state, not just params
+        return self.config['cache'].get('ttl', {}).get(task_name, 0)
+    
+    def cache_stats(self) -> Dict[Any, Any]:
+        """Hit/miss counters of the result cache"""
+        if self.result_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.result_cache.stats()}
+    
+    def submit_task(self, task_name: str, task_params: Dict[Any, Any],
+                    priority: int = 0) -> Dict[Any, Any]:
+        """Queue a task to run in the background and return its ID immediately.
+
+        Scans, parsing and web automation run on I/O worker threads;
+        stateless AI operations run in a process pool. Lower priority
+        numbers run first.
+        """
+        try:
+            lane = self._task_lane(task_name, task_params)
+            task_id = self.task_queue.submit(
+                task_name,
+                lambda: self.execute_task(task_name, task_params, in_process=lane == "cpu"),
+                task_params, lane=lane, priority=priority
+            )
+            self.logger.info(f"Queued task {task_id}: {task_name} ({lane}, priority {priority})")
+            return {"task_id": task_id, "status": "pending", "lane": lane}
+        except Exception as e:
+            error_msg = f"Failed to queue task: {str(e)}"
+            self.logger.error(error_msg)
+            return {"error": error_msg}
+    
+    def task_status(self, task_id: int) -> Dict[Any, Any]:
+        """Status of a queued task"""
+        status = self.task_queue.status(task_id)
+        return status if status is not None else {"error": f"Unknown task: {task_id}"}
+    
+    def task_result(self, task_id: int, timeout: float = None) -> Dict[Any, Any]:
+        """Status and result of a queued task, optionally waiting for it to finish"""
+        result = self.task_queue.result(task_id, timeout)
+        return result if result is not None else {"error": f"Unknown task: {task_id}"}
+    
+    def cancel_task(self, task_id: int) -> Dict[Any, Any]:
+        """Cancel a task that has not started yet"""
+        cancelled = self.task_queue.cancel(task_id)
+        status = self.task_queue.status(task_id) or {}
+        return {"task_id": task_id, "cancelled": cancelled, "status": status.get("status")}
+    
+    def shutdown(self):
+        """Stop the task workers and the AI process pool"""
+        self.task_queue.shutdown()
+        self.health_monitor.stop()
+        if self.event_writer is not None:
+            self.event_writer.close()
+        if self.result_cache is not None:
+            self.result_cache.close()
+        if self.db is not None:
+            self.db.close()
+        if self._ai_process_pool is not None:
+            self._ai_process_pool.shutdown()
     
-    def execute_task(self, task_name: str, task_params: Dict[Any, Any]) -> Dict[Any, Any]:
+    def _task_lane(self, task_name: str, task_params: Dict[Any, Any]) -> str:
+        if task_name == "ai_process" and task_params.get('operation', 'process') in PROCESS_AI_OPERATIONS:
+            return "cpu"
+        return "io"
+    
+    def _ai_processes(self) -> ProcessPoolExecutor:
+        """Process pool for CPU-bound AI tasks, started on first use"""
+        with self._ai_lock:
+            if self._ai_process_pool is None:
+                # spawn: forking a process that runs worker threads can deadlock
+                self._ai_process_pool = ProcessPoolExecutor(
+                    max_workers=self._ai_process_workers,
+                    mp_context=multiprocessing.get_context('spawn'))
+        return self._ai_process_pool
+    
+    def execute_task(self, task_name: str, task_params: Dict[Any, Any],
+                     in_process: bool = False) -> Dict[Any, Any]:
         """Execute an automation task"""
         self.logger.info(f"Executing task: {task_name}")
         
         try:
             # Log task execution
             self._log_event('task_execution', 'automation_manager', 
-                           f"Executing task: {task_name}")
+                           f"Executing task: {task_name}", task_name=task_name, status='running')
             
-            # Task routing based on name
-            if task_name == "ai_process":
-                result = self._execute_ai_task(task_params)
-            elif task_name == "security_scan":
-                result = self._execute_security_task(task_params)
-            elif task_name == "data_parse":
-                result = self._execute_parsing_task(task_params)
-            elif task_name == "web_automation":
-                result = self._execute_web_task(task_params)
+            ttl = self._cache_ttl(task_name, task_params)
+            if ttl:
+                result, cached = self.result_cache.get_or_compute(
+                    task_name, task_params, ttl,
+                    lambda: self._route_task(task_name, task_params, in_process))
             else:
-                result = {"error": f"Unknown task: {task_name}"}
+                result, cached = self._route_task(task_name, task_params, in_process), False
             
             # Log result
-            self._log_event('task_result', 'automation_manager', 
-                           f"Task {task_name} completed: {json.dumps(result)}")
+            # The event writer serialises the result when it is queued
+            status = 'failed' if isinstance(result, dict) and "error" in result else 'completed'
+            message = f"Task {task_name} served from cache" if cached else f"Task {task_name} completed"
+            self._log_event('task_result', 'automation_manager', message, payload=result,
+                           task_name=task_name, status=status)
             
             return result
         except Exception as e:
             error_msg = f"Task execution failed: {str(e)}"
             self.logger.error(error_msg)
-            self._log_event('task_error', 'automation_manager', error_msg)
+            self._log_event('task_error', 'automation_manager', error_msg,
+                           task_name=task_name, status='failed')
             return {"error": error_msg}
     
-    def _execute_ai_task(self, params: Dict[Any, Any]) -> Dict[Any, Any]:
+    def _route_task(self, task_name: str, task_params: Dict[Any, Any],
+                    in_process: bool = False) -> Dict[Any, Any]:
+        """Task routing based on name"""
+        if task_name == "ai_process":
+            return self._execute_ai_task(task_params, in_process)
+        elif task_name == "security_scan":
+            return self._execute_security_task(task_params)
+        elif task_name == "data_parse":
+            return self._execute_parsing_task(task_params)
+        elif task_name == "web_automation":
+            return self._execute_web_task(task_params)
+        return {"error": f"Unknown task: {task_name}"}
+    
+    def _execute_ai_task(self, params: Dict[Any, Any], in_process: bool = False) -> Dict[Any, Any]:
         """Execute AI processing task"""
         self.logger.info("Executing AI processing task")
         
         try:
-            data = params.get('data', {})
-            operation = params.get('operation', 'process')
-            
-            if operation == 'process':
-                result = self.ai_framework.process_data(data)
-            elif operation == 'anomaly_detect':
-                result = self.ai_framework.detect_anomalies(data)
-            elif operation == 'predict_trends':
-                result = self.ai_framework.predict_trends(data)
-            else:
-                result = {"error": f"Unknown AI operation: {operation}"}
-            
-            return result
+            if in_process:
+                return self._ai_processes().submit(_run_ai_task_in_process, params).result()
+            return run_ai_operation(self.ai_framework, params)
         except Exception as e:
             error_msg = f"AI task execution failed: {str(e)}"
             self.logger.error(error_msg)
@@ -126,15 +374,50 @@ class AutomationManager:
                 result = self.security_scanner.scan_vulnerabilities(target)
             elif scan_type == 'full_scan':
                 result = self.security_scanner.full_scan(target)
+            elif scan_type == 'sweep':
+                result = self.security_scanner.sweep(
+                    params.get('targets', target),
+                    params.get('port_range', '1-1000'),
+                    rate_per_host=params.get('rate_per_host')
+                )
             else:
                 result = {"error": f"Unknown scan type: {scan_type}"}
             
+            if "error" not in result and params.get('store_results', True):
+                self._store_scan_results(result, params.get('notify', False))
+            
             return result
         except Exception as e:
             error_msg = f"Security task execution failed: {str(e)}"
             self.logger.error(error_msg)
             return {"error": error_msg}
     
+    def _store_scan_results(self, result: Dict[Any, Any], notify: bool = False):
+        """Persist scan findings, attach the delta since the last run and notify on changes"""
+        if self.scan_store is None:
+            return
+        try:
+            if result.get("scan_type") == "sweep":
+                scan_ids = self.scan_store.record_sweep(result)
+            else:
+                scan_ids = {result["target"]: self.scan_store.record_scan(result)}
+            
+            changes = {target: self.scan_store.diff(target, scan_id)
+                       for target, scan_id in scan_ids.items()}
+            result["changes"] = changes
+            
+            # Only new or changed findings are worth a notification
+            lines = []
+            for target, delta in changes.items():
+                for finding in delta["new"]:
+                    lines.append(f"[new] {target}:{finding['port']} {finding['check']}")
+                for finding in delta["changed"]:
+                    lines.append(f"[changed] {target}:{finding['port']} {finding['check']}")
+            if notify and lines:
+                self.notifier.send_notification("Security scan changes:\n" + "\n".join(lines))
+        except Exception as e:
+            self.logger.error(f"Failed to store scan results: {e}")
+    
     def _execute_parsing_task(self, params: Dict[Any, Any]) -> Dict[Any, Any]:
         """Execute data parsing task"""
         self.logger.info("Executing data parsing task")
@@ -142,8 +425,12 @@ class AutomationManager:
         try:
             data = params.get('data', '')
             format_type = params.get('format', 'json')
+            schema = params.get('schema')
             
-            if format_type == 'json':
+            if schema and format_type == 'json':
+                # Decode straight into the schema's types, without a dict in between
+                result = self.data_parser.parse_typed(data, schema)
+            elif format_type == 'json':
                 result = self.data_parser.parse_json(data)
             elif format_type == 'yaml':
                 result = self.data_parser.parse_yaml(data)
@@ -154,6 +441,12 @@ class AutomationManager:
             else:
                 result = {"error": f"Unknown format type: {format_type}"}
             
+            if schema and not (isinstance(result, dict) and "error" in result):
+                if format_type != 'json':
+                    result = self.data_parser.parse_typed(result, schema)
+                if not (isinstance(result, dict) and "error" in result):
+                    # Validated and normalised, as plain data for JSON responses and the cache
+                    result = SCHEMAS[schema].to_builtins(result)
             return result
         except Exception as e:
             error_msg = f"Parsing task execution failed: {str(e)}"
@@ -168,89 +461,119 @@ class AutomationManager:
             # Send request to Node.js service for web automation
             node_service_url = f"http://{self.config['services']['node_events']['host']}:{self.config['services']['node_events']['port']}/automate"
             
-            response = requests.post(node_service_url, json=params, timeout=30)
+            # POST is not retried: the Node service may have started the job
+            response = http_client.get_client().post(node_service_url, json=params, timeout=30)
             return response.json()
         except Exception as e:
             error_msg = f"Web automation task execution failed: {str(e)}"
             self.logger.error(error_msg)
             return {"error": error_msg}
     
-    def health_check(self) -> Dict[Any, Any]:
-        """Perform system health check"""
+    def health_check(self, force: bool = False) -> Dict[Any, Any]:
+        """Perform system health check.
+
+        Services are checked concurrently under a global deadline and the
+        report is cached briefly; pass force=True to bypass the cache.
+        """
         self.logger.info("Performing system health check")
-        
-        health_status = {
-            "timestamp": datetime.now().isoformat(),
-            "system": "HEX-CyberSphere",
-            "status": "healthy",
-            "components": {}
-        }
-        
-        # Check each service
-        for service_name, service_config in self.config['services'].items():
-            if service_config['enabled']:
-                try:
-                    url = f"http://{service_config['host']}:{service_config['port']}/health"
-                    response = requests.get(url, timeout=5)
-                    health_status["components"][service_name] = {
-                        "status": "healthy" if response.status_code == 200 else "unhealthy",
-                        "response_time": response.elapsed.total_seconds()
-                    }
-                except Exception as e:
-                    health_status["components"][service_name] = {
-                        "status": "unhealthy",
-                        "error": str(e)
-                    }
-        
-        # Check database
-        try:
-            cursor = self.db_connection.cursor()
+        return self.health_monitor.check(force)
+    
+    def _check_database(self) -> Dict[Any, Any]:
+        if self.db is None:
+            return {"status": "unhealthy", "error": "Database unavailable"}
+        with self.db.read() as cursor:
             cursor.execute("SELECT 1")
-            health_status["components"]["database"] = {"status": "healthy"}
-        except Exception as e:
-            health_status["components"]["database"] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
-        
-        return health_status
+        return {"status": "healthy"}
     
-    def _log_event(self, event_type: str, source: str, data: str):
-        """Log event to database"""
+    def _log_event(self, event_type: str, source: str, data: str, payload: Any = None,
+                   task_name: str = None, status: str = None):
+        """Queue an event for the background event writer"""
+        if self.event_writer is None:
+            return
         try:
-            cursor = self.db_connection.cursor()
-            cursor.execute("""
-                INSERT INTO events (event_type, source, data) 
-                VALUES (?, ?, ?)
-            """, (event_type, source, data))
-            self.db_connection.commit()
+            self.event_writer.write(event_type, source, data, payload, task_name, status)
         except Exception as e:
             self.logger.error(f"Failed to log event: {e}")
     
-    def get_task_history(self) -> Dict[Any, Any]:
-        """Get task execution history"""
+    def get_task_history(self, limit: int = 100, before_id: int = None,
+                         task_name: str = None, status: str = None,
+                         since: str = None, until: str = None) -> Dict[Any, Any]:
+        """Get task execution history, newest first.
+
+        Pages are keyed on event id: pass the returned next_cursor as
+        before_id to fetch the following page. since/until bound the event
+        timestamp ("YYYY-MM-DD HH:MM:SS" UTC, until exclusive); they are also
+        turned into id bounds through the timestamp index, since ids grow
+        with time, so the id-ordered scan stays short.
+        """
+        if self.db is None:
+            return {"error": "Task history is unavailable without a database"}
         try:
-            cursor = self.db_connection.cursor()
-            cursor.execute("""
-                SELECT event_type, source, data, timestamp 
-                FROM events 
-                WHERE event_type IN ('task_execution', 'task_result', 'task_error')
-                ORDER BY timestamp DESC 
-                LIMIT 100
-            """)
+            limit = max(1, min(int(limit), MAX_HISTORY_PAGE))
+            self.event_writer.flush()
+            
+            conditions = [TASK_EVENT_FILTER]
+            args = []
+            if task_name is not None:
+                conditions.append("task_name = ?")
+                args.append(task_name)
+            if status is not None:
+                conditions.append("status = ?")
+                args.append(status)
+            if before_id is not None:
+                conditions.append("id < ?")
+                args.append(before_id)
             
-            rows = cursor.fetchall()
+            with self.db.read() as cursor:
+                if since is not None:
+                    cursor.execute("""
+                        SELECT id FROM events WHERE timestamp >= ?
+                        ORDER BY timestamp, id LIMIT 1
+                    """, (since.replace('T', ' '),))
+                    row = cursor.fetchone()
+                    if row is None:
+                        return {"history": [], "next_cursor": None}
+                    conditions.append("id >= ?")
+                    args.append(row[0])
+                    conditions.append("timestamp >= ?")
+                    args.append(since.replace('T', ' '))
+                if until is not None:
+                    cursor.execute("""
+                        SELECT id FROM events WHERE timestamp < ?
+                        ORDER BY timestamp DESC, id DESC LIMIT 1
+                    """, (until.replace('T', ' '),))
+                    row = cursor.fetchone()
+                    if row is None:
+                        return {"history": [], "next_cursor": None}
+                    conditions.append("id <= ?")
+                    args.append(row[0])
+                    conditions.append("timestamp < ?")
+                    args.append(until.replace('T', ' '))
+                
+                cursor.execute(f"""
+                    SELECT id, event_type, source, task_name, status, data, timestamp
+                    FROM events
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, args + [limit])
+                
+                rows = cursor.fetchall()
             history = [
                 {
-                    "event_type": row[0],
-                    "source": row[1],
-                    "data": row[2],
-                    "timestamp": row[3]
+                    "id": row[0],
+                    "event_type": row[1],
+                    "source": row[2],
+                    "task_name": row[3],
+                    "status": row[4],
+                    "data": row[5],
+                    "timestamp": row[6]
                 }
                 for row in rows
             ]
             
-            return {"history": history}
+            next_cursor = history[-1]["id"] if len(history) == limit else None
+            return {"history": history, "next_cursor": next_cursor}
         except Exception as e:
             error_msg = f"Failed to retrieve task history: {str(e)}"
             self.logger.error(error_msg)
@@ -273,6 +596,12 @@ if __name__ == "__main__":
     result = manager.execute_task("ai_process", task_params)
     print(json.dumps(result, indent=2))
     
+    print("\nQueueing a port scan...")
+    queued = manager.submit_task("security_scan", {"target": "localhost", "scan_type": "port_scan"})
+    print(json.dumps(manager.task_result(queued["task_id"], timeout=120), indent=2))
+    
     print("\nPerforming health check...")
     health = manager.health_check()
-    print(json.dumps(health, indent=2))
\ No newline at end of file
+    print(json.dumps(health, indent=2))
+    
+    manager.shutdown()
\ No newline at end of file
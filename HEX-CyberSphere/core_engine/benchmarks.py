@@ -0,0 +1,234 @@
+"""
+HEX-CyberSphere Benchmarks
+Performance regression checks for the Python core engine
+
+Usage:
+    python3 benchmarks.py startup [--runs N] [--max-seconds S]
+    python3 benchmarks.py load [--url URL] [--method M] [--body JSON]
+                               [--concurrency C] [--requests N] [--max-p99 S]
+    python3 benchmarks.py json [--file PATH] [--size-mb MB] [--encode-records N]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_PROBE = """
+import json, time
+start = time.perf_counter()
+import automation_manager
+elapsed = time.perf_counter() - start
+from lazy_imports import loaded_heavy_modules
+print(json.dumps({"import_seconds": elapsed, "heavy_modules": loaded_heavy_modules()}))
+"""
+
+
+def bench_startup(runs: int = 5, max_seconds: float = None) -> bool:
+    """Time a cold import of the core engine in fresh interpreters.
+
+    Fails when a heavy library (torch, sklearn, pandas, ...) is imported at
+    startup, or when the median import time exceeds max_seconds.
+    """
+    import_times = []
+    wall_times = []
+    heavy_modules = set()
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", STARTUP_PROBE], cwd=CORE_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        wall_times.append(time.perf_counter() - start)
+        probe = json.loads(output.strip().splitlines()[-1])
+        import_times.append(probe["import_seconds"])
+        heavy_modules.update(probe["heavy_modules"])
+
+    median_import = statistics.median(import_times)
+    print(f"core engine import: median {median_import * 1000:.1f} ms, "
+          f"min {min(import_times) * 1000:.1f} ms over {runs} runs")
+    print(f"interpreter wall time: median {statistics.median(wall_times) * 1000:.1f} ms")
+
+    passed = True
+    if heavy_modules:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(sorted(heavy_modules))}")
+        passed = False
+    if max_seconds is not None and median_import > max_seconds:
+        print(f"FAIL: median import time exceeds {max_seconds:.3f} s")
+        passed = False
+    return passed
+
+
+def bench_load(url: str, method: str = "GET", body: str = None,
+               concurrency: int = 32, requests_total: int = 5000,
+               max_p99: float = None) -> bool:
+    """Drive an HTTP endpoint from keep-alive client threads.
+
+    Reports throughput and latency percentiles; fails on any error
+    response, or when p99 latency exceeds max_p99.
+    """
+    import requests
+
+    payload = json.loads(body) if body else None
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(requests_total))
+
+    def client():
+        session = requests.Session()
+        local_latencies = []
+        local_errors = []
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, json=payload, timeout=60)
+                if response.status_code >= 400:
+                    local_errors.append(response.status_code)
+            except Exception as e:
+                local_errors.append(type(e).__name__)
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    print(f"{method} {url}: {len(latencies)} requests, {concurrency} clients, {elapsed:.2f} s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency: p50 {percentile(0.50) * 1000:.1f} ms, p95 {percentile(0.95) * 1000:.1f} ms, "
+          f"p99 {percentile(0.99) * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+
+    passed = True
+    if errors:
+        print(f"FAIL: {len(errors)} failed requests (first: {errors[0]})")
+        passed = False
+    if max_p99 is not None and percentile(0.99) > max_p99:
+        print(f"FAIL: p99 latency exceeds {max_p99:.3f} s")
+        passed = False
+    return passed
+
+
+def _write_event_dump(path: str, size_mb: float):
+    """Synthetic NDJSON dump shaped like rows of the events table"""
+    target = size_mb * 1024 * 1024
+    written = 0
+    event_id = 0
+    with open(path, 'w') as f:
+        while written < target:
+            event_id += 1
+            line = json.dumps({
+                "id": event_id,
+                "event_type": ("task_execution", "task_result", "scan_finding")[event_id % 3],
+                "source": "automation_manager",
+                "task_name": ("security_scan", "ai_process", "data_parse")[event_id % 3],
+                "status": "completed" if event_id % 7 else "failed",
+                "timestamp": f"2024-01-{event_id % 28 + 1:02d}T12:{event_id % 60:02d}:00",
+                "data": {"target": f"10.0.{event_id // 256 % 256}.{event_id % 256}",
+                         "ports": [22, 80, 443][:event_id % 3 + 1],
+                         "latency_ms": event_id % 1000 / 7,
+                         "message": "Task completed with findings"}
+            }) + "\n"
+            f.write(line)
+            written += len(line)
+
+
+def bench_json(path: str = None, size_mb: float = 100, encode_records: int = 100000) -> bool:
+    """Compare the installed JSON backends on an NDJSON event dump.
+
+    Times DataParser.iter_ndjson over the whole file, then compact
+    encoding of the first encode_records records, for every backend.
+    """
+    import json_codec
+    from data_parser import DataParser
+
+    owned = path is None
+    if owned:
+        with tempfile.NamedTemporaryFile(suffix=".ndjson", delete=False) as f:
+            path = f.name
+        _write_event_dump(path, size_mb)
+    try:
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"{path}: {size:.1f} MB")
+        parser = DataParser()
+        for name in json_codec.available_backends():
+            json_codec.set_backend(name)
+            start = time.perf_counter()
+            records = []
+            count = 0
+            for record in parser.iter_ndjson(pathlib.Path(path)):
+                count += 1
+                if len(records) < encode_records:
+                    records.append(record)
+            decode_seconds = time.perf_counter() - start
+
+            codec = json_codec.get_codec(name)
+            start = time.perf_counter()
+            encoded = sum(len(codec.dumpb(record)) for record in records)
+            encode_seconds = time.perf_counter() - start
+            print(f"{name:>8}: decode {size / decode_seconds:7.1f} MB/s "
+                  f"({count / decode_seconds:,.0f} records/s), "
+                  f"encode {encoded / (1024 * 1024) / encode_seconds:7.1f} MB/s")
+    finally:
+        json_codec.set_backend(None)
+        if owned:
+            os.remove(path)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HEX-CyberSphere core engine benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    startup = subparsers.add_parser("startup", help="cold import time of the core engine")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--max-seconds", type=float, default=None)
+
+    load = subparsers.add_parser("load", help="throughput and latency of the HTTP server")
+    load.add_argument("--url", default="http://localhost:5000/health")
+    load.add_argument("--method", default="GET")
+    load.add_argument("--body", default=None, help="JSON request body")
+    load.add_argument("--concurrency", type=int, default=32)
+    load.add_argument("--requests", type=int, default=5000)
+    load.add_argument("--max-p99", type=float, default=None)
+
+    json_bench = subparsers.add_parser("json", help="JSON backends on an NDJSON event dump")
+    json_bench.add_argument("--file", default=None, help="NDJSON file (default: generated)")
+    json_bench.add_argument("--size-mb", type=float, default=100)
+    json_bench.add_argument("--encode-records", type=int, default=100000)
+
+    args = parser.parse_args()
+    if args.benchmark == "startup":
+        passed = bench_startup(args.runs, args.max_seconds)
+    elif args.benchmark == "load":
+        passed = bench_load(args.url, args.method, args.body, args.concurrency,
+                            args.requests, args.max_p99)
+    elif args.benchmark == "json":
+        passed = bench_json(args.file, args.size_mb, args.encode_records)
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
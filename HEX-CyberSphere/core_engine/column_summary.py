@@ -0,0 +1,341 @@
+"""
+HEX-CyberSphere Column Summary
+Mergeable per-column summaries of numeric data with bounded memory
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+DEFAULT_PERCENTILES = (0.25, 0.5, 0.75)
+
+# Values kept verbatim per column before switching to the quantile sketch
+DEFAULT_EXACT_LIMIT = 1 << 20
+DEFAULT_SKETCH_SIZE = 4096
+
+
+class QuantileSketch:
+    """KLL-style compactor sketch for approximate quantiles.
+
+    Level i holds items standing for 2**i original values. When a level
+    grows past `size` items it is sorted and every other item (from a random
+    offset) is promoted to the next level, so memory stays O(size * log n)
+    however many values are added. Sketches built on separate chunks merge
+    by concatenating levels.
+    """
+
+    def __init__(self, size: int = DEFAULT_SKETCH_SIZE, seed: Optional[int] = None):
+        self.size = size
+        self.levels: List[List[Any]] = [[]]
+        self.level_sizes: List[int] = [0]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Add a 1-D array of finite values"""
+        if len(values):
+            self._add(0, values)
+
+    def merge(self, other: "QuantileSketch"):
+        for level, arrays in enumerate(other.levels):
+            for values in arrays:
+                if len(values):
+                    self._add(level, values)
+
+    def _add(self, level: int, values):
+        while len(self.levels) <= level:
+            self.levels.append([])
+            self.level_sizes.append(0)
+        self.levels[level].append(values)
+        self.level_sizes[level] += len(values)
+        if self.level_sizes[level] > self.size:
+            self._compact(level)
+
+    def _compact(self, level: int):
+        items = np.sort(np.concatenate(self.levels[level]))
+        leftover = items[:0]
+        if len(items) % 2:
+            leftover, items = items[-1:], items[:-1]
+        self.levels[level] = [leftover]
+        self.level_sizes[level] = len(leftover)
+        self._add(level + 1, items[self._rng.integers(2)::2])
+
+    def quantiles(self, percentiles: Sequence[float]) -> List[float]:
+        """Approximate values at the given percentiles (0..1)"""
+        items, weights = [], []
+        for level, arrays in enumerate(self.levels):
+            for values in arrays:
+                items.append(values)
+                weights.append(np.full(len(values), 2.0 ** level))
+        if not items:
+            return [math.nan] * len(percentiles)
+
+        items = np.concatenate(items)
+        weights = np.concatenate(weights)
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(percentiles) * (cumulative[-1] - 1)
+        positions = np.searchsorted(cumulative, ranks, side='right')
+        return items[np.minimum(positions, len(items) - 1)].tolist()
+
+
+class ColumnSummary:
+    """Count, mean, variance, extremes and quantiles of one column.
+
+    Moments are merged with Chan's parallel update, so chunks can be
+    summarised independently and combined. Quantiles are exact (matching
+    pandas' linear interpolation) until `exact_limit` values have been
+    seen, then come from a QuantileSketch.
+    """
+
+    def __init__(self, exact_limit: int = DEFAULT_EXACT_LIMIT,
+                 sketch_size: int = DEFAULT_SKETCH_SIZE):
+        self.exact_limit = exact_limit
+        self.sketch_size = sketch_size
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.values: Optional[List[Any]] = []
+        self.sketch: Optional[QuantileSketch] = None
+
+    def update(self, values):
+        """Fold a 1-D numeric array into the summary; NaNs are ignored"""
+        values = np.asarray(values, dtype=np.float64)
+        if np.isnan(values).any():
+            values = values[~np.isnan(values)]
+        count = len(values)
+        if not count:
+            return
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        self._combine(count, mean, m2, float(values.min()), float(values.max()))
+        self._add_values(values)
+
+    def merge(self, other: "ColumnSummary"):
+        if not other.count:
+            return
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        if other.sketch is not None:
+            self._to_sketch()
+            self.sketch.merge(other.sketch)
+        else:
+            for values in other.values:
+                self._add_values(values)
+
+    def _combine(self, count: int, mean: float, m2: float, minimum: float, maximum: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def _add_values(self, values):
+        if self.sketch is not None:
+            self.sketch.update(values)
+            return
+        self.values.append(values)
+        if self.count > self.exact_limit:
+            self._to_sketch()
+
+    def _to_sketch(self):
+        if self.sketch is None:
+            self.sketch = QuantileSketch(self.sketch_size)
+            for values in self.values:
+                self.sketch.update(values)
+            self.values = None
+
+    @property
+    def exact(self) -> bool:
+        return self.sketch is None
+
+    def quantiles(self, percentiles: Sequence[float]) -> List[float]:
+        if not self.count:
+            return [math.nan] * len(percentiles)
+        if self.sketch is not None:
+            return self.sketch.quantiles(percentiles)
+        values = self.values[0] if len(self.values) == 1 else np.concatenate(self.values)
+        return np.quantile(values, percentiles).tolist()
+
+    def describe(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Statistics keyed like pandas' DataFrame.describe()"""
+        empty = not self.count
+        summary = {
+            'count': float(self.count),
+            'mean': math.nan if empty else self.mean,
+            'std': math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan,
+            'min': math.nan if empty else self.min
+        }
+        for percentile, value in zip(percentiles, self.quantiles(percentiles)):
+            summary[f"{percentile * 100:g}%"] = value
+        summary['max'] = math.nan if empty else self.max
+        return summary
+
+
+class CategoricalSummary:
+    """Count, distinct values and most frequent value of a non-numeric column.
+
+    Memory grows with the number of distinct values, so this is only kept
+    while a table has no numeric columns (see ColumnarSummary).
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    def update(self, values):
+        """Fold a column into the summary; None and NaN are missing. Raises TypeError for unhashable values"""
+        if hasattr(values, 'to_pylist'):
+            values = values.to_pylist()
+        elif hasattr(values, 'tolist'):
+            values = values.tolist()
+        self.counts.update(value for value in values
+                           if value is not None and not (isinstance(value, float) and math.isnan(value)))
+
+    def merge(self, other: "CategoricalSummary"):
+        self.counts.update(other.counts)
+
+    def describe(self) -> Dict[str, Any]:
+        """Statistics keyed like pandas' describe() of an object column"""
+        if not self.counts:
+            return {'count': 0, 'unique': 0, 'top': math.nan, 'freq': math.nan}
+        top, freq = self.counts.most_common(1)[0]
+        return {'count': sum(self.counts.values()), 'unique': len(self.counts),
+                'top': top, 'freq': freq}
+
+
+def numeric_array(values):
+    """Return values as a 1-D float array, or None when the column is not numeric.
+
+    NumPy arrays and null-free Arrow arrays are viewed without copying.
+    Booleans are skipped, as pandas' describe() skips them.
+    """
+    if hasattr(values, 'chunks'):
+        # pyarrow.ChunkedArray: one view per chunk
+        arrays = [numeric_array(chunk) for chunk in values.chunks]
+        if any(array is None for array in arrays):
+            return None
+        return np.concatenate(arrays) if len(arrays) != 1 else arrays[0]
+    if type(values).__module__.startswith('pyarrow'):
+        try:
+            values = values.to_numpy(zero_copy_only=values.null_count == 0)
+        except Exception:
+            return None
+
+    array = np.asarray(values)
+    if array.ndim != 1:
+        return None
+    if array.dtype.kind in 'iuf':
+        return array
+    if array.dtype.kind == 'O' and all(
+            value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+            for value in array):
+        return array.astype(np.float64)
+    return None
+
+
+def iter_columns(chunk):
+    """Yield (name, values) pairs from a dict of columns or an Arrow table/batch"""
+    if hasattr(chunk, 'column_names') and hasattr(chunk, 'column'):
+        for name in chunk.column_names:
+            yield name, chunk.column(name)
+    else:
+        yield from chunk.items()
+
+
+class ColumnarSummary:
+    """Summaries of every numeric column across one or more chunks.
+
+    A chunk is a dict of equal-length columns (lists or NumPy arrays) or a
+    pyarrow Table / RecordBatch. Summaries of separate chunks can be merged,
+    so large inputs can be processed piecewise or in parallel. Like pandas'
+    describe(), a table without numeric columns gets count/unique/top/freq
+    for its other columns instead; those are dropped once a numeric column
+    appears.
+    """
+
+    def __init__(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                 exact_limit: int = DEFAULT_EXACT_LIMIT,
+                 sketch_size: int = DEFAULT_SKETCH_SIZE):
+        self.percentiles = tuple(percentiles)
+        self.exact_limit = exact_limit
+        self.sketch_size = sketch_size
+        self.rows = 0
+        self.columns: List[str] = []
+        self.summaries: Dict[str, ColumnSummary] = {}
+        self.categorical: Optional[Dict[str, CategoricalSummary]] = {}
+
+    def update(self, chunk) -> "ColumnarSummary":
+        rows = 0
+        for name, values in iter_columns(chunk):
+            if name not in self.columns:
+                self.columns.append(name)
+            rows = max(rows, len(values))
+            array = numeric_array(values)
+            if array is None:
+                self._update_categorical(name, values)
+                continue
+            self.categorical = None
+            summary = self.summaries.get(name)
+            if summary is None:
+                summary = self.summaries[name] = ColumnSummary(self.exact_limit, self.sketch_size)
+            summary.update(array)
+        self.rows += rows
+        return self
+
+    def _update_categorical(self, name: str, values):
+        if self.categorical is None:
+            return
+        summary = self.categorical.get(name)
+        if summary is None:
+            summary = self.categorical[name] = CategoricalSummary()
+        try:
+            summary.update(values)
+        except TypeError:
+            # Unhashable values (lists, dicts) have no most frequent value
+            self.categorical.pop(name)
+
+    def update_chunks(self, chunks: Iterable[Any]) -> "ColumnarSummary":
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def merge(self, other: "ColumnarSummary") -> "ColumnarSummary":
+        self.rows += other.rows
+        for name in other.columns:
+            if name not in self.columns:
+                self.columns.append(name)
+        for name, summary in other.summaries.items():
+            if name not in self.summaries:
+                self.summaries[name] = ColumnSummary(self.exact_limit, self.sketch_size)
+            self.summaries[name].merge(summary)
+        if self.summaries or other.categorical is None:
+            self.categorical = None
+        elif self.categorical is not None:
+            for name, summary in other.categorical.items():
+                self.categorical.setdefault(name, CategoricalSummary()).merge(summary)
+        return self
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        if not self.summaries and self.categorical:
+            return {name: self.categorical[name].describe()
+                    for name in self.columns if name in self.categorical}
+        return {name: self.summaries[name].describe(self.percentiles)
+                for name in self.columns if name in self.summaries}
+
+    def result(self) -> Dict[str, Any]:
+        """rows/columns/summary in the shape AIFramework.process_data returns"""
+        result = {
+            'rows': self.rows,
+            'columns': list(self.columns),
+            'summary': self.describe()
+        }
+        approximate = [name for name, summary in self.summaries.items() if not summary.exact]
+        if approximate:
+            result['approximate_quantiles'] = approximate
+        return result
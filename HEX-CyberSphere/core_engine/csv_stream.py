@@ -0,0 +1,249 @@
+"""
+HEX-CyberSphere CSV Stream
+Chunked CSV reading with typed columns and NumPy/Arrow batches
+"""
+
+import csv
+import io
+import itertools
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+# Column types, narrowest first; a column widens along its chain when a
+# value does not parse
+BOOL, INT, FLOAT, STR = 'bool', 'int', 'float', 'str'
+WIDER = {BOOL: STR, INT: FLOAT, FLOAT: STR}
+
+BOOL_WORDS = {'true': True, 'false': False}
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_SAMPLE_ROWS = 1000
+READ_BUFFER = 1 << 20
+
+
+def _parses(value: str, parse) -> bool:
+    try:
+        parse(value)
+        return True
+    except (ValueError, OverflowError):
+        return False
+
+
+def infer_type(values: Sequence[str]) -> str:
+    """Narrowest column type that every (non-missing) value parses as"""
+    if not values:
+        return STR
+    if all(value.strip().lower() in BOOL_WORDS for value in values):
+        return BOOL
+    if all(_parses(value, int) for value in values):
+        return INT
+    if all(_parses(value, float) for value in values):
+        return FLOAT
+    return STR
+
+
+def open_text(source: Any, encoding: str = 'utf-8-sig') -> Tuple[Any, Optional[str]]:
+    """Text stream over text, a bytes-like buffer, a path or a file object.
+
+    Only os.PathLike objects (e.g. pathlib.Path) are paths; a plain str is
+    always the data itself. The second item says how release_text must let
+    go of the stream.
+    """
+    if isinstance(source, str):
+        return io.StringIO(source, newline=''), None
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.TextIOWrapper(io.BytesIO(source), encoding=encoding, newline=''), None
+    if isinstance(source, os.PathLike):
+        return open(source, 'r', encoding=encoding, newline='', buffering=READ_BUFFER), 'close'
+    if isinstance(source, io.TextIOBase) or isinstance(source.read(0), str):
+        return source, None
+    # Binary file object owned by the caller: decode without closing it
+    return io.TextIOWrapper(source, encoding=encoding, newline=''), 'detach'
+
+
+def release_text(stream: Any, how: Optional[str]):
+    if how == 'close':
+        stream.close()
+    elif how == 'detach':
+        stream.detach()
+
+
+class CSVStream:
+    """Reads a CSV source in batches, converting each column to one type.
+
+    The source may be CSV text (str), a bytes-like buffer, a path
+    (os.PathLike such as pathlib.Path; a str is never taken as a path), or
+    a text or binary file object; it is read incrementally, so memory is bounded by
+    the batch size rather than the input size. Column types are inferred
+    once from the first `sample_rows` rows (bool, int, float or str;
+    values in `na_values` are missing). If a later value does not fit, the
+    column widens (int -> float -> str, bool -> str) from that batch on.
+    Quoted fields may span lines.
+    """
+
+    def __init__(self, source: Any, delimiter: str = ',', encoding: str = 'utf-8-sig',
+                 infer_types: bool = True, sample_rows: int = DEFAULT_SAMPLE_ROWS,
+                 na_values: Sequence[str] = ('',), types: Dict[str, str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.na_values = set(na_values)
+        self.rows_read = 0
+        self.malformed_rows = 0
+        self._stream, self._owned = open_text(source, encoding)
+        self._reader = csv.reader(self._stream, delimiter=delimiter)
+        self.columns = self._read_header()
+
+        # Rows read for inference are replayed as the first batch
+        self._sample = self._read_rows(sample_rows if infer_types else 0)
+        self.types: Dict[str, str] = {}
+        for index, name in enumerate(self.columns):
+            if types and name in types:
+                self.types[name] = types[name]
+            elif infer_types:
+                values = [row[index] for row in self._sample if row[index] not in self.na_values]
+                self.types[name] = infer_type(values)
+            else:
+                self.types[name] = STR
+
+    def _read_header(self) -> List[str]:
+        header = next((row for row in self._reader if row), [])
+        columns = []
+        seen: Dict[str, int] = {}
+        for index, name in enumerate(header):
+            name = name.strip() or f"column_{index}"
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+
+    def _read_rows(self, count: int) -> List[List[str]]:
+        """Up to count non-blank rows; fewer only when the input is exhausted"""
+        width = len(self.columns)
+        rows = []
+        while len(rows) < count:
+            chunk = list(itertools.islice(self._reader, count - len(rows)))
+            if not chunk:
+                break
+            if set(map(len, chunk)) - {width}:
+                # Blank lines are dropped, so keep reading to fill the batch
+                chunk = [self._fit(row, width) for row in chunk if row]
+            rows.extend(chunk)
+        self.rows_read += len(rows)
+        return rows
+
+    def _fit(self, row: List[str], width: int) -> List[str]:
+        if len(row) == width:
+            return row
+        self.malformed_rows += 1
+        return (row + [''] * width)[:width]
+
+    def _raw_batches(self, batch_size: int) -> Iterator[List[List[str]]]:
+        if self._sample:
+            yield self._sample
+            self._sample = []
+        while True:
+            rows = self._read_rows(batch_size)
+            if not rows:
+                return
+            yield rows
+
+    def _convert(self, name: str, raw: Sequence[str]) -> Tuple[Any, Any]:
+        """(values, missing mask or None) for one column of raw strings"""
+        while True:
+            kind = self.types[name]
+            try:
+                return self._parse(kind, raw)
+            except (ValueError, OverflowError, KeyError):
+                self.types[name] = WIDER[kind]
+                self.logger.warning(f"CSV column {name} widened from {kind} to {self.types[name]}")
+
+    def _parse(self, kind: str, raw: Sequence[str]) -> Tuple[Any, Any]:
+        count = len(raw)
+        if kind in (INT, FLOAT):
+            dtype, parse = (np.int64, int) if kind == INT else (np.float64, float)
+            try:
+                # Fast path: no missing values
+                return np.fromiter(map(parse, raw), dtype, count), None
+            except ValueError:
+                pass
+        missing = np.fromiter(map(self.na_values.__contains__, raw), bool, count)
+        if not missing.any():
+            missing = None
+        if kind == STR:
+            return np.array(raw, dtype=object), missing
+        if missing is not None:
+            fill = {BOOL: 'false', INT: '0', FLOAT: 'nan'}[kind]
+            raw = [fill if absent else value for value, absent in zip(raw, missing.tolist())]
+        if kind == BOOL:
+            words = map(str.lower, map(str.strip, raw))
+            return np.fromiter(map(BOOL_WORDS.__getitem__, words), bool, count), missing
+        return np.fromiter(map(parse, raw), dtype, count), missing
+
+    def _typed_columns(self, rows: List[List[str]]) -> Dict[str, Tuple[Any, Any]]:
+        return {name: self._convert(name, raw) for name, raw in zip(self.columns, zip(*rows))}
+
+    def batches(self, batch_size: int = DEFAULT_BATCH_SIZE,
+                output: str = 'numpy') -> Iterator[Any]:
+        """Yield column batches of up to batch_size rows.
+
+        'numpy' yields dicts of 1-D arrays: int columns with missing values
+        become float64 with NaN, and missing bool/str values are None in an
+        object array. 'arrow' yields pyarrow RecordBatches with real nulls.
+        """
+        if output not in ('numpy', 'arrow'):
+            raise ValueError(f"Unknown CSV batch output: {output}")
+        if output == 'arrow':
+            # Optional dependency: only needed for Arrow output
+            import pyarrow as pa
+        for rows in self._raw_batches(batch_size):
+            columns = self._typed_columns(rows)
+            if output == 'arrow':
+                yield pa.RecordBatch.from_arrays(
+                    [pa.array(values, mask=mask) if self.types[name] != STR
+                     else pa.array(np.where(mask, None, values) if mask is not None else values,
+                                   type=pa.string())
+                     for name, (values, mask) in columns.items()],
+                    names=list(columns))
+            else:
+                yield {name: self._numpy_column(name, values, mask)
+                       for name, (values, mask) in columns.items()}
+
+    def _numpy_column(self, name: str, values, mask):
+        if mask is None:
+            return values
+        if self.types[name] == INT:
+            values = values.astype(np.float64)
+            values[mask] = np.nan
+            return values
+        if self.types[name] == FLOAT:
+            return values
+        values = values.astype(object)
+        values[mask] = None
+        return values
+
+    def rows(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[tuple]:
+        """Yield typed row tuples; missing values are None"""
+        for rows in self._raw_batches(batch_size):
+            columns = []
+            for name, (values, mask) in self._typed_columns(rows).items():
+                values = values.tolist()
+                if mask is not None:
+                    for index in np.flatnonzero(mask).tolist():
+                        values[index] = None
+                columns.append(values)
+            yield from zip(*columns)
+
+    def close(self):
+        release_text(self._stream, self._owned)
+        self._owned = None
+
+    def __enter__(self) -> "CSVStream":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
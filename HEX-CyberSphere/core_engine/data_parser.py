@@ -6,10 +6,20 @@ Handles parsing and transformation of various data formats
 import json
 import yaml
 import csv
+import io
 import xml.etree.ElementTree as ET
-import pandas as pd
 import logging
-from typing import Dict, Any, List
+import os
+from typing import Callable, Dict, Any, Iterator, List, Optional
+import json_codec
+from payload_schemas import get_schema
+from csv_stream import CSVStream, DEFAULT_BATCH_SIZE
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+# Bytes read from an NDJSON source at a time
+NDJSON_CHUNK_SIZE = 1 << 20
 
 class DataParser:
     def __init__(self):
@@ -18,11 +28,107 @@ class DataParser:
     def parse_json(self, data: str) -> Dict[Any, Any]:
         """Parse JSON data"""
         try:
-            return json.loads(data)
+            return json_codec.loads(data)
         except json.JSONDecodeError as e:
             self.logger.error(f"JSON parsing error: {e}")
             return {'error': f'JSON parsing failed: {str(e)}'}
     
+    def parse_typed(self, data: Any, schema: str) -> Any:
+        """Decode JSON straight into the typed objects of a registered payload schema.
+
+        An object gives one instance, an array a list of them; data that is
+        already parsed (dicts/lists) is validated and converted the same way.
+        """
+        try:
+            return get_schema(schema).decode(data)
+        except ValueError as e:
+            self.logger.error(f"Schema validation error: {e}")
+            return {'error': f'Schema validation failed: {str(e)}'}
+    
+    def iter_ndjson(self, source: Any, errors: str = 'raise',
+                    chunk_size: int = NDJSON_CHUNK_SIZE, schema: str = None) -> Iterator[Any]:
+        """Stream records from NDJSON (JSON lines).
+
+        The source may be text, bytes, a path, a file object, a socket or
+        any iterable of text/bytes chunks (e.g. an HTTP response's
+        iter_content()). It is read chunk_size bytes at a time and decoded
+        with the fastest installed JSON backend; blank lines are skipped.
+        With errors='skip' malformed lines are logged and dropped instead
+        of raising. With a payload schema name, each line is decoded into
+        that schema's typed objects and lines that do not match it count as
+        malformed.
+        """
+        codec = get_schema(schema) if schema else json_codec.get_codec()
+        line_number = 0
+        pending = None
+        for chunk in self._ndjson_chunks(source, chunk_size):
+            if pending:
+                chunk = pending + chunk
+            newline = '\n' if isinstance(chunk, str) else b'\n'
+            end = chunk.rfind(newline) + 1
+            pending = chunk[end:]
+            if end:
+                line_number = yield from self._ndjson_block(codec, chunk[:end], line_number, errors)
+        if pending and pending.strip():
+            yield from self._ndjson_block(codec, pending, line_number, errors)
+    
+    def _ndjson_chunks(self, source: Any, chunk_size: int) -> Iterator[Any]:
+        if isinstance(source, (str, bytes, bytearray)):
+            yield source
+            return
+        if isinstance(source, memoryview):
+            yield source.tobytes()
+            return
+        
+        stream = None
+        if isinstance(source, os.PathLike):
+            stream = open(source, 'rb')
+        elif hasattr(source, 'recv') and hasattr(source, 'makefile'):
+            stream = source.makefile('rb')
+        if stream is not None or hasattr(source, 'read'):
+            reader = stream or source
+            # read1 returns what is available, so records from a socket are not held back
+            read = getattr(reader, 'read1', reader.read)
+            try:
+                while True:
+                    chunk = read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+            finally:
+                if stream is not None:
+                    stream.close()
+        else:
+            yield from source
+    
+    def _ndjson_block(self, codec: Any, block: Any, line_number: int,
+                      errors: str) -> Iterator[Any]:
+        """Yield the records of complete lines; returns the last line number"""
+        newline = '\n' if isinstance(block, str) else b'\n'
+        try:
+            records = codec.loads_lines(block)
+        except ValueError:
+            records = None
+        if records is not None:
+            yield from records
+            return line_number + block.count(newline)
+        
+        # Decode line by line to report (or skip) the bad ones
+        for line in block.split(newline):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = codec.loads(line)
+            except ValueError as e:
+                if errors != 'skip':
+                    raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+                self.logger.warning(f"Skipping invalid NDJSON line {line_number}: {e}")
+                continue
+            yield record
+        # A block ends with its newline, so splitting counted one line too many
+        return line_number - 1 if block.endswith(newline) else line_number
+    
     def parse_yaml(self, data: str) -> Dict[Any, Any]:
         """Parse YAML data"""
         try:
@@ -32,15 +138,42 @@ class DataParser:
             return {'error': f'YAML parsing failed: {str(e)}'}
     
     def parse_csv(self, data: str) -> List[Dict[str, Any]]:
-        """Parse CSV data"""
+        """Parse CSV data into one dict of strings per row.
+
+        Use iter_csv for large inputs or typed values.
+        """
         try:
-            lines = data.strip().split('\n')
-            reader = csv.DictReader(lines)
-            return list(reader)
+            stream = io.StringIO(data, newline='')
+            # Leading blank lines come before the header
+            header = next((row for row in csv.reader(stream) if row), None)
+            return list(csv.DictReader(stream, fieldnames=header))
         except Exception as e:
             self.logger.error(f"CSV parsing error: {e}")
             return [{'error': f'CSV parsing failed: {str(e)}'}]
     
+    def iter_csv(self, source: Any, output: str = 'rows', batch_size: int = DEFAULT_BATCH_SIZE,
+                 **options) -> Iterator[Any]:
+        """Stream CSV from text, bytes, a path or a file object with typed columns.
+
+        Paths must be os.PathLike (e.g. pathlib.Path); a plain str is
+        parsed as CSV text, as everywhere else in DataParser.
+
+        output='rows' yields the header tuple, then one typed tuple per row,
+        like csv.reader. 'numpy' and 'arrow' yield column batches of up to
+        batch_size rows, which AIFramework.process_data can summarise
+        directly. Options are passed to CSVStream (delimiter, encoding,
+        infer_types, sample_rows, na_values, types).
+        """
+        with CSVStream(source, **options) as stream:
+            self.logger.info(f"Streaming CSV with columns {stream.types}")
+            if output == 'rows':
+                yield tuple(stream.columns)
+                yield from stream.rows(batch_size)
+            else:
+                yield from stream.batches(batch_size, output)
+            if stream.malformed_rows:
+                self.logger.warning(f"{stream.malformed_rows} CSV rows had the wrong number of fields")
+    
     def parse_xml(self, data: str) -> Dict[str, Any]:
         """Parse XML data"""
         try:
@@ -50,6 +183,66 @@ class DataParser:
             self.logger.error(f"XML parsing error: {e}")
             return {'error': f'XML parsing failed: {str(e)}'}
     
+    def iter_xml(self, source: Any, tag: str = None, path: str = None,
+                 as_dict: bool = True) -> Iterator[Any]:
+        """Stream record elements from XML text, bytes, a path or a file object.
+
+        Records are the elements named `tag` anywhere in the document, or
+        those at `path` below the root (e.g. "host" or "host/ports/port",
+        with "*" matching any name); by default, the root's children. Tags
+        match with or without their namespace. Records nested in a record
+        are part of it. Each record is yielded as a dict (as parse_xml
+        builds them) or, with as_dict=False, as the Element itself, valid
+        until the next record. Elements are discarded once processed, so
+        memory stays flat however large the document is.
+        """
+        match = self._xml_matcher(tag, path)
+        owned = isinstance(source, os.PathLike)
+        if isinstance(source, str):
+            source = io.StringIO(source)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        elif owned:
+            source = open(source, 'rb')
+        
+        stack: List[ET.Element] = []
+        record = None  # depth of the open record
+        try:
+            for event, element in ET.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    stack.append(element)
+                    if record is None and match(stack):
+                        record = len(stack) - 1
+                    continue
+                
+                depth = len(stack) - 1
+                stack.pop()
+                if record is not None and depth > record:
+                    continue  # Kept until the enclosing record is done
+                if depth == record:
+                    record = None
+                    yield self._xml_to_dict(element) if as_dict else element
+                if stack:
+                    # A finished element is always its parent's last child
+                    element.clear()
+                    del stack[-1][-1]
+        finally:
+            if owned:
+                source.close()
+    
+    def _xml_matcher(self, tag: Optional[str], path: Optional[str]) -> Callable[[List[ET.Element]], bool]:
+        """Test of whether the innermost element on a start stack is a record"""
+        def named(element: ET.Element, name: str) -> bool:
+            return name in ('*', element.tag, element.tag.rsplit('}', 1)[-1])
+        
+        if path:
+            steps = [step for step in path.strip('/').split('/') if step not in ('', '.')]
+            return lambda stack: (len(stack) == len(steps) + 1 and
+                                  all(named(element, step) for element, step in zip(stack[1:], steps)))
+        if tag:
+            return lambda stack: named(stack[-1], tag)
+        return lambda stack: len(stack) == 2
+    
     def _xml_to_dict(self, element: ET.Element) -> Dict[str, Any]:
         """Convert XML element to dictionary"""
         result = {}
@@ -76,23 +269,49 @@ class DataParser:
         
         return result
     
-    def convert_format(self, data: Any, from_format: str, to_format: str) -> str:
-        """Convert data between formats"""
+    def convert_format(self, data: Any, from_format: str, to_format: str,
+                       indent: int = None, **options) -> Any:
+        """Convert in-memory data between any two supported formats.
+
+        Formats: json, ndjson, yaml, csv, xml, and parquet/arrow when
+        pyarrow is installed. Returns text, or bytes for parquet/arrow.
+        JSON output is compact unless an indent is given for human readers.
+        Use convert_stream for files.
+        """
+        # format_pipeline builds on this module's readers
+        from format_pipeline import WRITERS, convert
+        
         try:
-            if from_format == 'json' and to_format == 'yaml':
-                parsed = self.parse_json(data)
-                return yaml.dump(parsed, default_flow_style=False)
-            elif from_format == 'yaml' and to_format == 'json':
-                parsed = self.parse_yaml(data)
-                return json.dumps(parsed, indent=2)
-            elif from_format == 'csv' and to_format == 'json':
-                parsed = self.parse_csv(data)
-                return json.dumps(parsed, indent=2)
-            else:
-                return json.dumps({'error': f'Conversion from {from_format} to {to_format} not supported'})
+            if to_format == 'json' and indent is not None:
+                options.setdefault('writer_options', {})['indent'] = indent
+            output = io.BytesIO()
+            convert(data, output, from_format, to_format, **options)
+            writer = WRITERS[to_format]
+            return output.getvalue() if writer.binary else output.getvalue().decode('utf-8')
         except Exception as e:
             self.logger.error(f"Format conversion error: {e}")
             return json.dumps({'error': f'Conversion failed: {str(e)}'})
+    
+    def convert_stream(self, source: Any, sink: Any, from_format: str, to_format: str,
+                       **options) -> Dict[str, Any]:
+        """Convert a file or stream of any size in bounded batches.
+
+        source and sink are paths (os.PathLike, e.g. pathlib.Path) or file
+        objects. A str is never a path: as source it is the data itself,
+        and as sink it is an error, so convert_stream("in.csv", "out.json")
+        fails instead of converting the text "in.csv". Options
+        are those of format_pipeline.convert (batch_size, reader_options,
+        writer_options). Returns record counts.
+        """
+        from format_pipeline import convert
+        
+        try:
+            result = convert(source, sink, from_format, to_format, **options)
+            self.logger.info(f"Converted {result['records']} records from {from_format} to {to_format}")
+            return result
+        except Exception as e:
+            self.logger.error(f"Format conversion error: {e}")
+            return {'error': f'Conversion failed: {str(e)}'}
 
 # Example usage
 if __name__ == "__main__":
@@ -121,4 +340,23 @@ HEX-CyberSphere,1.0.0,AI
 HEX-CyberSphere,1.0.0,Security
 HEX-CyberSphere,1.0.0,Web Automation"""
     print("\nCSV Data:")
-    print(json.dumps(parser.parse_csv(csv_data), indent=2))
\ No newline at end of file
+    print(json.dumps(parser.parse_csv(csv_data), indent=2))
+    
+    # Test streaming CSV parsing with typed columns
+    print("\nTyped CSV rows:")
+    for row in parser.iter_csv("port,open,latency\n22,true,0.8\n80,false,\n"):
+        print(row)
+    
+    # Test streaming XML records
+    xml_data = '<nmaprun><host><address addr="10.0.0.1"/></host><host><address addr="10.0.0.2"/></host></nmaprun>'
+    print("\nXML hosts:")
+    for host in parser.iter_xml(xml_data, tag='host'):
+        print(json.dumps(host))
+    
+    # Test format conversion
+    print("\nCSV as NDJSON:")
+    print(parser.convert_format(csv_data, 'csv', 'ndjson'))
+    
+    # Test typed decoding with a payload schema
+    print("\nTyped scan result:")
+    print(parser.parse_typed('{"target": "10.0.0.1", "scan_type": "port_scan", "open_ports": [{"port": 22, "service": "ssh"}]}', 'scan_result'))
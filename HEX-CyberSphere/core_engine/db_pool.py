@@ -0,0 +1,376 @@
+"""
+HEX-CyberSphere Database Pool
+Thread-safe connection pooling for SQLite and Postgres
+"""
+
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, ContextManager, Dict, Iterator
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schema script of each backend; both are idempotent
+SCHEMA_PATHS = {
+    'sqlite': os.path.join(_ROOT, 'scripts', 'schema.sql'),
+    'postgres': os.path.join(_ROOT, 'database', 'init.sql')
+}
+
+# Columns added after the original schema, for existing databases
+ADDED_COLUMNS = {
+    'events': {'task_name': 'TEXT', 'status': 'TEXT'},
+    'tasks': {'result': 'TEXT', 'owner': 'TEXT'}
+}
+
+# Columns whose type changed; only Postgres enforces column types
+CHANGED_COLUMNS = {
+    'events': {'data': 'TEXT'}
+}
+
+# Version of the schema that init_schema migrates to. Bump it whenever a
+# schema script, ADDED_COLUMNS or CHANGED_COLUMNS changes.
+SCHEMA_VERSION = 1
+
+# Postgres advisory lock key serialising migrations across processes
+MIGRATION_LOCK = 0x4845585f534348  # "HEX_SCH"
+
+# Index statements of a schema script; on Postgres they are built CONCURRENTLY
+_CREATE_INDEX = re.compile(r"CREATE INDEX IF NOT EXISTS\s+(\w+)\s+(ON\s[^;]*);", re.IGNORECASE)
+
+# Quoted literals, quoted identifiers and comments, or a bare ? or %
+_SQL_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/|\?|%", re.DOTALL)
+
+
+@lru_cache(maxsize=1024)
+def format_paramstyle(query: str) -> str:
+    """Rewrite a '?' query for psycopg's format paramstyle.
+
+    Placeholders become %s only outside string literals, quoted identifiers
+    and comments. Every literal % is doubled, since psycopg applies
+    %-formatting to the whole statement whenever parameters are passed.
+    """
+    def replace(match):
+        token = match.group()
+        if token == '?':
+            return '%s'
+        return token.replace('%', '%%')
+    return _SQL_TOKENS.sub(replace, query)
+
+
+class PooledCursor:
+    """DB-API cursor that accepts '?' placeholders on every backend"""
+
+    def __init__(self, cursor, pool: "ConnectionPool"):
+        self.cursor = cursor
+        self.pool = pool
+
+    def execute(self, sql: str, args=()):
+        self.cursor.execute(self.pool.sql(sql), args)
+        return self
+
+    def executemany(self, sql: str, rows):
+        self.cursor.executemany(self.pool.sql(sql), rows)
+        return self
+
+    def executescript(self, script: str):
+        if self.pool.dialect == 'sqlite':
+            self.cursor.executescript(script)
+        else:
+            self.cursor.execute(script)
+        return self
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    @property
+    def rowcount(self) -> int:
+        return self.cursor.rowcount
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+
+class ConnectionPool(ABC):
+    """Interface shared by the SQLite and Postgres pools.
+
+    write() yields a cursor inside a transaction that commits when the
+    block exits and rolls back on error; read() yields a cursor for
+    queries. SQL is written with '?' placeholders and rewritten for the
+    backend's paramstyle.
+    """
+
+    dialect = None
+
+    def sql(self, query: str) -> str:
+        return query
+
+    @abstractmethod
+    def write(self) -> ContextManager[PooledCursor]:
+        """Cursor inside a transaction"""
+
+    @abstractmethod
+    def read(self) -> ContextManager[PooledCursor]:
+        """Cursor for queries"""
+
+    def close(self):
+        pass
+
+
+class SQLitePool(ConnectionPool):
+    """One writer connection and a bounded set of reader connections.
+
+    SQLite allows a single writer at a time, so writes are serialised on
+    one connection behind a lock instead of contending on the file lock.
+    Readers run concurrently under WAL. Every connection keeps a cache of
+    prepared statements.
+    """
+
+    dialect = 'sqlite'
+
+    def __init__(self, path: str, readers: int = 4, busy_timeout: int = 5000,
+                 mmap_size: int = 256 * 1024 * 1024, cached_statements: int = 256):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._write_lock = threading.RLock()
+        self._readers = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(readers)
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000,
+                               check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        # WAL needs no fsync per commit with synchronous=NORMAL
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def write(self) -> Iterator[PooledCursor]:
+        with self._write_lock:
+            cursor = self._writer.cursor()
+            try:
+                yield PooledCursor(cursor, self)
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def read(self) -> Iterator[PooledCursor]:
+        with self._reader_slots:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect(read_only=True)
+            cursor = conn.cursor()
+            try:
+                yield PooledCursor(cursor, self)
+            finally:
+                cursor.close()
+                # End the implicit read transaction so the WAL can checkpoint
+                conn.rollback()
+                self._readers.put(conn)
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class PostgresPool(ConnectionPool):
+    """psycopg2 ThreadedConnectionPool behind the same interface"""
+
+    dialect = 'postgres'
+
+    def __init__(self, dsn: str, min_connections: int = 1, max_connections: int = 10):
+        # Optional dependency: only needed when the core targets Postgres
+        from psycopg2 import pool
+
+        self.logger = logging.getLogger(__name__)
+        self._pool = pool.ThreadedConnectionPool(min_connections, max_connections, dsn)
+
+    def sql(self, query: str) -> str:
+        return format_paramstyle(query)
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._pool.getconn()
+        try:
+            cursor = conn.cursor()
+            try:
+                yield PooledCursor(cursor, self)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        finally:
+            self._pool.putconn(conn)
+
+    def write(self):
+        return self._transaction()
+
+    def read(self):
+        return self._transaction()
+
+    @contextmanager
+    def session(self) -> Iterator[PooledCursor]:
+        """Cursor on an autocommit connection, for statements that cannot run
+        inside a transaction (CREATE INDEX CONCURRENTLY) and session locks"""
+        conn = self._pool.getconn()
+        conn.autocommit = True
+        try:
+            cursor = conn.cursor()
+            try:
+                yield PooledCursor(cursor, self)
+            finally:
+                cursor.close()
+        finally:
+            conn.autocommit = False
+            self._pool.putconn(conn)
+
+    def close(self):
+        self._pool.closeall()
+
+
+def schema_version(cursor: PooledCursor) -> int:
+    """Schema version recorded in the database; 0 for databases made before versioning"""
+    if cursor.pool.dialect == 'sqlite':
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'")
+        exists = cursor.fetchone()[0]
+    else:
+        cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+        exists = cursor.fetchone()[0]
+    if not exists:
+        return 0
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    return cursor.fetchone()[0] or 0
+
+
+def init_schema(pool: ConnectionPool, path: str = None) -> bool:
+    """Bring the schema up to SCHEMA_VERSION; returns whether anything ran.
+
+    A database already at SCHEMA_VERSION costs one query, so every process
+    can call this on startup; the actual migration should run once before
+    workers start (gunicorn's on_starting hook, or `python migrate.py`).
+    Columns are added and retyped before the schema script runs, since the
+    script indexes them and CREATE TABLE IF NOT EXISTS leaves existing
+    tables alone. On Postgres a session advisory lock serialises concurrent
+    migrations and indexes are built CONCURRENTLY, outside the transaction,
+    so writers are not blocked while they build.
+    """
+    with pool.read() as cursor:
+        if schema_version(cursor) >= SCHEMA_VERSION:
+            return False
+    with open(path or SCHEMA_PATHS[pool.dialect], 'r') as f:
+        script = f.read()
+    if pool.dialect == 'sqlite':
+        # The single writer connection already serialises migrations
+        with pool.write() as cursor:
+            if schema_version(cursor) >= SCHEMA_VERSION:
+                return False
+            _upgrade_sqlite_columns(cursor)
+            cursor.executescript(script)
+            _record_version(cursor)
+        return True
+
+    with pool.session() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(?)", (MIGRATION_LOCK,))
+        try:
+            if schema_version(cursor) >= SCHEMA_VERSION:
+                return False
+            cursor.execute("BEGIN")
+            try:
+                _upgrade_postgres_columns(cursor)
+                cursor.executescript(_CREATE_INDEX.sub('', script))
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            for name, definition in _CREATE_INDEX.findall(script):
+                _create_index_concurrently(cursor, name, definition)
+            _record_version(cursor)
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(?)", (MIGRATION_LOCK,))
+    return True
+
+
+def _upgrade_sqlite_columns(cursor: PooledCursor):
+    for table, added in ADDED_COLUMNS.items():
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if columns:
+            for column, column_type in added.items():
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def _upgrade_postgres_columns(cursor: PooledCursor):
+    for table, added in ADDED_COLUMNS.items():
+        for column, column_type in added.items():
+            cursor.execute(f"ALTER TABLE IF EXISTS {table} "
+                           f"ADD COLUMN IF NOT EXISTS {column} {column_type}")
+    for table, changed in CHANGED_COLUMNS.items():
+        for column, column_type in changed.items():
+            cursor.execute("""
+                SELECT data_type FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = ? AND column_name = ?
+            """, (table, column))
+            row = cursor.fetchone()
+            if row is not None and row[0].upper() != column_type:
+                # Rewrites the table under an exclusive lock; runs once per version
+                cursor.execute(f"ALTER TABLE {table} ALTER COLUMN {column} "
+                               f"TYPE {column_type} USING {column}::{column_type}")
+
+
+def _create_index_concurrently(cursor: PooledCursor, name: str, definition: str):
+    """Build an index without blocking writes, replacing one left invalid by a failed build"""
+    cursor.execute("""
+        SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = ? AND pg_table_is_visible(c.oid)
+    """, (name,))
+    row = cursor.fetchone()
+    if row is not None and row[0]:
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    cursor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def _record_version(cursor: PooledCursor):
+    cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+    cursor.execute("DELETE FROM schema_version")
+    cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (SCHEMA_VERSION,))
+
+
+def create_pool(db_config: Dict[str, Any], default_path: str) -> ConnectionPool:
+    """Build the pool described by the "database" section of config.json"""
+    if db_config.get('type') == 'postgres':
+        return PostgresPool(db_config['dsn'],
+                            db_config.get('min_connections', 1),
+                            db_config.get('max_connections', 10))
+    return SQLitePool(default_path,
+                      readers=db_config.get('readers', 4),
+                      busy_timeout=db_config.get('busy_timeout', 5000),
+                      mmap_size=db_config.get('mmap_size', 256 * 1024 * 1024))
@@ -0,0 +1,153 @@
+"""
+HEX-CyberSphere Event Writer
+Buffered background writes of events with batched transactions
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import threading
+from typing import Any, Optional
+import json_codec
+
+# Event data longer than this is moved to event_payloads
+DEFAULT_MAX_DATA = 4096
+PREVIEW_LENGTH = 256
+
+
+class _Flush:
+    """Queue marker that is acknowledged once everything before it is committed"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class EventWriter:
+    """Writes events from a background thread in batched transactions.
+
+    write() only enqueues, so callers never wait on a commit. The writer
+    thread drains up to batch_size events per transaction, waiting at most
+    flush_interval seconds for a batch to fill. Payloads are serialised
+    when queued, so callers may mutate them afterwards. Data longer than
+    max_data is stored once in event_payloads, keyed by its SHA-1, and the
+    event keeps a short preview with the reference. When the buffer is
+    full new events are dropped and counted rather than blocking the task
+    path.
+    """
+
+    def __init__(self, pool, batch_size: int = 500,
+                 flush_interval: float = 0.5, max_queue: int = 100000,
+                 max_data: int = DEFAULT_MAX_DATA):
+        self.logger = logging.getLogger(__name__)
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_data = max_data
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, event_type: str, source: str, data: str, payload: Any = None,
+              task_name: str = None, status: str = None) -> bool:
+        """Queue an event; payload, if given, is appended to data as JSON"""
+        if self._closed:
+            return False
+        if payload is not None:
+            # Serialised now: the caller keeps the object and may change it
+            try:
+                data = f"{data}: {json_codec.dumps(payload)}"
+            except Exception as e:
+                self.logger.error(f"Failed to serialise {event_type} event: {e}")
+                return False
+        try:
+            self._queue.put_nowait((event_type, source, data, task_name, status))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                self.logger.warning(f"Event buffer full, {self.dropped} events dropped so far")
+            return False
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Wait until every event queued so far has been committed"""
+        if self._closed or not self._thread.is_alive():
+            return True
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Commit outstanding events and stop the writer thread"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def payload(self, ref: str) -> Optional[str]:
+        """Full data of an event whose data was stored by reference"""
+        with self.pool.read() as cursor:
+            row = cursor.execute(
+                "SELECT payload FROM event_payloads WHERE ref = ?", (ref,)).fetchone()
+        return row[0] if row else None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch, markers, stop = [], [], False
+            deadline_wait = self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, _Flush):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or markers or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=deadline_wait)
+                except queue.Empty:
+                    break
+                # Only wait for the first follow-up; afterwards drain what is there
+                deadline_wait = 0
+
+            if batch:
+                self._write_batch(batch)
+            for marker in markers:
+                marker.done.set()
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        events, payloads = [], []
+        for event_type, source, data, task_name, status in batch:
+            try:
+                if data is not None and len(data) > self.max_data:
+                    ref = hashlib.sha1(data.encode('utf-8')).hexdigest()
+                    payloads.append((ref, data))
+                    data = json.dumps({"ref": ref, "size": len(data),
+                                       "preview": data[:PREVIEW_LENGTH]})
+                events.append((event_type, source, data, task_name, status))
+            except Exception as e:
+                self.logger.error(f"Failed to serialise {event_type} event: {e}")
+
+        try:
+            with self.pool.write() as cursor:
+                if payloads:
+                    cursor.executemany(
+                        "INSERT INTO event_payloads (ref, payload) VALUES (?, ?) ON CONFLICT (ref) DO NOTHING",
+                        payloads)
+                cursor.executemany(
+                    "INSERT INTO events (event_type, source, data, task_name, status) VALUES (?, ?, ?, ?, ?)",
+                    events)
+            self.written += len(events)
+        except Exception as e:
+            self.logger.error(f"Failed to write {len(events)} events: {e}")
@@ -0,0 +1,664 @@
+"""
+HEX-CyberSphere Format Pipeline
+Streaming conversion between data formats through pluggable readers and writers
+"""
+
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import re
+import tempfile
+import textwrap
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import yaml
+import json_codec
+from csv_stream import CSVStream, DEFAULT_BATCH_SIZE, open_text, release_text
+from data_parser import DataParser
+
+# Registered readers and writers, keyed by format name
+READERS: Dict[str, type] = {}
+WRITERS: Dict[str, type] = {}
+
+# Characters read from a JSON array at a time
+JSON_CHUNK_SIZE = 1 << 20
+
+_END = object()
+
+
+def register_reader(name: str):
+    """Class decorator registering a RecordReader for a format"""
+    def decorator(cls: type) -> type:
+        READERS[name] = cls
+        return cls
+    return decorator
+
+
+def register_writer(name: str):
+    """Class decorator registering a RecordWriter for a format"""
+    def decorator(cls: type) -> type:
+        WRITERS[name] = cls
+        return cls
+    return decorator
+
+
+def batched(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def as_record(value: Any) -> Dict[str, Any]:
+    """Tabular writers need mappings; other values become a single column"""
+    return value if isinstance(value, dict) else {"value": value}
+
+
+class RecordReader(ABC):
+    """Yields the records of a source in batches.
+
+    `document` is True when the source held a single document rather than
+    a sequence of records (e.g. a JSON object), so writers can reproduce it
+    as a document. Columnar readers can also yield pyarrow RecordBatches.
+    """
+
+    columnar = False
+
+    def __init__(self, source: Any, **options):
+        self.source = source
+        self.options = options
+        self.document = False
+
+    @abstractmethod
+    def batches(self, batch_size: int) -> Iterator[List[Any]]:
+        """Lists of up to batch_size records"""
+
+    def arrow_batches(self, batch_size: int) -> Iterator[Any]:
+        """pyarrow RecordBatches; only for readers with columnar = True"""
+        raise TypeError(f"{type(self).__name__} does not read Arrow batches")
+
+    def close(self):
+        pass
+
+
+class RecordWriter(ABC):
+    """Writes batches of records to a stream, text or binary as `binary` says"""
+
+    binary = False
+    columnar = False
+
+    def __init__(self, stream: Any, **options):
+        self.stream = stream
+        self.options = options
+        self.document = False
+
+    @abstractmethod
+    def write(self, batch: List[Any]):
+        """Write a list of records"""
+
+    def write_arrow(self, batch: Any):
+        """Write a pyarrow RecordBatch; only for writers with columnar = True"""
+        raise TypeError(f"{type(self).__name__} does not write Arrow batches")
+
+    def close(self):
+        pass
+
+    def abort(self):
+        """Release resources after a failed conversion, without finishing the output"""
+
+
+@register_reader('json')
+class JSONReader(RecordReader):
+    """Elements of a top-level JSON array, decoded one at a time.
+
+    Any other top-level value is read whole as a single document.
+    """
+
+    def batches(self, batch_size: int) -> Iterator[List[Any]]:
+        stream, how = open_text(self.source, 'utf-8-sig')
+        try:
+            yield from batched(self._elements(stream), batch_size)
+        finally:
+            release_text(stream, how)
+
+    def _elements(self, stream) -> Iterator[Any]:
+        decoder = json.JSONDecoder()
+        buffer = stream.read(JSON_CHUNK_SIZE)
+        eof = not buffer
+        pos = self._skip(buffer, 0)
+        if buffer[pos:pos + 1] != '[':
+            self.document = True
+            yield json_codec.loads(buffer + stream.read())
+            return
+
+        pos += 1
+        need_comma = False
+        while True:
+            pos = self._skip(buffer, pos)
+            if pos < len(buffer):
+                char = buffer[pos]
+                if char == ']':
+                    return
+                if need_comma:
+                    if char != ',':
+                        raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+                    pos, need_comma = pos + 1, False
+                    continue
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                    # A number or literal may continue in the next chunk
+                    if end < len(buffer) or eof:
+                        yield element
+                        pos, need_comma = end, True
+                        continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+            elif eof:
+                raise ValueError("Unterminated JSON array")
+
+            # Keep the unread tail and read more, growing reads for large elements
+            chunk = stream.read(max(JSON_CHUNK_SIZE, len(buffer) - pos))
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+    @staticmethod
+    def _skip(buffer: str, pos: int) -> int:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n\ufeff':
+            pos += 1
+        return pos
+
+
+@register_writer('json')
+class JSONWriter(RecordWriter):
+    """A JSON array written record by record; a single document as itself"""
+
+    def __init__(self, stream: Any, indent: int = None):
+        super().__init__(stream)
+        self.indent = indent
+        self.count = 0
+
+    def write(self, batch: List[Any]):
+        if self.document:
+            self.stream.write(json_codec.dumps(batch[0], self.indent))
+            self.count += 1
+            return
+        if self.indent is None:
+            separator = '[' if self.count == 0 else ','
+            body = ','.join(json_codec.dumps(record) for record in batch)
+        else:
+            separator = '[\n' if self.count == 0 else ',\n'
+            pad = ' ' * self.indent
+            body = ',\n'.join(textwrap.indent(json_codec.dumps(record, self.indent), pad)
+                              for record in batch)
+        self.stream.write(separator + body)
+        self.count += len(batch)
+
+    def close(self):
+        if self.document:
+            return
+        if self.count == 0:
+            self.stream.write('[]')
+        else:
+            self.stream.write(']' if self.indent is None else '\n]')
+
+
+@register_reader('ndjson')
+class NDJSONReader(RecordReader):
+    def batches(self, batch_size: int) -> Iterator[List[Any]]:
+        return batched(DataParser().iter_ndjson(self.source, **self.options), batch_size)
+
+
+@register_writer('ndjson')
+class NDJSONWriter(RecordWriter):
+    def write(self, batch: List[Any]):
+        self.stream.write(''.join(json_codec.dumps(record) + '\n' for record in batch))
+
+
+@register_reader('yaml')
+class YAMLReader(RecordReader):
+    """Documents of a multi-document stream, or the items of a single list.
+
+    A multi-document stream is read one document at a time; a single
+    document is loaded whole.
+    """
+
+    def batches(self, batch_size: int) -> Iterator[List[Any]]:
+        stream, how = open_text(self.source, 'utf-8-sig')
+        try:
+            documents = yaml.safe_load_all(stream)
+            first = next(documents, None)
+            second = next(documents, _END)
+            if second is not _END:
+                yield from batched(itertools.chain((first, second), documents), batch_size)
+            elif isinstance(first, list):
+                yield from batched(first, batch_size)
+            else:
+                self.document = True
+                yield [first]
+        finally:
+            release_text(stream, how)
+
+
+@register_writer('yaml')
+class YAMLWriter(RecordWriter):
+    """A YAML sequence written record by record; a single document as itself"""
+
+    def __init__(self, stream: Any):
+        super().__init__(stream)
+        self.count = 0
+
+    def write(self, batch: List[Any]):
+        if self.document:
+            self.stream.write(yaml.safe_dump(batch[0], default_flow_style=False))
+        else:
+            self.stream.write(''.join(yaml.safe_dump([record], default_flow_style=False)
+                                      for record in batch))
+        self.count += len(batch)
+
+    def close(self):
+        if self.count == 0:
+            self.stream.write('[]\n')
+
+
+@register_reader('csv')
+class CSVReader(RecordReader):
+    """Rows as dicts. Values stay strings unless infer_types=True (see CSVStream)"""
+
+    columnar = True
+
+    def __init__(self, source: Any, **options):
+        options.setdefault('infer_types', False)
+        if not options['infer_types']:
+            options.setdefault('na_values', ())
+        super().__init__(source, **options)
+        self.stream = CSVStream(source, **options)
+
+    def batches(self, batch_size: int) -> Iterator[List[Any]]:
+        columns = self.stream.columns
+        for rows in batched(self.stream.rows(batch_size), batch_size):
+            yield [dict(zip(columns, row)) for row in rows]
+
+    def arrow_batches(self, batch_size: int) -> Iterator[Any]:
+        return self.stream.batches(batch_size, output='arrow')
+
+    def close(self):
+        self.stream.close()
+
+
+@register_writer('csv')
+class CSVWriter(RecordWriter):
+    """Columns are those of the first batch; nested values are written as JSON"""
+
+    def __init__(self, stream: Any, delimiter: str = ','):
+        super().__init__(stream)
+        self.logger = logging.getLogger(__name__)
+        self.writer = csv.writer(stream, delimiter=delimiter, lineterminator='\n')
+        self.columns: Optional[List[str]] = None
+        self.dropped = set()
+
+    def write(self, batch: List[Any]):
+        records = [as_record(record) for record in batch]
+        if self.columns is None:
+            self.columns = list(dict.fromkeys(key for record in records for key in record))
+            self.writer.writerow(self.columns)
+        known = set(self.columns)
+        for record in records:
+            if not known.issuperset(record):
+                self.dropped.update(set(record) - known)
+        self.writer.writerows([self._cell(record.get(column)) for column in self.columns]
+                              for record in records)
+
+    @staticmethod
+    def _cell(value: Any) -> Any:
+        if value is None:
+            return ''
+        if isinstance(value, (dict, list)):
+            return json_codec.dumps(value)
+        return value
+
+    def close(self):
+        if self.dropped:
+            self.logger.warning(f"CSV output dropped fields not in the first batch: {sorted(self.dropped)}")
+
+
+@register_reader('xml')
+class XMLReader(RecordReader):
+    """Record elements selected as DataParser.iter_xml does (tag or path)"""
+
+    def batches(self, batch_size: int) -> Iterator[List[Any]]:
+        return batched(DataParser().iter_xml(self.source, **self.options), batch_size)
+
+
+@register_writer('xml')
+class XMLWriter(RecordWriter):
+    """Records as elements under one root, the inverse of DataParser's XML dicts"""
+
+    def __init__(self, stream: Any, root: str = 'records', record: str = 'record'):
+        super().__init__(stream)
+        self.root = xml_name(root)
+        self.record = record
+        self.started = False
+
+    def write(self, batch: List[Any]):
+        if not self.started:
+            self.stream.write(f'<?xml version="1.0" encoding="utf-8"?>\n<{self.root}>')
+            self.started = True
+        self.stream.write(''.join(ET.tostring(to_element(self.record, record), encoding='unicode')
+                                  for record in batch))
+
+    def close(self):
+        if not self.started:
+            self.stream.write(f'<?xml version="1.0" encoding="utf-8"?>\n<{self.root}>')
+        self.stream.write(f'</{self.root}>\n')
+
+
+def xml_name(name: Any) -> str:
+    """A valid XML element name for a record key"""
+    name = re.sub(r'[^\w.-]', '_', str(name)) or '_'
+    return name if re.match(r'[A-Za-z_]', name) else f'_{name}'
+
+
+def to_element(tag: str, value: Any) -> ET.Element:
+    element = ET.Element(xml_name(tag))
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key == '@attributes' and isinstance(child, dict):
+                element.attrib.update({xml_name(name): str(item) for name, item in child.items()})
+            elif key == '#text':
+                element.text = str(child)
+            elif isinstance(child, list):
+                element.extend(to_element(key, item) for item in child)
+            else:
+                element.append(to_element(key, child))
+    elif isinstance(value, list):
+        element.extend(to_element('item', item) for item in value)
+    elif isinstance(value, bool):
+        element.text = 'true' if value else 'false'
+    elif value is not None:
+        element.text = str(value)
+    return element
+
+
+class _ArrowReader(RecordReader):
+    columnar = True
+
+    def batches(self, batch_size: int) -> Iterator[List[Any]]:
+        for batch in self.arrow_batches(batch_size):
+            yield batch.to_pylist()
+
+
+@register_reader('parquet')
+class ParquetReader(_ArrowReader):
+    def arrow_batches(self, batch_size: int) -> Iterator[Any]:
+        # Optional dependency: only needed for Parquet
+        import pyarrow.parquet as pq
+
+        source = io.BytesIO(self.source) if isinstance(self.source, (bytes, bytearray)) else self.source
+        return pq.ParquetFile(source).iter_batches(batch_size=batch_size)
+
+
+@register_reader('arrow')
+class ArrowReader(_ArrowReader):
+    """Arrow IPC stream format"""
+
+    def arrow_batches(self, batch_size: int) -> Iterator[Any]:
+        # Optional dependency: only needed for Arrow IPC
+        import pyarrow as pa
+
+        source = self.source
+        if isinstance(source, os.PathLike):
+            source = os.fspath(source)
+        for batch in pa.ipc.open_stream(source):
+            # Re-slice so batches respect batch_size whatever the writer used
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+
+
+class _ArrowWriter(RecordWriter):
+    """Arrow-based writers.
+
+    A Parquet or Arrow file has one schema, but a stream's batches need not
+    agree: a field may be null at first and filled in later, an int column
+    may turn out to hold floats, or a CSV column may widen. Batches are
+    therefore spilled to a temporary Arrow file (in spill_dir, default the
+    system temp directory) as they come, their schemas are unified (null
+    takes any type, int and float become float, other conflicts become
+    string), and on close the spill is replayed into the output cast to the
+    unified schema. Memory stays bounded by one batch; disk use is about the
+    uncompressed size of the data.
+
+    With unify_schema=False the first batch fixes the schema and batches are
+    written straight through: later batches gain null columns for missing
+    fields and are cast to the schema, fields the first batch lacked are
+    dropped with a warning, and a batch that cannot be cast fails the
+    conversion.
+    """
+
+    binary = True
+    columnar = True
+
+    def __init__(self, stream: Any, **options):
+        super().__init__(stream, **options)
+        # Optional dependency: only needed for Parquet and Arrow output
+        import pyarrow as pa
+
+        self.logger = logging.getLogger(__name__)
+        self.pa = pa
+        self.writer = None
+        self.schema = None
+        self.unify = options.get('unify_schema', True)
+        self._spill = None
+        self._spill_path = None
+        self._segment = None
+        self._segment_schema = None
+        self._segments: List[int] = []
+        self.dropped = set()
+
+    def write(self, batch: List[Any]):
+        records = [as_record(record) for record in batch]
+        columns = list(dict.fromkeys(key for record in records for key in record))
+        self.write_arrow(self.pa.RecordBatch.from_arrays(
+            [self._array([record.get(column) for record in records]) for column in columns],
+            names=columns))
+
+    def _array(self, values: List[Any]):
+        try:
+            return self.pa.array(values)
+        except (self.pa.ArrowInvalid, self.pa.ArrowTypeError):
+            # Mixed types within the batch: keep every value, as text
+            return self.pa.array([None if value is None else
+                                  value if isinstance(value, str) else json_codec.dumps(value)
+                                  for value in values], self.pa.string())
+
+    def write_arrow(self, batch: Any):
+        if not self.unify:
+            if self.writer is None:
+                self.schema = batch.schema
+                self.writer = self._open(batch.schema)
+            self.dropped.update(name for name in batch.schema.names
+                                if self.schema.get_field_index(name) < 0)
+            self.writer.write_batch(self._conform(batch, self.schema))
+            return
+
+        self.schema = batch.schema if self.schema is None else self._unified(self.schema, batch.schema)
+        if self._spill is None:
+            fd, self._spill_path = tempfile.mkstemp(suffix='.arrows', dir=self.options.get('spill_dir'))
+            self._spill = os.fdopen(fd, 'wb')
+        if self._segment is None or not self._segment_schema.equals(batch.schema):
+            # Each run of batches with one schema is its own IPC stream in the spill
+            if self._segment is not None:
+                self._segment.close()
+            self._segments.append(self._spill.tell())
+            self._segment = self.pa.ipc.new_stream(self._spill, batch.schema)
+            self._segment_schema = batch.schema
+        self._segment.write_batch(batch)
+
+    def _unified(self, current, new):
+        pa = self.pa
+        try:
+            return pa.unify_schemas([current, new], promote_options='permissive')
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+        fields = {field.name: field for field in current}
+        for field in new:
+            if field.name not in fields:
+                fields[field.name] = field
+                continue
+            try:
+                fields[field.name] = pa.unify_schemas(
+                    [pa.schema([fields[field.name]]), pa.schema([field])],
+                    promote_options='permissive').field(0)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                fields[field.name] = pa.field(field.name, pa.string())
+        return pa.schema(list(fields.values()))
+
+    def _conform(self, batch: Any, schema: Any):
+        """batch with schema's columns, in its order and types"""
+        pa = self.pa
+        arrays = []
+        for field in schema:
+            index = batch.schema.get_field_index(field.name)
+            if index < 0:
+                arrays.append(pa.nulls(batch.num_rows, field.type))
+                continue
+            column = batch.column(index)
+            if column.type != field.type:
+                try:
+                    column = column.cast(field.type)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    if field.type != pa.string():
+                        raise ValueError(f"Column {field.name} of type {column.type} does not fit "
+                                         f"the output schema's {field.type}")
+                    column = pa.array([None if value is None else json_codec.dumps(value)
+                                       for value in column.to_pylist()], pa.string())
+            arrays.append(column)
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def close(self):
+        try:
+            if self._spill is not None:
+                self._segment.close()
+                self._spill.close()
+                self._spill = None
+                self.writer = self._open(self.schema)
+                with self.pa.memory_map(self._spill_path) as spill:
+                    for offset in self._segments:
+                        spill.seek(offset)
+                        for batch in self.pa.ipc.open_stream(spill):
+                            self.writer.write_batch(self._conform(batch, self.schema))
+            if self.writer is not None:
+                self.writer.close()
+            if self.dropped:
+                self.logger.warning(f"{type(self).__name__} dropped fields not in the first batch "
+                                    f"(unify_schema=False): {sorted(self.dropped)}")
+        finally:
+            self.abort()
+
+    def abort(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        if self._spill_path is not None:
+            os.remove(self._spill_path)
+            self._spill_path = None
+
+    @abstractmethod
+    def _open(self, schema):
+        """Output writer for the final schema"""
+
+
+@register_writer('parquet')
+class ParquetWriter(_ArrowWriter):
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(self.stream, schema,
+                                compression=self.options.get('compression', 'snappy'))
+
+    def close(self):
+        if self.schema is None:
+            return  # Parquet cannot represent a file without a schema
+        super().close()
+
+
+@register_writer('arrow')
+class ArrowWriter(_ArrowWriter):
+    """Arrow IPC stream format"""
+
+    def _open(self, schema):
+        return self.pa.ipc.new_stream(self.stream, schema)
+
+
+def _open_sink(sink: Any, binary: bool):
+    """Stream a writer can use, and how to release it"""
+    if isinstance(sink, str):
+        # A str source is data, so a str sink would be read the other way round
+        raise TypeError("Sink paths must be os.PathLike (e.g. pathlib.Path), not str")
+    if isinstance(sink, os.PathLike):
+        if binary:
+            return open(sink, 'wb'), 'close'
+        return open(sink, 'w', encoding='utf-8', newline=''), 'close'
+    is_text = isinstance(sink, io.TextIOBase)
+    if binary:
+        if is_text:
+            raise ValueError("Binary formats need a binary sink")
+        return sink, None
+    if is_text:
+        return sink, None
+    return io.TextIOWrapper(sink, encoding='utf-8', newline=''), 'detach'
+
+
+def convert(source: Any, sink: Any, from_format: str, to_format: str,
+            batch_size: int = DEFAULT_BATCH_SIZE, reader_options: Dict[str, Any] = None,
+            writer_options: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Stream records from source to sink, converting between formats.
+
+    source is text, bytes, a path or a file object; sink is a path or a
+    file object. Paths are os.PathLike (e.g. pathlib.Path) at both ends: a
+    str source is the data itself and a str sink is rejected with
+    TypeError. Records move in batches of at most batch_size, so memory
+    does not grow with the input. Between two columnar formats (csv,
+    parquet, arrow) batches stay in Arrow form. Returns record and batch
+    counts.
+    """
+    if from_format not in READERS:
+        raise ValueError(f"No reader for format: {from_format}")
+    if to_format not in WRITERS:
+        raise ValueError(f"No writer for format: {to_format}")
+    writer_class = WRITERS[to_format]
+    output, how = _open_sink(sink, writer_class.binary)
+    reader = READERS[from_format](source, **(reader_options or {}))
+    records = batches = 0
+    writer = None
+    try:
+        writer = writer_class(output, **(writer_options or {}))
+        if reader.columnar and writer.columnar:
+            for batch in reader.arrow_batches(batch_size):
+                writer.write_arrow(batch)
+                records += batch.num_rows
+                batches += 1
+        else:
+            for batch in reader.batches(batch_size):
+                writer.document = reader.document
+                writer.write(batch)
+                records += len(batch)
+                batches += 1
+        writer.close()
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        reader.close()
+        if how == 'close':
+            output.close()
+        elif how == 'detach':
+            output.detach()
+    return {"from": from_format, "to": to_format, "records": records, "batches": batches}
@@ -0,0 +1,43 @@
+"""
+HEX-CyberSphere Gunicorn Configuration
+Multi-worker serving of the core engine; each worker builds its own AutomationManager
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("HEX_BIND", "0.0.0.0:5000")
+
+# Processes give AI/parsing work real parallelism; threads keep each worker
+# responsive while requests wait on queued tasks
+workers = int(os.environ.get("HEX_WORKERS", min(multiprocessing.cpu_count(), 4)))
+worker_class = "gthread"
+threads = int(os.environ.get("HEX_THREADS", 16))
+
+# /execute answers 202 after its wait window, so requests stay well below this
+timeout = 330
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    """Migrate the schema once in the master, so workers start on an up-to-date database"""
+    import migrate
+
+    try:
+        migrate.migrate()
+    except Exception as e:
+        # Workers retry the migration one at a time when they start
+        server.log.error(f"Schema migration failed: {e}")
+
+
+def worker_exit(server, worker):
+    """Drain the worker's event buffer and stop its task workers"""
+    import server as core_server
+
+    manager = core_server.get_manager()
+    if manager is not None:
+        manager.shutdown()
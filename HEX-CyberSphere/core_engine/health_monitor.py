@@ -0,0 +1,165 @@
+"""
+HEX-CyberSphere Health Monitor
+Concurrent, cached component health checks with latency history
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from http_client import get_client
+
+
+class HealthMonitor:
+    """Runs every component check at once under a global deadline.
+
+    A report is cached for `ttl` seconds, so frequent polls reuse it; with
+    a refresh interval a background thread renews the report before it
+    expires and polls never wait on a check. Each component keeps its
+    last `history_size` latencies. Services named in `exclude` get no HTTP
+    check; the process serving /health must exclude itself, or every check
+    would call back into the server and start another check.
+    """
+
+    def __init__(self, services: Dict[str, Dict[str, Any]],
+                 checks: Dict[str, Callable[[], Dict[str, Any]]] = None,
+                 timeout: float = 5.0, deadline: float = 6.0, ttl: float = 5.0,
+                 history_size: int = 100, exclude: Iterable[str] = ()):
+        self.logger = logging.getLogger(__name__)
+        self.timeout = timeout
+        self.deadline = deadline
+        self.ttl = ttl
+        self.checks: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        excluded = set(exclude)
+        for name, service in services.items():
+            if service.get('enabled') and name not in excluded:
+                url = f"http://{service['host']}:{service['port']}/health"
+                self.checks[name] = self._http_check(url)
+        self.checks.update(checks or {})
+
+        self.history: Dict[str, deque] = {name: deque(maxlen=history_size) for name in self.checks}
+        self._executor = ThreadPoolExecutor(max_workers=max(2 * len(self.checks), 1),
+                                            thread_name_prefix="health")
+        self._report: Optional[Dict[str, Any]] = None
+        self._report_time = 0.0
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def _http_check(self, url: str) -> Callable[[], Dict[str, Any]]:
+        def check():
+            # No retries: a retried check would blow the deadline
+            response = get_client().get(url, timeout=min(self.timeout, self.deadline), retry=False)
+            return {
+                "status": "healthy" if response.status_code == 200 else "unhealthy",
+                "response_time": response.elapsed.total_seconds()
+            }
+        return check
+
+    def _timed(self, name: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = self.checks[name]()
+        except Exception as e:
+            result = {"status": "unhealthy", "error": str(e)}
+        result.setdefault("response_time", time.perf_counter() - start)
+        return result
+
+    def run_checks(self) -> Dict[str, Any]:
+        """Check every component now, waiting no longer than the deadline"""
+        started = time.time()
+        futures = {name: self._executor.submit(self._timed, name) for name in self.checks}
+        wait(futures.values(), timeout=self.deadline)
+
+        components = {}
+        for name, future in futures.items():
+            if future.done():
+                components[name] = future.result()
+            else:
+                # Left running; its result is dropped
+                components[name] = {"status": "unhealthy",
+                                    "error": f"No response within {self.deadline:g}s deadline"}
+            self.history[name].append((started, components[name].get("response_time"),
+                                       components[name]["status"]))
+            components[name]["latency"] = self._latency_summary(name)
+
+        healthy = all(component["status"] == "healthy" for component in components.values())
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "system": "HEX-CyberSphere",
+            "status": "healthy" if healthy else "degraded",
+            "components": components
+        }
+
+    def check(self, force: bool = False) -> Dict[str, Any]:
+        """Latest report, rerunning the checks only when the cached one expired"""
+        report, age = self._cached()
+        if force or report is None or age >= self.ttl:
+            # One run at a time; concurrent callers reuse its report
+            with self._run_lock:
+                report, age = self._cached()
+                if force or report is None or age >= self.ttl:
+                    report, age = self.refresh(), 0.0
+        # Callers get their own copy; nested component reports are not shared
+        report = copy.deepcopy(report)
+        report["cache_age"] = round(age, 3)
+        return report
+
+    def refresh(self) -> Dict[str, Any]:
+        """Run the checks and publish the new report"""
+        report = self.run_checks()
+        with self._lock:
+            self._report = report
+            self._report_time = time.monotonic()
+        return report
+
+    def _cached(self):
+        with self._lock:
+            return self._report, time.monotonic() - self._report_time
+
+    def latency_history(self, name: str) -> List[Dict[str, Any]]:
+        """Recorded checks of a component, oldest first"""
+        return [{"timestamp": timestamp, "response_time": latency, "status": status}
+                for timestamp, latency, status in self.history.get(name, ())]
+
+    def _latency_summary(self, name: str) -> Dict[str, Any]:
+        latencies = sorted(latency for _, latency, status in self.history[name]
+                           if latency is not None and status == "healthy")
+        if not latencies:
+            return {"samples": 0}
+        return {
+            "samples": len(latencies),
+            "avg": sum(latencies) / len(latencies),
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "max": latencies[-1]
+        }
+
+    def start(self, interval: float = None) -> threading.Thread:
+        """Refresh the cached report in the background every interval seconds"""
+        interval = interval or self.ttl * 0.8
+        if self._refresher is None or not self._refresher.is_alive():
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh, args=(interval,),
+                                               name="health-refresher", daemon=True)
+            self._refresher.start()
+        return self._refresher
+
+    def _refresh(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                # Publishes without holding up readers of the current report
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"Background health check failed: {e}")
+            self._stop.wait(interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(self.deadline)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,93 @@
+"""
+HEX-CyberSphere HTTP Client
+Shared keep-alive HTTP sessions with per-host pools, retries and timeouts
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_SETTINGS = {
+    "pool_connections": 20,
+    "pool_maxsize": 32,
+    "retries": 3,
+    "backoff_factor": 0.3,
+    "connect_timeout": 3.05,
+    "read_timeout": 30
+}
+
+_client = None
+_client_lock = threading.Lock()
+_settings: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+
+
+class HTTPClient:
+    """Pair of requests sessions shared by every outbound call.
+
+    Each session keeps a keep-alive pool per host (pool_connections hosts,
+    up to pool_maxsize sockets each). The default session retries failed
+    connections, and idempotent requests that fail with 429/502/503/504,
+    with exponential backoff, honouring Retry-After. Calls that must not
+    be repeated, such as security probes, use retry=False. Every call
+    gets a (connect, read) timeout unless it passes its own.
+    """
+
+    def __init__(self, pool_connections: int = 20, pool_maxsize: int = 32,
+                 retries: int = 3, backoff_factor: float = 0.3,
+                 connect_timeout: float = 3.05, read_timeout: float = 30):
+        self.logger = logging.getLogger(__name__)
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                      backoff_factor=backoff_factor,
+                      status_forcelist=(429, 502, 503, 504),
+                      respect_retry_after_header=True,
+                      raise_on_status=False)
+        self.session = self._session(pool_connections, pool_maxsize, retry)
+        self.probe_session = self._session(pool_connections, pool_maxsize, Retry(0, read=False))
+
+    def _session(self, pool_connections: int, pool_maxsize: int, retry: Retry) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def request(self, method: str, url: str, timeout=None, retry: bool = True,
+                **kwargs) -> requests.Response:
+        session = self.session if retry else self.probe_session
+        return session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+        self.probe_session.close()
+
+
+def configure(settings: Optional[Dict[str, Any]] = None):
+    """Apply the "http" config section; replaces the shared client if one exists"""
+    global _client
+    with _client_lock:
+        _settings.update({key: value for key, value in (settings or {}).items()
+                          if key in DEFAULT_SETTINGS})
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_client() -> HTTPClient:
+    """The process-wide HTTP client, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient(**_settings)
+    return _client
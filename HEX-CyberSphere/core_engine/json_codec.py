@@ -0,0 +1,178 @@
+"""
+HEX-CyberSphere JSON Codec
+JSON encoding and decoding through the fastest installed backend
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+# Tried in order; orjson and msgspec are optional, json is always there
+BACKENDS = ('orjson', 'msgspec', 'json')
+
+_codecs: Dict[str, "JSONCodec"] = {}
+_default: Optional["JSONCodec"] = None
+
+
+def _fallback(value: Any) -> Any:
+    """Encoding of values JSON has no type for: NumPy values as lists/scalars, the rest as str"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+class JSONCodec:
+    """Standard library backend, and the interface of the accelerated ones.
+
+    Encoding is compact UTF-8. Decoding accepts str or bytes; accelerated
+    backends fall back to the standard library when they reject a document
+    (e.g. NaN literals or integers beyond 64 bits), so every backend
+    accepts the same input and raises json.JSONDecodeError on bad input.
+    """
+
+    name = 'json'
+
+    def loads(self, data: Any) -> Any:
+        return json.loads(data)
+
+    def dumpb(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode('utf-8')
+
+    def dumps(self, obj: Any, indent: int = None) -> str:
+        if indent is not None:
+            return json.dumps(obj, indent=indent, default=_fallback, ensure_ascii=False)
+        return json.dumps(obj, separators=(',', ':'), default=_fallback, ensure_ascii=False)
+
+    def loads_lines(self, block: Any) -> List[Any]:
+        """Decode a block of complete JSON lines, skipping blank ones"""
+        newline = '\n' if isinstance(block, str) else b'\n'
+        return [self.loads(line) for line in block.split(newline) if line.strip()]
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def loads(self, data: Any) -> Any:
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            return json.loads(data)
+
+    def loads_lines(self, block: Any) -> List[Any]:
+        loads = self._orjson.loads
+        newline = '\n' if isinstance(block, str) else b'\n'
+        try:
+            return [loads(line) for line in block.split(newline) if line]
+        except self._orjson.JSONDecodeError:
+            # Blank lines with whitespace, or documents only json accepts
+            return super().loads_lines(block)
+
+    def dumpb(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj, default=_fallback, option=self._options)
+
+    def dumps(self, obj: Any, indent: int = None) -> str:
+        if indent is not None:
+            return super().dumps(obj, indent)
+        return self.dumpb(obj).decode('utf-8')
+
+
+class MsgspecCodec(JSONCodec):
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+
+        self._error = msgspec.DecodeError
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder(enc_hook=_fallback)
+
+    def loads(self, data: Any) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._error:
+            return json.loads(data)
+
+    def dumpb(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def dumps(self, obj: Any, indent: int = None) -> str:
+        if indent is not None:
+            return super().dumps(obj, indent)
+        return self.dumpb(obj).decode('utf-8')
+
+    def loads_lines(self, block: Any) -> List[Any]:
+        try:
+            # One call for the whole block
+            return self._decoder.decode_lines(block)
+        except self._error:
+            return super().loads_lines(block)
+
+
+_BACKEND_CLASSES = {'orjson': OrjsonCodec, 'msgspec': MsgspecCodec, 'json': JSONCodec}
+
+
+def get_codec(name: str = None) -> JSONCodec:
+    """Codec for a backend, or the default one.
+
+    The default is the first installed of BACKENDS, unless the
+    HEX_JSON_BACKEND environment variable names another.
+    """
+    global _default
+    if name is None:
+        if _default is None:
+            preferred = os.environ.get('HEX_JSON_BACKEND')
+            for backend in ((preferred,) if preferred else ()) + BACKENDS:
+                try:
+                    _default = get_codec(backend)
+                    break
+                except (ImportError, KeyError):
+                    continue
+            logging.getLogger(__name__).info(f"JSON backend: {_default.name}")
+        return _default
+    if name not in _codecs:
+        _codecs[name] = _BACKEND_CLASSES[name]()
+    return _codecs[name]
+
+
+def set_backend(name: Optional[str]) -> Optional[JSONCodec]:
+    """Make a backend the default, or go back to automatic selection with None.
+
+    Raises ImportError if the backend is not installed and KeyError if it
+    is unknown.
+    """
+    global _default
+    _default = get_codec(name) if name is not None else None
+    return _default
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first"""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_codec(name)
+            names.append(name)
+        except ImportError:
+            continue
+    return names
+
+
+def loads(data: Any) -> Any:
+    return get_codec().loads(data)
+
+
+def dumps(obj: Any, indent: int = None) -> str:
+    """Compact JSON text, or indented when indent is given"""
+    return get_codec().dumps(obj, indent)
+
+
+def dumpb(obj: Any) -> bytes:
+    """Compact JSON as UTF-8 bytes"""
+    return get_codec().dumpb(obj)
@@ -0,0 +1,48 @@
+"""
+HEX-CyberSphere Lazy Imports
+Defers importing heavy libraries until they are first used
+"""
+
+import importlib
+import sys
+import types
+from typing import List
+
+# Libraries that make up most of the core engine's cold start
+HEAVY_MODULES = ['torch', 'sklearn', 'pandas', 'tensorflow']
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a placeholder for a module, importing it only when used"""
+    return LazyModule(name)
+
+
+def load(*modules: LazyModule) -> List[types.ModuleType]:
+    """Import lazily imported modules now, e.g. to pre-warm them"""
+    return [module._load() if isinstance(module, LazyModule) else module for module in modules]
+
+
+def loaded_heavy_modules() -> List[str]:
+    """Heavy libraries already imported into this process"""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
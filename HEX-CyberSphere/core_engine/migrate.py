@@ -0,0 +1,38 @@
+"""
+HEX-CyberSphere Schema Migration
+Upgrades the database schema once, before any worker starts
+
+Run by gunicorn's on_starting hook, or by hand:
+    python migrate.py [config_path]
+"""
+
+import json
+import logging
+import sys
+from automation_manager import DATABASE_PATH
+from db_pool import SCHEMA_VERSION, create_pool, init_schema
+
+DEFAULT_CONFIG_PATH = "../config/config.json"
+
+
+def migrate(config_path: str = DEFAULT_CONFIG_PATH) -> bool:
+    """Bring the configured database to SCHEMA_VERSION; returns whether anything ran"""
+    logger = logging.getLogger(__name__)
+    try:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to load config: {e}")
+        config = {}
+    pool = create_pool(config.get('database', {}), DATABASE_PATH)
+    try:
+        migrated = init_schema(pool)
+    finally:
+        pool.close()
+    logger.info(f"Database schema {'migrated to' if migrated else 'already at'} version {SCHEMA_VERSION}")
+    return migrated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    migrate(*sys.argv[1:2])
@@ -8,7 +8,7 @@ import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import requests
+from http_client import get_client
 from typing import Dict, Any
 
 class NotificationManager:
@@ -41,7 +41,7 @@ class NotificationManager:
                 "username": "HEX-CyberSphere"
             }
             
-            response = requests.post(webhook_url, json=payload)
+            response = get_client().post(webhook_url, json=payload)
             return response.status_code == 204
         except Exception as e:
             self.logger.error(f"Failed to send Discord notification: {e}")
@@ -66,7 +66,7 @@ class NotificationManager:
                 "text": message
             }
             
-            response = requests.post(url, json=payload)
+            response = get_client().post(url, json=payload)
             return response.status_code == 200
         except Exception as e:
             self.logger.error(f"Failed to send Telegram notification: {e}")
@@ -0,0 +1,159 @@
+"""
+HEX-CyberSphere Online Anomaly Detector
+Incremental per-metric statistics for scoring streaming data points
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Union
+from state_file import load_state, save_state
+
+
+class MetricStats:
+    """Running statistics of one metric.
+
+    Keeps Welford's count/mean/M2 for the all-time mean and variance and an
+    exponentially weighted mean/variance that follows recent behaviour. Each
+    update is O(1) in time and memory.
+    """
+
+    __slots__ = ('count', 'mean', 'm2', 'ewma', 'ewmvar')
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0,
+                 ewma: float = None, ewmvar: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.ewma = ewma
+        self.ewmvar = ewmvar
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def ewm_std(self) -> float:
+        return math.sqrt(self.ewmvar)
+
+    def score(self, value: float, method: str = 'welford') -> float:
+        """z-score of a value against the statistics seen so far"""
+        if method == 'ewma':
+            center, spread = self.ewma, self.ewm_std
+        else:
+            center, spread = self.mean, self.std
+        if center is None or spread == 0:
+            return 0.0
+        return (value - center) / spread
+
+    def update(self, value: float, alpha: float):
+        """Fold one value into the running statistics"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            diff = value - self.ewma
+            increment = alpha * diff
+            self.ewma += increment
+            self.ewmvar = (1 - alpha) * (self.ewmvar + diff * increment)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "MetricStats":
+        return cls(**{slot: state[slot] for slot in cls.__slots__ if slot in state})
+
+
+class OnlineAnomalyDetector:
+    """Scores newly appended points per metric without revisiting history.
+
+    Every point is scored against the statistics accumulated before it, then
+    folded in. Points whose absolute z-score exceeds the threshold are
+    reported once the metric has seen at least `warmup` points. State is
+    plain JSON so a detector survives restarts.
+    """
+
+    def __init__(self, threshold: float = 3.0, alpha: float = 0.1, warmup: int = 10,
+                 method: str = 'welford'):
+        if method not in ('welford', 'ewma'):
+            raise ValueError(f"Unknown scoring method: {method}")
+        self.threshold = threshold
+        self.alpha = alpha
+        self.warmup = warmup
+        self.method = method
+        self.metrics: Dict[str, MetricStats] = {}
+
+    def update(self, data: Dict[str, Union[float, Iterable[float]]]) -> Dict[str, Any]:
+        """Score and absorb new points given as {metric: value or [values]}"""
+        anomalies: List[Dict[str, Any]] = []
+        points = 0
+
+        for metric, values in data.items():
+            if isinstance(values, (int, float)):
+                values = [values]
+            stats = self.metrics.get(metric)
+            if stats is None:
+                stats = self.metrics[metric] = MetricStats()
+
+            for index, value in enumerate(values):
+                if value is None:
+                    continue
+                value = float(value)
+                if math.isnan(value):
+                    continue
+                points += 1
+                if stats.count >= self.warmup:
+                    zscore = stats.score(value, self.method)
+                    if abs(zscore) > self.threshold:
+                        anomalies.append({
+                            'metric': metric,
+                            'index': index,
+                            'value': value,
+                            'zscore': zscore,
+                            'mean': stats.ewma if self.method == 'ewma' else stats.mean,
+                            'std': stats.ewm_std if self.method == 'ewma' else stats.std
+                        })
+                stats.update(value, self.alpha)
+
+        return {'anomalies': anomalies, 'points': points}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Current statistics of every metric"""
+        return {
+            metric: {
+                'count': stats.count,
+                'mean': stats.mean,
+                'std': stats.std,
+                'ewma': stats.ewma,
+                'ewm_std': stats.ewm_std
+            }
+            for metric, stats in self.metrics.items()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'threshold': self.threshold,
+            'alpha': self.alpha,
+            'warmup': self.warmup,
+            'method': self.method,
+            'metrics': {metric: stats.to_dict() for metric, stats in self.metrics.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "OnlineAnomalyDetector":
+        detector = cls(state.get('threshold', 3.0), state.get('alpha', 0.1),
+                       state.get('warmup', 10), state.get('method', 'welford'))
+        detector.metrics = {metric: MetricStats.from_dict(stats)
+                            for metric, stats in state.get('metrics', {}).items()}
+        return detector
+
+    def save(self, path: str):
+        """Write the detector state atomically"""
+        save_state(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path: str) -> "OnlineAnomalyDetector":
+        return cls.from_dict(load_state(path))
@@ -0,0 +1,327 @@
+"""
+HEX-CyberSphere Payload Schemas
+Registry of known payload shapes compiled once into typed decoders
+"""
+
+import keyword
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+import json_codec
+
+# Compiled schemas keyed by payload type
+SCHEMAS: Dict[str, "CompiledSchema"] = {}
+
+SCALARS = {'int': int, 'float': float, 'str': str, 'bool': bool, 'any': Any}
+
+# Payload shapes most traffic uses; see register_schema for the notation
+BUILTIN_SCHEMAS = {
+    'open_port': {
+        'port': 'int',
+        'service': 'str?',
+        'status': 'str?'
+    },
+    'scan_result': {
+        'target': 'str',
+        'scan_type': 'str',
+        'open_ports': 'list[open_port]?',
+        'total_scanned': 'int?',
+        'vulnerabilities': 'list[any]?',
+        'total_found': 'int?'
+    },
+    'metric_batch': {
+        'source': 'str',
+        'metrics': 'dict[list[float]]',
+        'timestamp': 'str?'
+    },
+    'event': {
+        'event_type': 'str',
+        'source': 'str',
+        'data': 'any?',
+        'timestamp': 'str?',
+        'task_name': 'str?',
+        'status': 'str?'
+    }
+}
+
+
+class SchemaError(ValueError):
+    """Payload that does not match its schema, or an invalid schema"""
+
+
+def parse_type(spec: str) -> Tuple:
+    """Parse a field type such as "int", "str?", "list[open_port]" or "dict[list[float]]"""
+    spec = spec.strip()
+    if spec.endswith('?'):
+        return ('optional', parse_type(spec[:-1]))
+    match = re.fullmatch(r'(list|dict)\[(.+)\]', spec)
+    if match:
+        return (match.group(1), parse_type(match.group(2)))
+    if spec in SCALARS:
+        return (spec,)
+    if spec in SCHEMAS:
+        return ('schema', spec)
+    raise SchemaError(f"Unknown type in schema: {spec}")
+
+
+class PayloadRecord:
+    """Base of the classes generated when msgspec is not installed"""
+
+    __slots__ = ()
+    __struct_fields__: Tuple[str, ...] = ()
+
+    def __repr__(self) -> str:
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__struct_fields__)
+        return f"{type(self).__name__}({values})"
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__struct_fields__)
+
+
+class CompiledSchema:
+    """A payload schema compiled into a decoder for one backend.
+
+    With msgspec the schema becomes a Struct type and JSON is decoded and
+    validated straight into it in one pass. Otherwise a validator is
+    generated as Python source for the exact fields and compiled once;
+    it converts parsed JSON into slotted PayloadRecord objects. Both accept
+    one object or an array of them, ignore unknown fields, accept ints
+    for float fields and raise SchemaError naming the failing path.
+    """
+
+    def __init__(self, name: str, fields: Dict[str, str], backend: str = None):
+        self.logger = logging.getLogger(__name__)
+        if not name.isidentifier():
+            raise SchemaError(f"Schema name {name!r} is not an identifier")
+        self.name = name
+        self.fields = dict(fields)
+        for field in self.fields:
+            if not field.isidentifier():
+                raise SchemaError(f"Schema {name}: field name {field!r} is not an identifier")
+        self.types = {field: parse_type(spec) for field, spec in self.fields.items()}
+        if backend is None:
+            try:
+                import msgspec  # noqa: F401
+                backend = 'msgspec'
+            except ImportError:
+                backend = 'generated'
+        self.backend = backend
+        if backend == 'msgspec':
+            self._compile_msgspec()
+        elif backend == 'generated':
+            self._compile_generated()
+        else:
+            raise SchemaError(f"Unknown schema backend: {backend}")
+
+    # msgspec backend
+
+    def _compile_msgspec(self):
+        import msgspec
+
+        self._msgspec = msgspec
+        fields = []
+        for field, field_type in self.types.items():
+            if field_type[0] == 'optional':
+                fields.append((field, self._python_type(field_type), None))
+            else:
+                fields.append((field, self._python_type(field_type)))
+        # kw_only lets optional fields come in any order
+        self.type = msgspec.defstruct(self.name, fields, kw_only=True)
+        self._one_or_many = Union[self.type, List[self.type]]
+        self._decoder = msgspec.json.Decoder(self._one_or_many)
+        self._line_decoder = msgspec.json.Decoder(self.type)
+
+    def _python_type(self, field_type: Tuple) -> Any:
+        kind = field_type[0]
+        if kind == 'optional':
+            return Optional[self._python_type(field_type[1])]
+        if kind == 'list':
+            return List[self._python_type(field_type[1])]
+        if kind == 'dict':
+            return Dict[str, self._python_type(field_type[1])]
+        if kind == 'schema':
+            return SCHEMAS[field_type[1]].type
+        return SCALARS[kind]
+
+    # Generated backend
+
+    def _compile_generated(self):
+        names = list(self.types)
+        self.type = type(self.name, (PayloadRecord,),
+                         {'__slots__': tuple(names), '__struct_fields__': tuple(names)})
+        lines = ["def validate(data, path='$'):",
+                 "    if type(data) is not dict:",
+                 "        raise _error('object', data, path)",
+                 "    record = _new(_cls)"]
+        for field, field_type in self.types.items():
+            if field_type[0] == 'optional':
+                lines.append(f"    value = data.get({field!r})")
+            else:
+                lines += [f"    try:",
+                          f"        value = data[{field!r}]",
+                          f"    except KeyError:",
+                          f"        raise SchemaError('Object missing required field `{field}` - at `' + path + '`') from None"]
+            self._generate(field_type, 'value', f"path + '.{field}'", lines, 1, [0])
+            if keyword.iskeyword(field):
+                # JSON often uses names like "from" or "class"; record.from would not compile
+                lines.append(f"    setattr(record, {field!r}, value)")
+            else:
+                lines.append(f"    record.{field} = value")
+        lines.append("    return record")
+
+        namespace = {'SchemaError': SchemaError, '_error': _type_error, '_cls': self.type,
+                     '_new': object.__new__}
+        for field_type in self._nested(self.types.values()):
+            namespace[f"_validate_{field_type}"] = SCHEMAS[field_type].validate
+        exec(compile('\n'.join(lines), f"<schema {self.name}>", 'exec'), namespace)
+        self.validate = namespace['validate']
+
+    def _nested(self, field_types) -> set:
+        nested = set()
+        for field_type in field_types:
+            while field_type[0] in ('optional', 'list', 'dict'):
+                field_type = field_type[1]
+            if field_type[0] == 'schema':
+                nested.add(field_type[1])
+        return nested
+
+    def _generate(self, field_type: Tuple, var: str, path: str, lines: List[str],
+                  depth: int, counter: List[int]):
+        """Append statements that check `var` in place, replacing it with the converted value"""
+        pad = '    ' * depth
+        kind = field_type[0]
+        if kind == 'any' or field_type == ('optional', ('any',)):
+            return
+        if kind == 'optional':
+            lines.append(f"{pad}if {var} is not None:")
+            self._generate(field_type[1], var, path, lines, depth + 1, counter)
+        elif kind == 'float':
+            lines += [f"{pad}if type({var}) is int:",
+                      f"{pad}    {var} = float({var})",
+                      f"{pad}elif type({var}) is not float:",
+                      f"{pad}    raise _error('float', {var}, {path})"]
+        elif kind in ('int', 'str', 'bool'):
+            lines += [f"{pad}if type({var}) is not {kind}:",
+                      f"{pad}    raise _error({kind!r}, {var}, {path})"]
+        elif kind == 'schema':
+            lines.append(f"{pad}{var} = _validate_{field_type[1]}({var}, {path})")
+        else:
+            counter[0] += 1
+            index, item, items = f"i{counter[0]}", f"item{counter[0]}", f"items{counter[0]}"
+            container = 'list' if kind == 'list' else 'dict'
+            lines += [f"{pad}if type({var}) is not {container}:",
+                      f"{pad}    raise _error({('array' if kind == 'list' else 'object')!r}, {var}, {path})"]
+            if kind == 'list':
+                lines += [f"{pad}{items} = []",
+                          f"{pad}for {index}, {item} in enumerate({var}):"]
+                item_path = f"{path} + '[' + str({index}) + ']'"
+            else:
+                lines += [f"{pad}{items} = {{}}",
+                          f"{pad}for {index}, {item} in {var}.items():"]
+                item_path = f"{path} + '[' + repr({index}) + ']'"
+            self._generate(field_type[1], item, item_path, lines, depth + 1, counter)
+            lines.append(f"{pad}    {items}.append({item})" if kind == 'list'
+                         else f"{pad}    {items}[{index}] = {item}")
+            lines.append(f"{pad}{var} = {items}")
+
+    # Decoding
+
+    def decode(self, data: Any) -> Any:
+        """Decode JSON text/bytes, or convert parsed JSON, into typed objects.
+
+        An object becomes one instance of the schema type, an array a list
+        of them.
+        """
+        if not isinstance(data, (str, bytes, bytearray, memoryview)):
+            return self.convert(data)
+        if self.backend == 'msgspec':
+            try:
+                return self._decoder.decode(data)
+            except self._msgspec.DecodeError as e:
+                raise SchemaError(f"{self.name}: {e}") from None
+        return self.convert(json_codec.loads(data))
+
+    def convert(self, data: Any) -> Any:
+        """Typed objects from already parsed JSON (dicts and lists)"""
+        if self.backend == 'msgspec':
+            try:
+                return self._msgspec.convert(data, self._one_or_many)
+            except self._msgspec.ValidationError as e:
+                raise SchemaError(f"{self.name}: {e}") from None
+        try:
+            if type(data) is list:
+                return [self.validate(item, f"$[{index}]") for index, item in enumerate(data)]
+            return self.validate(data)
+        except SchemaError as e:
+            raise SchemaError(f"{self.name}: {e}") from None
+
+    def loads(self, data: Any) -> Any:
+        """One typed object from one JSON document (codec interface for iter_ndjson)"""
+        if self.backend == 'msgspec':
+            try:
+                return self._line_decoder.decode(data)
+            except self._msgspec.DecodeError as e:
+                raise SchemaError(f"{self.name}: {e}") from None
+        try:
+            return self.validate(json_codec.loads(data))
+        except SchemaError as e:
+            raise SchemaError(f"{self.name}: {e}") from None
+
+    def loads_lines(self, block: Any) -> List[Any]:
+        if self.backend == 'msgspec':
+            try:
+                return self._line_decoder.decode_lines(block)
+            except self._msgspec.DecodeError as e:
+                raise SchemaError(f"{self.name}: {e}") from None
+        validate = self.validate
+        try:
+            return [validate(record) for record in json_codec.get_codec().loads_lines(block)]
+        except SchemaError as e:
+            raise SchemaError(f"{self.name}: {e}") from None
+
+    def to_builtins(self, value: Any) -> Any:
+        """Plain dicts and lists for typed objects, e.g. to return them as JSON"""
+        if self.backend == 'msgspec':
+            return self._msgspec.to_builtins(value)
+        return to_builtins(value)
+
+
+def _type_error(expected: str, value: Any, path: str) -> SchemaError:
+    names = {dict: 'object', list: 'array', str: 'str', int: 'int', float: 'float',
+             bool: 'bool', type(None): 'null'}
+    return SchemaError(f"Expected `{expected}`, got `{names.get(type(value), type(value).__name__)}` - at `{path}`")
+
+
+def to_builtins(value: Any) -> Any:
+    if isinstance(value, PayloadRecord):
+        return {name: to_builtins(getattr(value, name)) for name in value.__struct_fields__}
+    if isinstance(value, list):
+        return [to_builtins(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_builtins(item) for key, item in value.items()}
+    return value
+
+
+def register_schema(name: str, fields: Dict[str, str], backend: str = None) -> CompiledSchema:
+    """Compile and register the schema of a payload type.
+
+    fields maps field names to types: int, float, str, bool, any, a
+    registered schema name, list[T], dict[T] (string keys), and T? for an
+    optional field that may be absent or null. Schemas referenced by name
+    must be registered first.
+    """
+    schema = CompiledSchema(name, fields, backend)
+    SCHEMAS[name] = schema
+    return schema
+
+
+def get_schema(name: str) -> CompiledSchema:
+    try:
+        return SCHEMAS[name]
+    except KeyError:
+        raise SchemaError(f"Unknown payload schema: {name}") from None
+
+
+for _name, _fields in BUILTIN_SCHEMAS.items():
+    register_schema(_name, _fields)
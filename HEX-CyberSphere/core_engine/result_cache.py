@@ -0,0 +1,262 @@
+"""
+HEX-CyberSphere Result Cache
+Bounded LRU cache of task results keyed by a hash of the task parameters
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import json_codec
+from db_pool import SQLitePool
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS result_cache (
+    key TEXT PRIMARY KEY,
+    task_name TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_result_cache_stored ON result_cache(stored_at);
+"""
+
+# Expired and surplus disk entries are pruned once per this many writes
+PRUNE_EVERY = 100
+
+
+def _canonical(value: Any) -> Any:
+    """JSON fallback for parameter values that have an unambiguous plain form"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()  # NumPy arrays and scalars
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError(f"Uncacheable parameter type: {type(value).__name__}")
+
+
+def cache_key(task_name: str, params: Dict[Any, Any]) -> Optional[str]:
+    """Hash of the task name and its parameters, independent of key order.
+
+    Returns None when a parameter has no stable serialised form (e.g. a
+    generator), in which case the call must not be cached.
+    """
+    try:
+        canonical = json.dumps([task_name, params], sort_keys=True,
+                               separators=(',', ':'), default=_canonical)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class ResultCache:
+    """Cache of task results with an in-memory LRU tier and an optional SQLite tier.
+
+    Results are stored as JSON, so callers can never mutate a cached value,
+    and the disk tier holds nothing that runs code when read, even though
+    other processes can write to it. A hit returns the result as it looks
+    once serialised: tuples come back as lists and NumPy values as plain
+    numbers. The memory tier is bounded both by entry count and by the
+    total size of the serialised results. Each entry expires after the TTL
+    it was stored with. The disk tier is shared by every process that
+    points at the same file, so gunicorn workers reuse each other's
+    results. Concurrent requests for the same key compute it once; the
+    others wait for that result.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 disk_path: str = None, max_disk_entries: int = 10000):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._disk_writes = 0
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0,
+                         "evictions": 0, "expired": 0, "uncacheable": 0}
+        self.disk = self._open_disk(disk_path) if disk_path else None
+
+    def _open_disk(self, path: str) -> Optional[SQLitePool]:
+        try:
+            disk = SQLitePool(path, readers=2)
+            with disk.write() as cursor:
+                cursor.executescript(CACHE_SCHEMA)
+            return disk
+        except Exception as e:
+            self.logger.error(f"Result cache disk tier disabled: {e}")
+            return None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached result for key, or None on a miss"""
+        result = self._lookup(key)
+        if result is None:
+            with self._lock:
+                self.counters["misses"] += 1
+        return result
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return json_codec.loads(entry[0])
+                self._remove(key)
+                self.counters["expired"] += 1
+
+        entry = self._disk_get(key, now)
+        if entry is None:
+            return None
+        serialised = bytes(entry[0])
+        try:
+            result = json_codec.loads(serialised)
+        except ValueError as e:
+            # Written by an older release, or not by this cache at all
+            self.logger.warning(f"Ignoring unreadable disk cache entry {key}: {e}")
+            return None
+        with self._lock:
+            self.counters["disk_hits"] += 1
+            self._insert(key, serialised, entry[1])
+        return result
+
+    def put(self, key: str, task_name: str, value: Any, ttl: float):
+        """Store a result for ttl seconds"""
+        try:
+            serialised = json_codec.dumpb(value)
+        except (TypeError, ValueError) as e:
+            self.logger.warning(f"Result of {task_name} not cached: {e}")
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self.counters["stores"] += 1
+            self._insert(key, serialised, expires_at)
+        self._disk_put(key, task_name, serialised, expires_at)
+
+    def get_or_compute(self, task_name: str, params: Dict[Any, Any], ttl: float,
+                       compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, cached), computing and storing the result on a miss.
+
+        Error results ({"error": ...}) are returned but never stored.
+        """
+        key = cache_key(task_name, params)
+        if key is None:
+            with self._lock:
+                self.counters["uncacheable"] += 1
+            return compute(), False
+
+        while True:
+            result = self._lookup(key)
+            if result is not None:
+                return result, True
+            with self._lock:
+                pending = self._inflight.get(key)
+                if pending is None:
+                    self.counters["misses"] += 1
+                    self._inflight[key] = threading.Event()
+                    break
+            # Another thread is computing this key; reuse its result
+            pending.wait()
+
+        try:
+            result = compute()
+            if result is not None and not (isinstance(result, dict) and "error" in result):
+                self.put(key, task_name, result, ttl)
+            return result, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def invalidate(self, key: str = None):
+        """Drop one entry, or the whole cache when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+        if self.disk is not None:
+            try:
+                with self.disk.write() as cursor:
+                    if key is None:
+                        cursor.execute("DELETE FROM result_cache")
+                    else:
+                        cursor.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+            except Exception as e:
+                self.logger.error(f"Failed to invalidate disk cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+            stats.update(entries=len(self._entries), bytes=self._bytes,
+                         max_entries=self.max_entries, max_bytes=self.max_bytes,
+                         disk=self.disk is not None)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    def _insert(self, key: str, serialised: bytes, expires_at: float):
+        # Caller holds the lock
+        size = len(serialised)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (serialised, expires_at)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _remove(self, key: str):
+        serialised, _ = self._entries.pop(key)
+        self._bytes -= len(serialised)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[bytes, float]]:
+        if self.disk is None:
+            return None
+        try:
+            with self.disk.read() as cursor:
+                row = cursor.execute(
+                    "SELECT value, expires_at FROM result_cache WHERE key = ? AND expires_at > ?",
+                    (key, now)).fetchone()
+            return row
+        except Exception as e:
+            self.logger.error(f"Disk cache read failed: {e}")
+            return None
+
+    def _disk_put(self, key: str, task_name: str, serialised: bytes, expires_at: float):
+        if self.disk is None:
+            return
+        try:
+            with self.disk.write() as cursor:
+                cursor.execute("""
+                    INSERT INTO result_cache (key, task_name, value, expires_at, stored_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET value = excluded.value,
+                        expires_at = excluded.expires_at, stored_at = excluded.stored_at
+                """, (key, task_name, serialised, expires_at, time.time()))
+                self._disk_writes += 1
+                if self._disk_writes % PRUNE_EVERY == 0:
+                    self._prune(cursor)
+        except Exception as e:
+            self.logger.error(f"Disk cache write failed: {e}")
+
+    def _prune(self, cursor):
+        cursor.execute("DELETE FROM result_cache WHERE expires_at <= ?", (time.time(),))
+        # Oldest entries beyond the cap
+        cursor.execute("""
+            DELETE FROM result_cache WHERE key IN (
+                SELECT key FROM result_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_disk_entries,))
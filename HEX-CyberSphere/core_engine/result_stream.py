@@ -0,0 +1,122 @@
+"""
+HEX-CyberSphere Result Stream
+Incremental delivery of scan findings as iterators and NDJSON
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, TextIO
+import requests
+import json_codec
+from http_client import get_client
+
+_DONE = object()
+
+
+def iterate_async(factory: Callable[[], AsyncIterator[Any]], maxsize: int = 1000) -> Iterator[Any]:
+    """Consume an async iterator from synchronous code.
+
+    The async iterator runs on its own event loop in a background thread and
+    hands items over through a bounded queue, so a slow consumer applies
+    backpressure instead of letting results pile up. A full queue is
+    waited on from a helper thread, never on the event loop itself. Closing
+    the returned generator early cancels the producer on its loop.
+    """
+    items: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    running: Dict[str, Any] = {}
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def produce():
+        running['loop'] = asyncio.get_running_loop()
+        running['task'] = asyncio.current_task()
+        if stop.is_set():
+            return
+        agen = factory()
+        try:
+            async for item in agen:
+                if stop.is_set():
+                    break
+                try:
+                    items.put_nowait(item)
+                    continue
+                except queue.Full:
+                    pass
+                # Wait for the consumer off the loop, so probes in flight keep running
+                if not await asyncio.to_thread(put, item):
+                    break
+        finally:
+            await agen.aclose()
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except asyncio.CancelledError:
+            pass
+        except BaseException as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    def cancel():
+        stop.set()
+        loop, task = running.get('loop'), running.get('task')
+        if loop is None or task is None:
+            return
+        # The source may be parked on a slow await, so cancel it rather than
+        # wait for its next item
+        try:
+            loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            pass  # loop already closed
+
+    producer = threading.Thread(target=run, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        cancel()
+        producer.join()
+
+
+def to_ndjson(record: Dict[str, Any]) -> str:
+    """Serialize one record as a compact JSON line"""
+    return json_codec.dumps(record) + '\n'
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode records as NDJSON lines, one chunk per record"""
+    for record in records:
+        yield json_codec.dumpb(record) + b'\n'
+
+
+def write_ndjson(records: Iterable[Dict[str, Any]], stream: TextIO, flush: bool = True) -> int:
+    """Write records to a text stream as NDJSON and return the number written"""
+    count = 0
+    for record in records:
+        stream.write(to_ndjson(record))
+        if flush:
+            stream.flush()
+        count += 1
+    return count
+
+
+def post_ndjson(url: str, records: Iterable[Dict[str, Any]], timeout: float = 30) -> requests.Response:
+    """Stream records to an HTTP endpoint as a chunked NDJSON request body"""
+    return get_client().post(url, data=iter_ndjson(records), timeout=timeout,
+                         headers={"Content-Type": "application/x-ndjson"})
@@ -0,0 +1,372 @@
+"""
+HEX-CyberSphere Scan Engine
+Asynchronous TCP connect engine used by the security scanner
+"""
+
+import asyncio
+import ipaddress
+import itertools
+import logging
+import socket
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+DEFAULT_CONCURRENCY = 1000
+# File descriptors kept free for logging, the database and HTTP clients
+FD_HEADROOM = 64
+# Largest network one target may expand to (an IPv4 /16)
+MAX_NETWORK_HOSTS = 1 << 16
+# Hosts resolved and swept together; the next block starts when one finishes
+SWEEP_BLOCK_HOSTS = 1024
+# Hosts whose learned connect timeout is remembered; the least recently
+# probed are forgotten first. Larger than a sweep block so a block in
+# flight never loses its trackers.
+MAX_TIMEOUT_TRACKERS = 4 * SWEEP_BLOCK_HOSTS
+
+
+def parse_port_range(port_range: str) -> List[int]:
+    """Expand a port specification such as "1-1000" or "22,80,8000-8010" """
+    ports = []
+    seen = set()
+    for part in str(port_range).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start_port, end_port = map(int, part.split('-', 1))
+        else:
+            start_port = end_port = int(part)
+        if start_port < 1 or end_port > 65535 or start_port > end_port:
+            raise ValueError(f"Invalid port range: {part}")
+        for port in range(start_port, end_port + 1):
+            if port not in seen:
+                seen.add(port)
+                ports.append(port)
+    return ports
+
+
+def target_specs(targets: Union[str, Iterable[str]]) -> List[str]:
+    """Split a target string (comma separated values allowed) or iterable into specs"""
+    if isinstance(targets, str):
+        targets = targets.split(',')
+    return [target.strip() for target in targets if target.strip()]
+
+
+def expand_targets(targets: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Lazily expand hostnames, addresses and CIDR ranges into hosts.
+
+    Accepts a single string (comma separated values allowed) or an iterable of
+    strings. Network and broadcast addresses are skipped for CIDR ranges, and
+    hosts are yielded once even if several targets cover them. A network with
+    more than MAX_NETWORK_HOSTS addresses raises ValueError up front.
+    """
+    parsed = []
+    for target in target_specs(targets):
+        if '/' in target:
+            network = ipaddress.ip_network(target, strict=False)
+            if network.num_addresses > MAX_NETWORK_HOSTS:
+                raise ValueError(f"Network {target} has {network.num_addresses} addresses; "
+                                 f"split it into ranges of at most {MAX_NETWORK_HOSTS}")
+            parsed.append(network)
+        else:
+            parsed.append(target)
+    return _iter_hosts(parsed)
+
+
+def _iter_hosts(parsed: List[Any]) -> Iterator[str]:
+    # Duplicates are found from the ranges already expanded, so memory does
+    # not grow with the number of hosts
+    names = set()
+    ranges = []
+    for entry in parsed:
+        if isinstance(entry, str):
+            if entry in names or _in_ranges(entry, ranges):
+                continue
+            names.add(entry)
+            yield entry
+            continue
+        for address in entry.hosts():
+            host = str(address)
+            if host in names or _in_ranges(address, ranges):
+                continue
+            yield host
+        ranges.append(_host_range(entry))
+
+
+def _host_range(network) -> tuple:
+    """First and last address network.hosts() yields"""
+    first, last = network.network_address, network.broadcast_address
+    if network.num_addresses > 2:
+        first += 1
+        if network.version == 4:
+            last -= 1
+    return first, last
+
+
+def _in_ranges(host: Any, ranges: List[tuple]) -> bool:
+    if isinstance(host, str):
+        try:
+            host = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+    return any(first.version == host.version and first <= host <= last
+               for first, last in ranges)
+
+
+def count_targets(targets: Union[str, Iterable[str]]) -> int:
+    """Number of hosts expand_targets yields, without keeping them"""
+    return sum(1 for _ in expand_targets(targets))
+
+
+@lru_cache(maxsize=None)
+def service_name(port: int) -> str:
+    """Resolve the well-known service name for a TCP port"""
+    try:
+        return socket.getservbyport(port)
+    except OSError:
+        return "unknown"
+
+
+def fd_limited_concurrency(concurrency: int) -> int:
+    """Cap a concurrency level to what the process file descriptor limit allows"""
+    if resource is None:
+        return max(1, concurrency)
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft_limit == resource.RLIM_INFINITY:
+        return max(1, concurrency)
+    return max(1, min(concurrency, soft_limit - FD_HEADROOM))
+
+
+class AdaptiveTimeout:
+    """Per-host connect timeout derived from observed round-trip times.
+
+    Follows the RFC 6298 retransmission timer: every completed handshake or
+    RST gives an RTT sample, and the timeout settles at SRTT + 4 * RTTVAR,
+    clamped to [min_timeout, max_timeout]. Until the first sample arrives the
+    initial timeout is used.
+    """
+
+    def __init__(self, initial_timeout: float = 1.0, min_timeout: float = 0.05,
+                 max_timeout: float = 3.0):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.srtt = None
+        self.rttvar = None
+        self.samples = 0
+
+    def observe(self, rtt: float):
+        """Feed a round-trip time sample (in seconds)"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.samples += 1
+
+    @property
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.initial_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.srtt + 4 * self.rttvar))
+
+
+class HostRateLimiter:
+    """Token bucket limiting how many probes per second a single host receives"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = None
+
+    async def acquire(self):
+        """Wait until a probe may be sent to the host"""
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self.updated is not None:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PortScanEngine:
+    """Bounded-concurrency TCP connect scanner built on asyncio"""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, initial_timeout: float = 1.0,
+                 min_timeout: float = 0.05, max_timeout: float = 3.0):
+        self.logger = logging.getLogger(__name__)
+        self.concurrency = fd_limited_concurrency(concurrency)
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeouts: OrderedDict[str, AdaptiveTimeout] = OrderedDict()
+        self._timeouts_lock = threading.Lock()
+
+    def timeout_for(self, host: str) -> AdaptiveTimeout:
+        """Return the adaptive timeout tracker for a host.
+
+        At most MAX_TIMEOUT_TRACKERS hosts are tracked, so sweeping large
+        ranges does not leave one tracker behind per address.
+        """
+        with self._timeouts_lock:
+            tracker = self.timeouts.get(host)
+            if tracker is None:
+                tracker = AdaptiveTimeout(self.initial_timeout, self.min_timeout, self.max_timeout)
+                self.timeouts[host] = tracker
+                if len(self.timeouts) > MAX_TIMEOUT_TRACKERS:
+                    self.timeouts.popitem(last=False)
+            else:
+                self.timeouts.move_to_end(host)
+            return tracker
+
+    async def resolve(self, host: str):
+        """Resolve a host once so probes do not repeat DNS lookups"""
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        family, _, _, _, sockaddr = infos[0]
+        return family, sockaddr[0]
+
+    async def probe(self, host: str, family: int, address: str, port: int) -> Dict[str, Any]:
+        """Attempt a single TCP connect and classify the port"""
+        loop = asyncio.get_running_loop()
+        tracker = self.timeout_for(host)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        start = loop.time()
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (address, port)), tracker.timeout)
+            status = "open"
+        except asyncio.TimeoutError:
+            return {"port": port, "status": "filtered", "rtt": None}
+        except ConnectionRefusedError:
+            status = "closed"
+        except OSError:
+            return {"port": port, "status": "unreachable", "rtt": None}
+        finally:
+            sock.close()
+
+        rtt = loop.time() - start
+        tracker.observe(rtt)
+        return {"port": port, "status": status, "rtt": rtt}
+
+    async def iter_ports(self, target: str, ports: List[int]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a probe result for every port as soon as it completes"""
+        async for result in self.iter_sweep([target], ports):
+            if result["status"] == "unresolved":
+                raise OSError(f"Could not resolve {target}")
+            yield result
+
+    async def iter_sweep(self, hosts: Iterable[str], ports: List[int],
+                         rate_per_host: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield probe results for every (host, port) pair from one shared worker pool.
+
+        Hosts are taken lazily, SWEEP_BLOCK_HOSTS at a time, so resolution,
+        rate limiters and pending work stay bounded for large ranges. Within
+        a block work is interleaved port-major so consecutive probes land on
+        different hosts, and rate_per_host caps the probes per second any one
+        host sees. Hosts that fail to resolve are reported once with status
+        "unresolved".
+        """
+        hosts = iter(hosts)
+        while True:
+            block = list(itertools.islice(hosts, SWEEP_BLOCK_HOSTS))
+            if not block:
+                return
+            results = self._sweep_block(block, ports, rate_per_host)
+            try:
+                async for result in results:
+                    yield result
+            finally:
+                await results.aclose()
+
+    async def _sweep_block(self, hosts: List[str], ports: List[int],
+                           rate_per_host: Optional[float]) -> AsyncIterator[Dict[str, Any]]:
+        resolved = await asyncio.gather(*(self.resolve(host) for host in hosts),
+                                        return_exceptions=True)
+        addresses = {}
+        for host, address in zip(hosts, resolved):
+            if isinstance(address, Exception):
+                self.logger.warning(f"Could not resolve {host}: {address}")
+                yield {"host": host, "port": None, "status": "unresolved", "rtt": None}
+            else:
+                addresses[host] = address
+        live_hosts = [host for host in hosts if host in addresses]
+
+        limiters = {}
+        if rate_per_host:
+            limiters = {host: HostRateLimiter(rate_per_host) for host in live_hosts}
+
+        work = ((host, port) for port in ports for host in live_hosts)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+
+        stopped = False
+
+        async def worker():
+            for host, port in work:
+                # wait_for can swallow a cancellation that races with a
+                # finished connect, so workers also check an explicit flag
+                if stopped:
+                    return
+                if limiters:
+                    await limiters[host].acquire()
+                family, address = addresses[host]
+                result = await self.probe(host, family, address, port)
+                result["host"] = host
+                await results.put(result)
+
+        pending = len(live_hosts) * len(ports)
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(min(self.concurrency, pending))]
+        try:
+            while pending:
+                yield await results.get()
+                pending -= 1
+        finally:
+            stopped = True
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def scan(self, target: str, ports: List[int],
+                   on_open: Optional[Callable[[Dict[str, Any]], None]] = None,
+                   on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """Scan ports on a target and return the open ones in port order.
+
+        on_open receives each open port entry, on_result every raw probe result.
+        """
+        open_ports = []
+        async for result in self.iter_ports(target, ports):
+            if on_result:
+                on_result(result)
+            if result["status"] != "open":
+                continue
+            entry = {
+                "port": result["port"],
+                "service": service_name(result["port"]),
+                "status": "open"
+            }
+            open_ports.append(entry)
+            if on_open:
+                on_open(entry)
+
+        tracker = self.timeout_for(target)
+        self.logger.debug(f"Scan of {target} settled on a {tracker.timeout:.3f}s connect timeout "
+                          f"after {tracker.samples} RTT samples")
+        open_ports.sort(key=lambda entry: entry["port"])
+        return open_ports
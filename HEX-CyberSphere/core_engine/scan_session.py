@@ -0,0 +1,232 @@
+"""
+HEX-CyberSphere Scan Session
+Per-target cache of probe results shared by the checks of one scan
+"""
+
+import asyncio
+import logging
+import socket
+import ssl
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+import requests
+from http_client import get_client
+from scan_engine import PortScanEngine
+
+
+def _tls_context(verify: bool) -> ssl.SSLContext:
+    """Client context that still negotiates the deprecated protocols it reports on"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.MINIMUM_SUPPORTED
+    try:
+        # OpenSSL 3 refuses TLS 1.0 and 1.1 above security level 0
+        context.set_ciphers("ALL:@SECLEVEL=0")
+    except ssl.SSLError:
+        pass
+    if verify:
+        context.load_default_certs()
+    else:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def _der_element(data: bytes, offset: int):
+    """Return (tag, start of content, end of content) of the DER element at offset"""
+    if offset + 2 > len(data):
+        raise ValueError("truncated DER element")
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7f
+        if not size or offset + size > len(data):
+            raise ValueError("invalid DER length")
+        length = int.from_bytes(data[offset:offset + size], "big")
+        offset += size
+    if offset + length > len(data):
+        raise ValueError("truncated DER element")
+    return tag, offset, offset + length
+
+
+def certificate_not_after(der: bytes) -> datetime:
+    """Read the notAfter time of a DER encoded X.509 certificate"""
+    _, start, _ = _der_element(der, 0)           # Certificate
+    _, offset, _ = _der_element(der, start)      # tbsCertificate
+    tag, _, end = _der_element(der, offset)
+    if tag == 0xa0:                              # explicit version
+        offset = end
+    for _ in range(3):                           # serial, signature, issuer
+        _, _, offset = _der_element(der, offset)
+    _, validity, _ = _der_element(der, offset)
+    _, _, after = _der_element(der, validity)    # skip notBefore
+    tag, start, end = _der_element(der, after)
+    text = der[start:end].decode("ascii")
+    if tag == 0x17:                              # UTCTime
+        parsed = datetime.strptime(text, "%y%m%d%H%M%SZ")
+    elif tag == 0x18:                            # GeneralizedTime
+        parsed = datetime.strptime(text, "%Y%m%d%H%M%SZ")
+    else:
+        raise ValueError(f"unexpected time tag {tag:#x}")
+    return parsed.replace(tzinfo=timezone.utc)
+
+
+class ScanSession:
+    """Caches connect outcomes, banners, TLS and HTTP responses for one target.
+
+    A session lives for the length of a single scan. Every check asks the
+    session instead of opening its own connection, so each port is probed at
+    most once and a filtered host only costs its timeout once. Lookups are
+    safe to call from several check threads; concurrent requests for the same
+    probe wait for the first one instead of repeating it.
+    """
+
+    def __init__(self, target: str, engine: Optional[PortScanEngine] = None,
+                 base_url: Optional[str] = None, http_timeout: float = 5,
+                 banner_timeout: float = 1.0, tls_timeout: float = 5):
+        self.logger = logging.getLogger(__name__)
+        self.target = target
+        self.engine = engine or PortScanEngine()
+        self.base_url = base_url or f"http://{target}"
+        self.http_timeout = http_timeout
+        self.banner_timeout = banner_timeout
+        self.tls_timeout = tls_timeout
+        self.ports: Dict[int, str] = {}
+        self.banners: Dict[int, Optional[str]] = {}
+        self.http: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.tls: Dict[int, Optional[Dict[str, Any]]] = {}
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Any, threading.Lock] = {}
+
+    def _once(self, cache: Dict[Any, Any], key: Any, fetch: Callable[[], Any]) -> Any:
+        """Return cache[key], computing it at most once across threads"""
+        if key in cache:
+            return cache[key]
+        with self._lock:
+            key_lock = self._key_locks.setdefault((id(cache), key), threading.Lock())
+        with key_lock:
+            if key not in cache:
+                cache[key] = fetch()
+            return cache[key]
+
+    def _count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def record_port(self, port: int, status: str):
+        """Store the connect outcome of a probe made elsewhere"""
+        self.ports[port] = status
+        self._count_connection()
+
+    def port_status(self, port: int) -> Optional[str]:
+        """Return the cached connect outcome for a port, if probed"""
+        return self.ports.get(port)
+
+    def is_open(self, port: int) -> bool:
+        return self.ports.get(port) == "open"
+
+    def probe_ports(self, ports: List[int]) -> Dict[int, str]:
+        """Return connect outcomes for ports, probing only those not yet cached"""
+        missing = [port for port in ports if port not in self.ports]
+        if missing:
+            asyncio.run(self.probe_ports_async(missing))
+        return {port: self.ports[port] for port in ports}
+
+    async def probe_ports_async(self, ports: List[int]):
+        """Probe uncached ports from inside a running event loop"""
+        missing = [port for port in ports if port not in self.ports]
+        async for result in self.engine.iter_ports(self.target, missing):
+            self.record_port(result["port"], result["status"])
+
+    def _port_may_be_open(self, port: int) -> bool:
+        return self.port_status(port) in (None, "open")
+
+    def banner(self, port: int, max_bytes: int = 1024) -> Optional[str]:
+        """Read the greeting a service sends on connect (FTP, SSH, SMTP, ...)"""
+        return self._once(self.banners, port, lambda: self._grab_banner(port, max_bytes))
+
+    def _grab_banner(self, port: int, max_bytes: int) -> Optional[str]:
+        if not self._port_may_be_open(port):
+            return None
+        try:
+            with socket.create_connection((self.target, port), timeout=self.banner_timeout) as sock:
+                self._count_connection()
+                data = sock.recv(max_bytes)
+                return data.decode('utf-8', errors='replace').strip() or None
+        except OSError:
+            return None
+
+    def tls_info(self, port: int = 443) -> Optional[Dict[str, Any]]:
+        """Perform one TLS handshake and cache protocol, cipher and certificate"""
+        return self._once(self.tls, port, lambda: self._handshake(port))
+
+    def _handshake(self, port: int) -> Optional[Dict[str, Any]]:
+        if not self._port_may_be_open(port):
+            return None
+
+        info = {"port": port, "verified": True, "verify_error": None}
+        try:
+            tls_sock = self._wrap(_tls_context(verify=True), port)
+        except ssl.SSLCertVerificationError as e:
+            # Handshake again without verification to still learn the protocol
+            info["verified"] = False
+            info["verify_error"] = e.verify_message
+            try:
+                tls_sock = self._wrap(_tls_context(verify=False), port)
+            except (OSError, ssl.SSLError):
+                return None
+        except (OSError, ssl.SSLError):
+            return None
+
+        with tls_sock:
+            info["protocol"] = tls_sock.version()
+            info["cipher"] = tls_sock.cipher()[0] if tls_sock.cipher() else None
+            # The decoded form is empty without verification, so read the raw certificate
+            certificate = tls_sock.getpeercert(binary_form=True)
+        info["not_after"] = None
+        if certificate:
+            try:
+                info["not_after"] = certificate_not_after(certificate)
+            except ValueError as e:
+                self.logger.debug(f"Unreadable certificate on {self.target}:{port}: {e}")
+        return info
+
+    def _wrap(self, context: ssl.SSLContext, port: int) -> ssl.SSLSocket:
+        sock = socket.create_connection((self.target, port), timeout=self.tls_timeout)
+        self._count_connection()
+        try:
+            return context.wrap_socket(sock, server_hostname=self.target)
+        except Exception:
+            sock.close()
+            raise
+
+    def http_response(self, url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Fetch a URL once and cache status code and headers.
+
+        Defaults to the session's base URL. Returns None when the request
+        fails or when the URL points at a port of the target already known not
+        to be open, so filtered hosts do not cost a second timeout.
+        """
+        url = url or self.base_url
+        return self._once(self.http, url, lambda: self._fetch(url))
+
+    def _fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        if parts.hostname == self.target and not self._port_may_be_open(port):
+            return None
+        try:
+            response = get_client().get(url, timeout=self.http_timeout, retry=False)
+            self._count_connection()
+            return {
+                "url": url,
+                "status_code": response.status_code,
+                "headers": response.headers,
+                "elapsed": response.elapsed.total_seconds()
+            }
+        except requests.RequestException as e:
+            self.logger.debug(f"HTTP probe of {url} failed: {e}")
+            return None
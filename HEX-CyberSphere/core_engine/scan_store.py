@@ -0,0 +1,220 @@
+"""
+HEX-CyberSphere Scan Result Store
+Indexed storage of scan findings and run-to-run diffing in SQL
+"""
+
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Targets per query when looking up which swept hosts were scanned before
+LOOKUP_CHUNK = 500
+
+# Findings of one scan with no matching (target, port, check) row in another
+_DIFF_NEW = """
+    SELECT cur.port, cur.check_name, cur.risk, cur.detail
+    FROM scan_results cur
+    LEFT JOIN scan_results prev
+        ON prev.scan_id = ? AND prev.target = cur.target
+        AND prev.port = cur.port AND prev.check_name = cur.check_name
+    WHERE cur.scan_id = ? AND prev.scan_id IS NULL
+    ORDER BY cur.port, cur.check_name
+"""
+
+_DIFF_CHANGED = """
+    SELECT cur.port, cur.check_name, cur.risk, cur.detail, prev.detail
+    FROM scan_results cur
+    JOIN scan_results prev
+        ON prev.scan_id = ? AND prev.target = cur.target
+        AND prev.port = cur.port AND prev.check_name = cur.check_name
+    WHERE cur.scan_id = ? AND prev.fingerprint <> cur.fingerprint
+    ORDER BY cur.port, cur.check_name
+"""
+
+_DIFF_UNCHANGED = """
+    SELECT COUNT(*)
+    FROM scan_results cur
+    JOIN scan_results prev
+        ON prev.scan_id = ? AND prev.target = cur.target
+        AND prev.port = cur.port AND prev.check_name = cur.check_name
+    WHERE cur.scan_id = ? AND prev.fingerprint = cur.fingerprint
+"""
+
+
+def fingerprint(detail: Dict[str, Any]) -> str:
+    """Stable hash of a finding used to spot changes between runs"""
+    canonical = json.dumps(detail, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def flatten_scan(result: Dict[str, Any]) -> List[Tuple[int, str, Optional[str], Dict[str, Any]]]:
+    """Turn a port, vulnerability or full scan result into (port, check, risk, detail) rows"""
+    port_scan = result.get("port_scan", result if result.get("scan_type") == "port_scan" else {})
+    vuln_scan = result.get("vulnerability_scan",
+                           result if result.get("scan_type") == "vulnerability_scan" else {})
+
+    rows = []
+    for entry in port_scan.get("open_ports", []):
+        rows.append((entry["port"], "open_port", None, entry))
+    for finding in vuln_scan.get("vulnerabilities", []):
+        check_name = finding.get("check") or finding.get("type", "unknown")
+        rows.append((finding.get("port", 0), check_name, finding.get("risk"), finding))
+    return rows
+
+
+def _load_detail(detail):
+    """Decode a detail column; Postgres already returns JSONB as objects"""
+    if isinstance(detail, str):
+        return json.loads(detail)
+    return detail
+
+
+class ScanResultStore:
+    """Persists findings keyed by (target, port, check, scan_id).
+
+    The scans and scan_results tables are created by db_pool.init_schema.
+    """
+
+    def __init__(self, pool):
+        self.logger = logging.getLogger(__name__)
+        self.pool = pool
+
+    def record_scan(self, result: Dict[str, Any]) -> int:
+        """Store a single-target scan result and return its scan_id"""
+        return self.record_findings(result["target"], result.get("scan_type", "scan"),
+                                    flatten_scan(result))
+
+    def record_sweep(self, result: Dict[str, Any]) -> Dict[str, int]:
+        """Store swept hosts as their own scans, returning scan_ids by host.
+
+        Only hosts with open ports, or with an earlier sweep whose ports may
+        since have closed, are stored; the empty majority of a large sweep
+        costs no scan row and no diff.
+        """
+        hosts = result.get("hosts", {})
+        quiet = [host for host, host_result in hosts.items() if not host_result.get("open_ports")]
+        swept_before = self._swept_before(quiet)
+        scan_ids = {}
+        for host, host_result in hosts.items():
+            rows = [(entry["port"], "open_port", None, entry)
+                    for entry in host_result.get("open_ports", [])]
+            if rows or host in swept_before:
+                scan_ids[host] = self.record_findings(host, "sweep", rows)
+        return scan_ids
+
+    def _swept_before(self, hosts: List[str]) -> Set[str]:
+        """The hosts among hosts that have an earlier sweep scan"""
+        found = set()
+        with self.pool.read() as cursor:
+            for start in range(0, len(hosts), LOOKUP_CHUNK):
+                chunk = hosts[start:start + LOOKUP_CHUNK]
+                cursor.execute(f"""
+                    SELECT DISTINCT target FROM scans
+                    WHERE scan_type = 'sweep' AND target IN ({', '.join('?' * len(chunk))})
+                """, chunk)
+                found.update(row[0] for row in cursor.fetchall())
+        return found
+
+    def record_findings(self, target: str, scan_type: str,
+                        rows: Iterable[Tuple[int, str, Optional[str], Dict[str, Any]]]) -> int:
+        """Store (port, check, risk, detail) rows as a new scan of a target.
+
+        A check may report several findings on one port. Identical repeats
+        are stored once; distinct ones are told apart by a fingerprint
+        suffix on the check name ("check#1a2b3c4d5e6f"), so each is diffed
+        on its own across runs. A lone finding keeps the plain check name,
+        and a change in its details shows up as "changed".
+        """
+        groups = defaultdict(dict)
+        for port, check_name, risk, detail in rows:
+            groups[(port, check_name)].setdefault(fingerprint(detail), (risk, detail))
+        rows = []
+        for (port, check_name), findings in groups.items():
+            for digest, (risk, detail) in findings.items():
+                name = check_name if len(findings) == 1 else f"{check_name}#{digest[:12]}"
+                rows.append((port, name, risk, detail, digest))
+
+        with self.pool.write() as cursor:
+            cursor.execute("INSERT INTO scans (target, scan_type) VALUES (?, ?) RETURNING scan_id",
+                           (target, scan_type))
+            scan_id = cursor.fetchone()[0]
+            cursor.executemany("""
+                INSERT INTO scan_results (target, port, check_name, scan_id, risk, fingerprint, detail)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (target, port, check_name, scan_id, risk, digest, json.dumps(detail, default=str))
+                for port, check_name, risk, detail, digest in rows
+            ])
+        return scan_id
+
+    def previous_scan_id(self, target: str, scan_id: int) -> Optional[int]:
+        """Return the scan of the same target and scan type that ran before scan_id.
+
+        Scans of different types cover different findings (a port scan has
+        no vulnerabilities), so diffing across types would report false changes.
+        """
+        with self.pool.read() as cursor:
+            cursor.execute("""
+                SELECT MAX(scan_id) FROM scans
+                WHERE target = ? AND scan_id < ?
+                    AND scan_type = (SELECT scan_type FROM scans WHERE scan_id = ?)
+            """, (target, scan_id, scan_id))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def latest_scan_id(self, target: str) -> Optional[int]:
+        with self.pool.read() as cursor:
+            cursor.execute("SELECT MAX(scan_id) FROM scans WHERE target = ?", (target,))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def diff(self, target: str, scan_id: Optional[int] = None,
+             previous_scan_id: Optional[int] = None) -> Dict[str, Any]:
+        """Report what changed in a scan compared with the previous scan of the same type.
+
+        Defaults to the latest scan. Findings are matched on (port, check);
+        "changed" means the same finding with different details.
+        """
+        scan_id = scan_id or self.latest_scan_id(target)
+        if scan_id is None:
+            return {"target": target, "error": "No scans recorded for target"}
+        if previous_scan_id is None:
+            previous_scan_id = self.previous_scan_id(target, scan_id)
+
+        # With no previous scan every finding is new; -1 matches no scan
+        baseline = previous_scan_id if previous_scan_id is not None else -1
+
+        with self.pool.read() as cursor:
+            cursor.execute(_DIFF_NEW, (baseline, scan_id))
+            new = [self._row(row) for row in cursor.fetchall()]
+
+            # Resolved findings are the "new" ones when comparing in reverse
+            cursor.execute(_DIFF_NEW, (scan_id, baseline))
+            resolved = [self._row(row) for row in cursor.fetchall()]
+
+            cursor.execute(_DIFF_CHANGED, (baseline, scan_id))
+            changed = [dict(self._row(row), previous=_load_detail(row[4]))
+                       for row in cursor.fetchall()]
+
+            cursor.execute(_DIFF_UNCHANGED, (baseline, scan_id))
+            unchanged = cursor.fetchone()[0]
+
+        return {
+            "target": target,
+            "scan_id": scan_id,
+            "previous_scan_id": previous_scan_id,
+            "new": new,
+            "resolved": resolved,
+            "changed": changed,
+            "unchanged": unchanged
+        }
+
+    def _row(self, row) -> Dict[str, Any]:
+        return {
+            "port": row[0],
+            "check": row[1],
+            "risk": row[2],
+            "detail": _load_detail(row[3])
+        }
@@ -3,114 +3,224 @@ HEX-CyberSphere Security Scanner
 Handles security scanning and vulnerability detection
 """
 
+import asyncio
 import socket
 import subprocess
 import json
 import logging
-from typing import Dict, Any, List
-import requests
+from typing import Dict, Any, List, AsyncIterator, Callable, Iterable, Iterator, Optional, Union
+from urllib.parse import urlsplit
+from scan_engine import (PortScanEngine, parse_port_range, expand_targets, count_targets,
+                         target_specs, service_name, DEFAULT_CONCURRENCY)
+from scan_session import ScanSession
+from vuln_checks import CheckScheduler
+from result_stream import iterate_async
 
 class SecurityScanner:
-    def __init__(self):
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY):
         self.logger = logging.getLogger(__name__)
+        self.engine = PortScanEngine(concurrency=concurrency)
+        self.check_scheduler = CheckScheduler()
         self.logger.info("Security Scanner initialized")
     
-    def scan_ports(self, target: str, port_range: str = "1-1000") -> Dict[Any, Any]:
+    def scan_ports(self, target: str, port_range: str = "1-1000",
+                   on_open: Optional[Callable[[Dict[str, Any]], None]] = None,
+                   session: Optional[ScanSession] = None) -> Dict[Any, Any]:
         """Scan open ports on a target"""
         self.logger.info(f"Scanning ports on {target}")
         
         try:
-            open_ports = []
-            start_port, end_port = map(int, port_range.split('-'))
-            
-            for port in range(start_port, end_port + 1):
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(0.1)  # 100ms timeout
-                
-                result = sock.connect_ex((target, port))
-                if result == 0:
-                    # Port is open
-                    try:
-                        service = socket.getservbyport(port)
-                    except:
-                        service = "unknown"
-                    
-                    open_ports.append({
-                        "port": port,
-                        "service": service,
-                        "status": "open"
-                    })
-                
-                sock.close()
-            
-            return {
-                "target": target,
-                "scan_type": "port_scan",
-                "open_ports": open_ports,
-                "total_scanned": end_port - start_port + 1
-            }
+            return asyncio.run(self.scan_ports_async(target, port_range, on_open, session))
         except Exception as e:
             error_msg = f"Port scanning failed: {str(e)}"
             self.logger.error(error_msg)
             return {"error": error_msg}
     
-    def scan_vulnerabilities(self, target: str) -> Dict[Any, Any]:
-        """Scan for common vulnerabilities"""
-        self.logger.info(f"Scanning vulnerabilities on {target}")
+    async def scan_ports_async(self, target: str, port_range: str = "1-1000",
+                               on_open: Optional[Callable[[Dict[str, Any]], None]] = None,
+                               session: Optional[ScanSession] = None) -> Dict[Any, Any]:
+        """Scan open ports on a target from inside a running event loop.
+
+        on_open is called with each open port entry as soon as it is found.
+        When a session is given, every probe outcome is recorded in it so
+        later checks in the same scan can reuse them.
+        """
+        ports = parse_port_range(port_range)
+        on_result = None
+        if session is not None:
+            on_result = lambda result: session.record_port(result["port"], result["status"])
+        open_ports = await self.engine.scan(target, ports, on_open, on_result)
+        
+        return {
+            "target": target,
+            "scan_type": "port_scan",
+            "open_ports": open_ports,
+            "total_scanned": len(ports)
+        }
+    
+    def sweep(self, targets: Union[str, Iterable[str]], port_range: str = "1-1000",
+              rate_per_host: Optional[float] = None,
+              on_open: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+              on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+              progress_every: int = 1000) -> Dict[Any, Any]:
+        """Scan ports across many hosts (CIDR ranges or target lists)"""
+        self.logger.info(f"Sweeping ports on {targets}")
         
         try:
-            vulnerabilities = []
-            
-            # Check for common vulnerabilities
-            # 1. Check if common ports are open with weak services
-            common_ports = [
-                (21, "FTP"), (22, "SSH"), (23, "Telnet"), 
-                (80, "HTTP"), (443, "HTTPS"), (3389, "RDP")
-            ]
+            return asyncio.run(self.sweep_async(targets, port_range, rate_per_host,
+                                                on_open, on_progress, progress_every))
+        except Exception as e:
+            error_msg = f"Port sweep failed: {str(e)}"
+            self.logger.error(error_msg)
+            return {"error": error_msg}
+    
+    async def sweep_async(self, targets: Union[str, Iterable[str]], port_range: str = "1-1000",
+                          rate_per_host: Optional[float] = None,
+                          on_open: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                          on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          progress_every: int = 1000) -> Dict[Any, Any]:
+        """Scan ports across many hosts from inside a running event loop.
+
+        All (host, port) probes share the engine's bounded worker pool.
+        on_open is called with (host, entry) for each open port, and
+        on_progress receives a progress snapshot every progress_every probes
+        and once more when the sweep finishes.
+        """
+        targets = target_specs(targets)
+        results = {}
+        unresolved = []
+        total_scanned = 0
+        
+        async for record in self.aiter_sweep(targets, port_range, rate_per_host, progress_every):
+            event = record.pop("event")
+            if event == "open_port":
+                host = record.pop("target")
+                results.setdefault(host, []).append(record)
+                if on_open:
+                    on_open(host, record)
+            elif event == "unresolved":
+                unresolved.append(record["target"])
+            elif event == "progress":
+                total_scanned = record["completed"]
+                if on_progress:
+                    on_progress(record)
+        
+        # Hosts are expanded again rather than kept during the sweep; every
+        # resolved host is listed so closed hosts count as resolved findings
+        skipped = set(unresolved)
+        return {
+            "targets": targets,
+            "scan_type": "sweep",
+            "hosts": {
+                host: {"open_ports": sorted(results.get(host, []), key=lambda entry: entry["port"])}
+                for host in expand_targets(targets)
+                if host not in skipped
+            },
+            "unresolved": unresolved,
+            "total_scanned": total_scanned
+        }
+    
+    async def aiter_sweep(self, targets: Union[str, Iterable[str]], port_range: str = "1-1000",
+                          rate_per_host: Optional[float] = None,
+                          progress_every: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """Yield sweep findings as they are discovered.
+
+        Emits "open_port" and "unresolved" records as they happen, a
+        "progress" record every progress_every probes and a final "progress"
+        record when the sweep finishes. Nothing is accumulated, so memory is
+        bounded by the probes in flight rather than the number of findings.
+        """
+        targets = target_specs(targets)
+        hosts = expand_targets(targets)
+        ports = parse_port_range(port_range)
+        progress = {"completed": 0, "total": count_targets(targets) * len(ports), "open_found": 0}
+        
+        async for result in self.engine.iter_sweep(hosts, ports, rate_per_host):
+            host = result["host"]
+            if result["status"] == "unresolved":
+                progress["total"] -= len(ports)
+                yield {"event": "unresolved", "target": host}
+                continue
             
-            for port, service_name in common_ports:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(0.5)
-                
-                result = sock.connect_ex((target, port))
-                if result == 0:
-                    vulnerabilities.append({
-                        "type": "open_port",
-                        "port": port,
-                        "service": service_name,
-                        "risk": "info" if port in [80, 443] else "medium",
-                        "description": f"{service_name} service running on port {port}"
-                    })
-                
-                sock.close()
+            progress["completed"] += 1
+            if result["status"] == "open":
+                progress["open_found"] += 1
+                yield self._open_port_record(host, result["port"])
             
-            # 2. Check for HTTP headers security issues
-            try:
-                response = requests.get(f"http://{target}", timeout=5)
-                headers = response.headers
-                
-                # Check for missing security headers
-                security_headers = [
-                    "X-Content-Type-Options",
-                    "X-Frame-Options", 
-                    "X-XSS-Protection",
-                    "Strict-Transport-Security"
-                ]
-                
-                missing_headers = []
-                for header in security_headers:
-                    if header not in headers:
-                        missing_headers.append(header)
-                
-                if missing_headers:
-                    vulnerabilities.append({
-                        "type": "missing_security_headers",
-                        "risk": "medium",
-                        "description": f"Missing security headers: {', '.join(missing_headers)}",
-                        "headers": missing_headers
-                    })
-            except:
-                pass  # Ignore if HTTP service is not available
+            if progress["completed"] % progress_every == 0:
+                yield {"event": "progress", **progress}
+        
+        yield {"event": "progress", **progress}
+    
+    def iter_sweep(self, targets: Union[str, Iterable[str]], port_range: str = "1-1000",
+                   rate_per_host: Optional[float] = None,
+                   progress_every: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Synchronous generator over aiter_sweep records"""
+        return iterate_async(lambda: self.aiter_sweep(targets, port_range, rate_per_host, progress_every))
+    
+    async def aiter_scan(self, target: str, port_range: str = "1-1000",
+                         checks: Optional[Iterable[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield full-scan findings for one target as they are discovered.
+
+        Emits an "open_port" record per open port, a "vulnerability" record
+        per check finding and a closing "summary" record.
+        """
+        session = self.new_session(target)
+        ports = parse_port_range(port_range)
+        total_open = 0
+        total_vulnerabilities = 0
+        
+        async for result in self.engine.iter_ports(target, ports):
+            session.record_port(result["port"], result["status"])
+            if result["status"] == "open":
+                total_open += 1
+                yield self._open_port_record(target, result["port"])
+        
+        # Checks run on worker threads; pull their findings one at a time
+        loop = asyncio.get_running_loop()
+        findings = self.check_scheduler.iter_run(session, "host", checks)
+        try:
+            while True:
+                finding = await loop.run_in_executor(None, next, findings, None)
+                if finding is None:
+                    break
+                total_vulnerabilities += 1
+                yield {"event": "vulnerability", "target": target, **finding}
+        finally:
+            findings.close()
+        
+        yield {
+            "event": "summary",
+            "target": target,
+            "timestamp": __import__('datetime').datetime.now().isoformat(),
+            "total_scanned": len(ports),
+            "total_open_ports": total_open,
+            "total_vulnerabilities": total_vulnerabilities,
+            "total_connections": session.connections
+        }
+    
+    def iter_scan(self, target: str, port_range: str = "1-1000",
+                  checks: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Synchronous generator over aiter_scan records"""
+        return iterate_async(lambda: self.aiter_scan(target, port_range, checks))
+    
+    def _open_port_record(self, target: str, port: int) -> Dict[str, Any]:
+        return {
+            "event": "open_port",
+            "target": target,
+            "port": port,
+            "service": service_name(port),
+            "status": "open"
+        }
+    
+    def scan_vulnerabilities(self, target: str, session: Optional[ScanSession] = None,
+                             checks: Optional[Iterable[str]] = None) -> Dict[Any, Any]:
+        """Scan for common vulnerabilities using the registered host checks"""
+        self.logger.info(f"Scanning vulnerabilities on {target}")
+        
+        try:
+            session = session or self.new_session(target)
+            vulnerabilities = self.check_scheduler.run(session, "host", checks)
             
             return {
                 "target": target,
@@ -123,16 +233,23 @@ class SecurityScanner:
             self.logger.error(error_msg)
             return {"error": error_msg}
     
+    def new_session(self, target: str) -> ScanSession:
+        """Create a probe cache for one scan of a target"""
+        return ScanSession(target, self.engine)
+    
     def full_scan(self, target: str) -> Dict[Any, Any]:
         """Perform a full security scan"""
         self.logger.info(f"Performing full security scan on {target}")
         
         try:
+            # Probes made by the port scan are reused by the vulnerability checks
+            session = self.new_session(target)
+            
             # Run port scan
-            port_results = self.scan_ports(target)
+            port_results = self.scan_ports(target, session=session)
             
             # Run vulnerability scan
-            vuln_results = self.scan_vulnerabilities(target)
+            vuln_results = self.scan_vulnerabilities(target, session=session)
             
             # Combine results
             combined_results = {
@@ -143,7 +260,8 @@ class SecurityScanner:
                 "vulnerability_scan": vuln_results,
                 "summary": {
                     "total_open_ports": len(port_results.get("open_ports", [])),
-                    "total_vulnerabilities": len(vuln_results.get("vulnerabilities", []))
+                    "total_vulnerabilities": len(vuln_results.get("vulnerabilities", [])),
+                    "total_connections": session.connections
                 }
             }
             
@@ -153,29 +271,13 @@ class SecurityScanner:
             self.logger.error(error_msg)
             return {"error": error_msg}
     
-    def check_api_security(self, api_url: str) -> Dict[Any, Any]:
-        """Check security of an API endpoint"""
+    def check_api_security(self, api_url: str, checks: Optional[Iterable[str]] = None) -> Dict[Any, Any]:
+        """Check security of an API endpoint using the registered API checks"""
         self.logger.info(f"Checking API security for {api_url}")
         
         try:
-            vulnerabilities = []
-            
-            # Check if API requires authentication
-            try:
-                response = requests.get(api_url, timeout=5)
-                
-                # If we can access without auth, it's a potential issue
-                if response.status_code == 200:
-                    vulnerabilities.append({
-                        "type": "unauthenticated_access",
-                        "risk": "high",
-                        "description": "API endpoint accessible without authentication"
-                    })
-            except:
-                pass  # Ignore connection errors
-            
-            # Check for common API security issues would go here
-            # This is a simplified version
+            session = ScanSession(urlsplit(api_url).hostname or api_url, self.engine, base_url=api_url)
+            vulnerabilities = self.check_scheduler.run(session, "api", checks)
             
             return {
                 "api_url": api_url,
@@ -0,0 +1,151 @@
+"""
+HEX-CyberSphere Core Server
+HTTP entrypoint for the Python core engine
+
+Run with gunicorn (one AutomationManager per worker process):
+    gunicorn -c gunicorn.conf.py 'server:create_app()'
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from flask import Flask, Response, jsonify, request, stream_with_context
+from automation_manager import AutomationManager
+from result_stream import iter_ndjson
+
+# How long a synchronous /execute call waits before answering 202 with a task ID
+DEFAULT_WAIT_SECONDS = 30.0
+MAX_WAIT_SECONDS = 300.0
+
+# Largest event id a database can hold (signed 64-bit)
+MAX_EVENT_ID = 2 ** 63 - 1
+
+_manager = None
+
+
+def get_manager() -> AutomationManager:
+    """This worker's AutomationManager"""
+    return _manager
+
+
+def _wait_seconds(value, default: float) -> float:
+    try:
+        return max(0.0, min(float(value), MAX_WAIT_SECONDS))
+    except (TypeError, ValueError):
+        return default
+
+
+def _history_time(value: Optional[str]) -> Optional[str]:
+    """ISO date or datetime as the UTC "YYYY-MM-DD HH:MM:SS" events store; ValueError if malformed"""
+    if value is None:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.isoformat(sep=' ')
+
+
+def create_app(config_path: str = "../config/config.json") -> Flask:
+    """Build the Flask app and the AutomationManager it serves"""
+    global _manager
+    _manager = AutomationManager(config_path)
+    manager = _manager
+    logger = logging.getLogger(__name__)
+    app = Flask(__name__)
+
+    def error(message: str, status: int = 400):
+        return jsonify({"error": message}), status
+
+    @app.route("/execute", methods=["POST"])
+    def execute():
+        """Run a task through the queue.
+
+        Body: {"task_name", "params", "priority", "async", "wait"}. With
+        async the task ID is returned at once (202). Otherwise the call
+        waits up to `wait` seconds for the result and falls back to 202
+        with the task ID, so long scans never pin a request thread.
+        """
+        body: Dict[str, Any] = request.get_json(silent=True) or {}
+        task_name = body.get("task_name")
+        if not task_name:
+            return error("task_name is required")
+        try:
+            priority = int(body.get("priority", 0))
+        except (TypeError, ValueError):
+            return error("priority must be an integer")
+
+        queued = manager.submit_task(task_name, body.get("params") or {}, priority=priority)
+        if "error" in queued:
+            return jsonify(queued), 503
+        if body.get("async"):
+            return jsonify(queued), 202
+
+        outcome = manager.task_result(queued["task_id"],
+                                      _wait_seconds(body.get("wait"), DEFAULT_WAIT_SECONDS))
+        if outcome.get("status") in ("pending", "running"):
+            return jsonify(outcome), 202
+        return jsonify(outcome), 200
+
+    @app.route("/tasks/<int:task_id>", methods=["GET"])
+    def task_status(task_id: int):
+        status = manager.task_status(task_id)
+        return jsonify(status), 404 if "error" in status else 200
+
+    @app.route("/tasks/<int:task_id>/result", methods=["GET"])
+    def task_result(task_id: int):
+        outcome = manager.task_result(task_id, _wait_seconds(request.args.get("wait"), 0.0))
+        return jsonify(outcome), 404 if "error" in outcome and "status" not in outcome else 200
+
+    @app.route("/tasks/<int:task_id>", methods=["DELETE"])
+    def cancel_task(task_id: int):
+        return jsonify(manager.cancel_task(task_id))
+
+    @app.route("/health", methods=["GET"])
+    def health():
+        force = request.args.get("force") in ("1", "true")
+        return jsonify(manager.health_check(force))
+
+    @app.route("/cache/stats", methods=["GET"])
+    def cache_stats():
+        return jsonify(manager.cache_stats())
+
+    @app.route("/history", methods=["GET"])
+    def history():
+        args = request.args
+        try:
+            before_id = int(args["before_id"]) if "before_id" in args else None
+            limit = int(args.get("limit", 100))
+        except ValueError:
+            return error("limit and before_id must be integers")
+        if before_id is not None and not 0 < before_id <= MAX_EVENT_ID:
+            return error("before_id must be a positive event id")
+        try:
+            since = _history_time(args.get("since"))
+            until = _history_time(args.get("until"))
+        except ValueError:
+            return error("since and until must be ISO 8601 dates or datetimes")
+        result = manager.get_task_history(limit=limit, before_id=before_id,
+                                          task_name=args.get("task_name"),
+                                          status=args.get("status"),
+                                          since=since, until=until)
+        return jsonify(result), 500 if "error" in result else 200
+
+    @app.route("/scan/stream", methods=["POST"])
+    def scan_stream():
+        """Stream a full scan as NDJSON records while it runs"""
+        body: Dict[str, Any] = request.get_json(silent=True) or {}
+        target = body.get("target")
+        if not target:
+            return error("target is required")
+        logger.info(f"Streaming scan of {target}")
+        records = manager.security_scanner.iter_scan(target, body.get("port_range", "1-1000"),
+                                                     body.get("checks"))
+        return Response(stream_with_context(iter_ndjson(records)),
+                        mimetype="application/x-ndjson")
+
+    return app
+
+
+# Development server; use gunicorn in production
+if __name__ == "__main__":
+    create_app().run(host="0.0.0.0", port=5000, threaded=True)
@@ -0,0 +1,25 @@
+"""
+HEX-CyberSphere State Files
+Atomic JSON persistence of streaming detector and trend state
+"""
+
+import json
+import os
+from typing import Any, Dict
+
+
+def save_state(path: str, state: Dict[str, Any]):
+    """Write state as JSON, replacing the file atomically so readers never see half of it"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def load_state(path: str) -> Dict[str, Any]:
+    """Read state written by save_state"""
+    with open(path, 'r') as f:
+        return json.load(f)
@@ -0,0 +1,374 @@
+"""
+HEX-CyberSphere Task Queue
+Prioritised background execution of automation tasks with status tracking
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+INTERRUPTED = 'interrupted'
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED, INTERRUPTED)
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """Start time of a process (clock ticks since boot), or None if it is not running.
+
+    Paired with the pid it identifies one process even after the pid is reused.
+    Returns '' where /proc is unavailable and only the pid can be checked.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            return f.read().rsplit(')', 1)[1].split()[19]
+    except FileNotFoundError:
+        if os.path.isdir('/proc'):
+            return None
+    except (OSError, IndexError):
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+    return ''
+
+
+def process_owner() -> str:
+    """Owner recorded on the tasks this process runs: host:pid:start"""
+    pid = os.getpid()
+    return f"{socket.gethostname()}:{pid}:{_process_start(pid) or ''}"
+
+
+def owner_alive(owner: str) -> bool:
+    """Whether the process that owns a task may still run it.
+
+    Owners on other hosts cannot be checked and count as alive.
+    """
+    try:
+        host, pid, start = owner.rsplit(':', 2)
+        pid = int(pid)
+    except ValueError:
+        return False
+    if host != socket.gethostname():
+        return True
+    current = _process_start(pid)
+    return current is not None and (not start or not current or current == start)
+
+
+# Without a database, task IDs are pid << LOCAL_ID_BITS | counter, so each
+# server worker hands out its own IDs; Linux pids fit in 22 bits, keeping
+# IDs below 2**53 for JSON clients that read numbers as doubles
+LOCAL_ID_BITS = 31
+
+
+class TaskStore:
+    """Keeps the status column of the tasks table in step with the queue.
+
+    Task IDs are the tasks table's row ids. Finished tasks also store their
+    result there, so any server worker can answer for a task another
+    worker ran. Without a database pool nothing is persisted and IDs come
+    from an in-process counter prefixed with the process id, so workers
+    never hand out the same ID and a lookup in the wrong worker finds
+    nothing rather than another worker's task. The tasks table itself is
+    created by db_pool.init_schema.
+    """
+
+    def __init__(self, pool=None):
+        self.logger = logging.getLogger(__name__)
+        self.pool = pool
+        self._ids = itertools.count(1)
+        if self.pool is not None:
+            try:
+                self.interrupt_orphans()
+            except Exception as e:
+                self.logger.error(f"Failed to prepare tasks table: {e}")
+                self.pool = None
+
+    def interrupt_orphans(self) -> int:
+        """Mark unfinished tasks whose owning process has exited as interrupted.
+
+        Several processes (e.g. gunicorn workers) share the tasks table, so
+        tasks still owned by a live process are left alone. Rows without an
+        owner predate owner tracking and are interrupted.
+        """
+        with self.pool.read() as cursor:
+            owners = [row[0] for row in cursor.execute(
+                "SELECT DISTINCT owner FROM tasks WHERE status IN (?, ?) AND owner IS NOT NULL",
+                (PENDING, RUNNING)).fetchall()]
+        dead = [owner for owner in owners if not owner_alive(owner)]
+        with self.pool.write() as cursor:
+            cursor.execute(f"""
+                UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE status IN (?, ?)
+                    AND (owner IS NULL OR owner IN ({', '.join('?' * len(dead)) or 'NULL'}))
+            """, (INTERRUPTED, PENDING, RUNNING, *dead))
+            interrupted = cursor.rowcount
+        if interrupted > 0:
+            self.logger.warning(f"Marked {interrupted} tasks of exited processes as interrupted")
+        return interrupted
+
+    def create(self, name: str, params: Dict[Any, Any]) -> int:
+        if self.pool is None:
+            return (os.getpid() << LOCAL_ID_BITS) | (next(self._ids) % (1 << LOCAL_ID_BITS))
+        description = json.dumps(params, default=str)[:1000]
+        with self.pool.write() as cursor:
+            cursor.execute(
+                "INSERT INTO tasks (name, description, status, owner) VALUES (?, ?, ?, ?) RETURNING id",
+                (name, description, PENDING, process_owner()))
+            return cursor.fetchone()[0]
+
+    def set_status(self, task_id: int, status: str, result: Any = None):
+        if self.pool is None:
+            return
+        try:
+            with self.pool.write() as cursor:
+                if result is None:
+                    cursor.execute(
+                        "UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                        (status, task_id))
+                else:
+                    cursor.execute(
+                        "UPDATE tasks SET status = ?, result = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                        (status, json.dumps(result, default=str), task_id))
+        except Exception as e:
+            self.logger.error(f"Failed to update status of task {task_id}: {e}")
+
+    def get(self, task_id: int) -> Optional[Dict[str, Any]]:
+        if self.pool is None:
+            return None
+        with self.pool.read() as cursor:
+            row = cursor.execute(
+                "SELECT name, status, created_at, updated_at, result FROM tasks WHERE id = ?",
+                (task_id,)).fetchone()
+        if row is None:
+            return None
+        info = {"task_id": task_id, "name": row[0], "status": row[1],
+                "created_at": row[2], "updated_at": row[3]}
+        if row[4] is not None:
+            result = json.loads(row[4])
+            if row[1] == COMPLETED:
+                info["result"] = result
+            elif isinstance(result, dict) and "error" in result:
+                info["error"] = result["error"]
+        return info
+
+
+class Task:
+    """A queued unit of work and its outcome"""
+
+    def __init__(self, task_id: int, name: str, func: Callable[[], Any],
+                 lane: str, priority: int):
+        self.task_id = task_id
+        self.name = name
+        self.func = func
+        self.lane = lane
+        self.priority = priority
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "name": self.name,
+            "lane": self.lane,
+            "priority": self.priority,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class TaskQueue:
+    """Bounded priority queue served by a fixed pool of worker threads per lane.
+
+    Each lane (e.g. "io" and "cpu") has its own heap and workers, so slow
+    scans never hold back AI work and vice versa. Lower priority numbers
+    run first; equal priorities run in submission order. Pending tasks can
+    be cancelled; running tasks finish, since Python threads cannot be
+    interrupted safely.
+    """
+
+    def __init__(self, lanes: Dict[str, int], store: TaskStore = None,
+                 max_pending: int = 1000, max_results: int = 1000):
+        self.logger = logging.getLogger(__name__)
+        self.store = store or TaskStore()
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self.tasks: "OrderedDict[int, Task]" = OrderedDict()
+        self._heaps = {lane: [] for lane in lanes}
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._workers = [
+            threading.Thread(target=self._work, args=(lane,), name=f"task-{lane}-{index}", daemon=True)
+            for lane, count in lanes.items() for index in range(count)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, name: str, func: Callable[[], Any], params: Dict[Any, Any] = None,
+               lane: str = "io", priority: int = 0) -> int:
+        """Queue func() to run on a lane's workers and return its task ID"""
+        if lane not in self._heaps:
+            raise ValueError(f"Unknown task lane: {lane}")
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("Task queue is shut down")
+            if self._pending >= self.max_pending:
+                raise OverflowError(f"Task queue is full ({self.max_pending} pending tasks)")
+            # Hold the slot while the task row is written outside the lock
+            self._pending += 1
+        try:
+            task_id = self.store.create(name, params or {})
+        except Exception:
+            with self._condition:
+                self._pending -= 1
+            raise
+        task = Task(task_id, name, func, lane, priority)
+        with self._condition:
+            if self._stopped:
+                self._pending -= 1
+                self._mark_cancelled(task)
+            else:
+                self.tasks[task_id] = task
+                heapq.heappush(self._heaps[lane], (priority, next(self._sequence), task))
+                self._trim_results()
+                self._condition.notify_all()
+        if task.status == CANCELLED:
+            self.store.set_status(task_id, CANCELLED)
+            raise RuntimeError("Task queue is shut down")
+        return task_id
+
+    def status(self, task_id: int) -> Optional[Dict[str, Any]]:
+        task = self.tasks.get(task_id)
+        if task is not None:
+            return task.info()
+        # Tasks from earlier runs or already evicted are only known to the store
+        return self.store.get(task_id)
+
+    def result(self, task_id: int, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return status and result, waiting up to timeout seconds for the task to finish"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return self.store.get(task_id)
+        if timeout:
+            task.done.wait(timeout)
+        info = task.info()
+        if task.status == COMPLETED:
+            info["result"] = task.result
+        elif task.error is not None:
+            info["error"] = task.error
+        return info
+
+    def cancel(self, task_id: int) -> bool:
+        """Cancel a pending task; returns False once it has started"""
+        with self._condition:
+            task = self.tasks.get(task_id)
+            if task is None or task.status != PENDING:
+                return False
+            self._pending -= 1
+            self._mark_cancelled(task)
+        self.store.set_status(task_id, CANCELLED)
+        return True
+
+    @staticmethod
+    def _mark_cancelled(task: Task):
+        """Finish a task that never ran; the caller holds the condition lock"""
+        task.status = CANCELLED
+        task.finished_at = time.time()
+        task.func = None
+        task.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            counts: Dict[str, int] = {}
+            for task in self.tasks.values():
+                counts[task.status] = counts.get(task.status, 0) + 1
+            return {"pending": self._pending, "workers": len(self._workers), "tasks": counts}
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting tasks, cancel pending ones and stop the workers"""
+        with self._condition:
+            self._stopped = True
+            # Cancelled under the lock workers take tasks under, so none of these starts
+            cancelled = [task for task in self.tasks.values() if task.status == PENDING]
+            for task in cancelled:
+                self._pending -= 1
+                self._mark_cancelled(task)
+            self._condition.notify_all()
+        for task in cancelled:
+            self.store.set_status(task.task_id, CANCELLED)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _next_task(self, lane: str) -> Optional[Task]:
+        heap = self._heaps[lane]
+        with self._condition:
+            while True:
+                while heap and heap[0][2].status != PENDING:
+                    heapq.heappop(heap)  # cancelled while queued
+                if heap:
+                    task = heapq.heappop(heap)[2]
+                    task.status = RUNNING
+                    task.started_at = time.time()
+                    self._pending -= 1
+                    return task
+                if self._stopped:
+                    return None
+                self._condition.wait()
+
+    def _work(self, lane: str):
+        while True:
+            task = self._next_task(lane)
+            if task is None:
+                return
+            self.store.set_status(task.task_id, RUNNING)
+            try:
+                task.result = task.func()
+                # Task runners report failures as {"error": ...} results
+                failed = isinstance(task.result, dict) and "error" in task.result
+                task.status = FAILED if failed else COMPLETED
+                if failed:
+                    task.error = task.result["error"]
+            except Exception as e:
+                self.logger.error(f"Task {task.task_id} ({task.name}) failed: {e}")
+                task.status = FAILED
+                task.error = str(e)
+            task.finished_at = time.time()
+            task.func = None
+            # Wake local waiters before the result is serialised for other workers
+            task.done.set()
+            outcome = task.result if task.status == COMPLETED else {"error": task.error}
+            self.store.set_status(task.task_id, task.status, outcome)
+
+    def _trim_results(self):
+        """Forget the oldest finished tasks beyond max_results"""
+        excess = len(self.tasks) - self.max_results
+        if excess <= 0:
+            return
+        for task_id in [task_id for task_id, task in self.tasks.items()
+                        if task.status in FINISHED_STATES][:excess]:
+            del self.tasks[task_id]
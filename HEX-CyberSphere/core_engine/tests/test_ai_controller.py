@@ -0,0 +1,103 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from ai_controller import AIFramework
+
+
+@pytest.fixture
+def ai(tmp_path):
+    return AIFramework(state_dir=str(tmp_path / "state"), model_dir=str(tmp_path / "models"))
+
+
+def _reference(data, threshold=2.0):
+    """Per-column pandas thresholds the vectorised detector must match"""
+    df = pd.DataFrame(data).select_dtypes(include=[np.number])
+    found = {}
+    for column in df.columns:
+        limit = df[column].mean() + threshold * df[column].std()
+        hits = df[column][df[column] > limit]
+        if len(hits):
+            found[column] = (limit, hits.index.tolist(), hits.tolist())
+    return found
+
+
+def test_detect_anomalies_matches_per_column_pandas(ai):
+    data = {
+        'metric1': [1, 2, 3, 4, 5, 100],
+        'metric2': [10, 20, 30, 40, 50, 60],
+        'metric3': [5.0, None, 25.0, 35.0, 45.0, 900.0],
+        'host': ['a', 'b', 'c', 'd', 'e', 'f'],
+        'flag': [True, False, True, False, True, False]
+    }
+    result = ai.detect_anomalies(data)
+    expected = _reference(data)
+    assert [a['column'] for a in result['anomalies']] == list(expected)
+    for anomaly in result['anomalies']:
+        limit, indices, values = expected[anomaly['column']]
+        assert anomaly['threshold'] == pytest.approx(limit)
+        assert anomaly['indices'] == indices
+        assert anomaly['values'] == values
+
+
+def test_detect_anomalies_accepts_records_and_robust_thresholds(ai):
+    records = [{'latency': value, 'name': 'x'} for value in [10, 11, 10, 12, 11, 10, 11, 10, 400]]
+    assert ai.detect_anomalies(records)['anomalies'][0]['indices'] == [8]
+
+    # A huge outlier inflates the standard deviation enough to hide a moderate one
+    values = {'latency': [10, 11, 10, 12, 11, 10, 11, 10, 40, 100000]}
+    plain = ai.detect_anomalies(values)['anomalies'][0]['indices']
+    robust = ai.detect_anomalies(values, robust=True)['anomalies'][0]['indices']
+    assert plain == [9]
+    assert robust == [8, 9]
+
+
+def test_detect_anomalies_without_numeric_columns(ai):
+    assert ai.detect_anomalies({'host': ['a', 'b']}) == {'anomalies': []}
+
+
+def _labelled(count):
+    rng = np.random.default_rng(3)
+    records = []
+    for index in range(count):
+        anomalous = index % 4 == 0
+        records.append({'failed_logins': float(rng.integers(20, 40) if anomalous else rng.integers(0, 3)),
+                        'bytes_out': float(rng.normal(5000 if anomalous else 500, 50)),
+                        'host': f'h{index}', 'label': int(anomalous)})
+    return records
+
+
+def test_untrained_model_is_reported(ai):
+    pytest.importorskip("sklearn")
+    assert ai.predict_anomalies([{'failed_logins': 1}]) == {'error': 'Anomaly model has not been trained'}
+
+
+def test_trained_model_is_persisted_and_served_in_batches(ai, tmp_path):
+    pytest.importorskip("sklearn")
+    pytest.importorskip("joblib")
+    trained = ai.train_anomaly_model(_labelled(80), n_estimators=20, n_jobs=1)
+    assert trained['features'] == ['failed_logins', 'bytes_out']
+    assert trained['classes'] == [0, 1]
+
+    # A fresh framework loads the saved model; unknown and missing fields are ignored
+    served = AIFramework(state_dir=str(tmp_path / "state"), model_dir=str(tmp_path / "models"))
+    records = [{'failed_logins': 30.0, 'bytes_out': 5000.0, 'extra': 'x'},
+               {'failed_logins': 0.0, 'bytes_out': 500.0}, {'bytes_out': 480.0}]
+    result = served.predict_anomalies(records, batch_size=2, n_jobs=1)
+    assert result['count'] == 3
+    assert result['predictions'] == [1, 0, 0]
+    assert result['scores'][0] > 0.5 > result['scores'][1]
+
+
+def test_training_needs_labels_and_numeric_features(ai):
+    pytest.importorskip("sklearn")
+    assert 'error' in ai.train_anomaly_model([{'failed_logins': 1}])
+    assert 'error' in ai.train_anomaly_model([{'host': 'a', 'label': 1}])
+
+
+def test_robust_mode_on_a_mostly_constant_column(ai):
+    data = {'retries': [0, 0, 0, 0, 0, 0, 0, 1, 0, 50], 'constant': [3] * 10}
+    anomalies = ai.detect_anomalies(data, robust=True)['anomalies']
+    # MAD is 0 here; only the real outlier is flagged, not every non-zero value
+    assert [(a['column'], a['indices']) for a in anomalies] == [('retries', [9])]
@@ -0,0 +1,66 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from ai_controller import AIFramework
+from column_summary import ColumnarSummary, ColumnSummary
+
+
+def _assert_summary_equal(actual, expected):
+    assert list(actual) == list(expected)
+    for column, stats in expected.items():
+        assert list(actual[column]) == list(stats)
+        for key, value in stats.items():
+            if isinstance(value, float) and math.isnan(value):
+                assert math.isnan(actual[column][key])
+            else:
+                assert actual[column][key] == pytest.approx(value)
+
+
+def test_columnar_path_matches_pandas_describe(tmp_path):
+    rng = np.random.default_rng(1)
+    data = {
+        'latency': rng.normal(50, 5, 1000).tolist(),
+        'bytes': rng.integers(0, 10000, 1000),
+        'sparse': [None if i % 3 else float(i) for i in range(1000)],
+        'host': ['a'] * 1000
+    }
+    ai = AIFramework(state_dir=str(tmp_path))
+    result = ai.process_data(data)
+    expected = pd.DataFrame(data).describe().to_dict()
+
+    assert result['rows'] == 1000
+    assert result['columns'] == list(data)
+    _assert_summary_equal(result['summary'], expected)
+
+
+def test_chunks_and_merged_summaries_equal_one_pass():
+    values = np.arange(100, dtype=np.float64)
+    whole = ColumnarSummary().update({'v': values}).describe()
+    chunks = ColumnarSummary().update_chunks({'v': values[i:i + 7]} for i in range(0, 100, 7))
+    left = ColumnarSummary().update({'v': values[:30]})
+    left.merge(ColumnarSummary().update({'v': values[30:]}))
+
+    _assert_summary_equal(chunks.describe(), whole)
+    _assert_summary_equal(left.describe(), whole)
+    assert chunks.rows == left.rows == 100
+
+
+def test_large_columns_switch_to_an_approximate_sketch():
+    values = np.random.default_rng(2).random(200000)
+    summary = ColumnSummary(exact_limit=10000, sketch_size=512)
+    for start in range(0, len(values), 10000):
+        summary.update(values[start:start + 10000])
+    assert not summary.exact
+    assert summary.count == len(values)
+    assert summary.mean == pytest.approx(values.mean())
+    assert summary.quantiles([0.25, 0.5, 0.75]) == pytest.approx(
+        np.quantile(values, [0.25, 0.5, 0.75]).tolist(), abs=0.02)
+
+
+def test_tables_without_numbers_get_categorical_statistics():
+    result = ColumnarSummary().update({'host': ['a', 'b', 'a', None]}).result()
+    assert result['summary'] == {'host': {'count': 3, 'unique': 2, 'top': 'a', 'freq': 2}}
@@ -0,0 +1,77 @@
+import io
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from csv_stream import CSVStream, infer_type
+from data_parser import DataParser
+
+CSV = "host,port,open,score,note\na,22,true,1.5,ssh\nb,80,false,,\nc,,TRUE,2,\"multi\nline\"\n"
+
+
+def test_infer_type_picks_the_narrowest_type():
+    assert infer_type(["1", "-2"]) == "int"
+    assert infer_type(["1", "2.5"]) == "float"
+    assert infer_type(["True", "false"]) == "bool"
+    assert infer_type(["1", "x"]) == "str"
+    assert infer_type([]) == "str"
+
+
+def test_rows_are_typed_with_missing_values_as_none():
+    with CSVStream(CSV) as stream:
+        assert stream.types == {"host": "str", "port": "int", "open": "bool",
+                                "score": "float", "note": "str"}
+        rows = list(stream.rows())
+    assert rows[0] == ("a", 22, True, 1.5, "ssh")
+    assert rows[1] == ("b", 80, False, None, None)
+    assert rows[2] == ("c", None, True, 2.0, "multi\nline")
+
+
+def test_numpy_batches_are_bounded_and_mark_missing_ints_with_nan():
+    with CSVStream(CSV, sample_rows=1) as stream:
+        batches = list(stream.batches(batch_size=2))
+    assert [len(batch["host"]) for batch in batches] == [1, 2]
+    assert batches[1]["port"].dtype == np.float64
+    assert math.isnan(batches[1]["port"][1])
+    assert batches[1]["note"].tolist() == [None, "multi\nline"]
+
+
+def test_columns_widen_when_a_later_batch_does_not_fit():
+    text = "id,value\n" + "".join(f"{i},{i}\n" for i in range(5)) + "5,n/a\n"
+    with CSVStream(text, sample_rows=5) as stream:
+        assert stream.types["value"] == "int"
+        values = [row[1] for row in stream.rows(batch_size=5)]
+        assert stream.types["value"] == "str"
+    assert values == [0, 1, 2, 3, 4, "n/a"]
+
+
+def test_sources_and_malformed_rows(tmp_path):
+    text = "a,a,\n1,2,3\n\n4,5\n6,7,8,9\n"
+    # Encoded input may start with a byte order mark
+    encoded = ("\ufeff" + text).encode("utf-8")
+    path = tmp_path / "data.csv"
+    path.write_bytes(encoded)
+    binary = io.BytesIO(encoded)
+
+    for source in (text, encoded, path, binary):
+        with CSVStream(source) as stream:
+            assert stream.columns == ["a", "a.1", "column_2"]
+            assert list(stream.rows()) == [(1, 2, 3), (4, 5, None), (6, 7, 8)]
+            assert stream.malformed_rows == 2
+    # A caller's binary file object is left open
+    assert not binary.closed
+
+
+def test_str_sources_are_never_paths(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a\n1\n")
+    with CSVStream(str(path)) as stream:
+        assert stream.columns == [str(path)]
+
+
+def test_data_parser_iter_csv_yields_header_then_rows():
+    parser = DataParser()
+    assert list(parser.iter_csv("x,y\n1,a\n2,b\n")) == [("x", "y"), (1, "a"), (2, "b")]
+    assert parser.parse_csv("\nx,y\n1,a\n") == [{"x": "1", "y": "a"}]
@@ -0,0 +1,96 @@
+import io
+import socket
+
+import pytest
+
+from data_parser import DataParser
+
+NMAP = """<?xml version="1.0"?>
+<nmaprun xmlns="urn:scan">
+  <host addr="10.0.0.1"><ports><port id="22">ssh</port><port id="80">http</port></ports></host>
+  <host addr="10.0.0.2"><ports><port id="443">https</port></ports></host>
+  <stats hosts="2"/>
+</nmaprun>
+"""
+
+
+@pytest.fixture
+def parser():
+    return DataParser()
+
+
+def test_iter_xml_defaults_to_the_roots_children(parser):
+    records = list(parser.iter_xml(NMAP))
+    assert len(records) == 3
+    assert records[0]["@attributes"] == {"addr": "10.0.0.1"}
+    assert records[2] == {"@attributes": {"hosts": "2"}}
+
+
+def test_iter_xml_by_tag_or_path_ignores_namespaces(parser):
+    hosts = list(parser.iter_xml(NMAP.encode("utf-8"), tag="host"))
+    assert [host["@attributes"]["addr"] for host in hosts] == ["10.0.0.1", "10.0.0.2"]
+    # Nested records stay part of the enclosing one
+    assert len(hosts[0]["{urn:scan}ports"]["{urn:scan}port"]) == 2
+
+    ports = list(parser.iter_xml(io.StringIO(NMAP), path="host/ports/port"))
+    assert ports == ["ssh", "http", "https"]
+    assert list(parser.iter_xml(NMAP, path="*/ports")) != []
+    assert list(parser.iter_xml(NMAP, tag="missing")) == []
+
+
+def test_iter_xml_clears_finished_records(parser, tmp_path):
+    path = tmp_path / "scan.xml"
+    path.write_text(NMAP)
+    elements = list(parser.iter_xml(path, tag="host", as_dict=False))
+    assert [element.get("addr") for element in elements] == [None, None]
+    assert all(len(element) == 0 for element in elements)
+
+
+def test_iter_xml_reports_malformed_documents(parser):
+    with pytest.raises(Exception):
+        list(parser.iter_xml("<a><b></a>"))
+    assert "error" in parser.parse_xml("<a><b></a>")
+
+
+def test_iter_ndjson_handles_records_split_across_chunks(parser):
+    text = '{"id": 1}\n\n  \n{"id": 2, "tags": ["a"]}\n{"id": 3}'
+    assert list(parser.iter_ndjson(text)) == [{"id": 1}, {"id": 2, "tags": ["a"]}, {"id": 3}]
+    data = text.encode("utf-8")
+    assert list(parser.iter_ndjson(io.BytesIO(data), chunk_size=4)) == list(parser.iter_ndjson(text))
+    chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+    assert [record["id"] for record in parser.iter_ndjson(iter(chunks))] == [1, 2, 3]
+
+
+def test_iter_ndjson_reports_or_skips_bad_lines(parser):
+    text = '{"id": 1}\nnot json\n{"id": 2}\n'
+    with pytest.raises(ValueError, match="line 2"):
+        list(parser.iter_ndjson(text))
+    assert list(parser.iter_ndjson(text, errors="skip")) == [{"id": 1}, {"id": 2}]
+    with pytest.raises(ValueError, match="line 4"):
+        list(parser.iter_ndjson('{"a": 1}\n{"a": 2}\n' + '{"a": 3}\n{', chunk_size=9))
+
+
+def test_iter_ndjson_reads_sockets_and_paths(parser, tmp_path):
+    path = tmp_path / "events.ndjson"
+    path.write_text('{"n": 1}\n{"n": 2}\n')
+    assert list(parser.iter_ndjson(path)) == [{"n": 1}, {"n": 2}]
+
+    left, right = socket.socketpair()
+    with left, right:
+        left.sendall(b'{"n": 1}\n{"n"')
+        left.sendall(b': 2}\n')
+        left.shutdown(socket.SHUT_WR)
+        assert list(parser.iter_ndjson(right)) == [{"n": 1}, {"n": 2}]
+
+
+def test_convert_stream_never_takes_str_filenames(parser, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "in.csv").write_text("a,b\n1,x\n")
+
+    result = parser.convert_stream("in.csv", "out.json", "csv", "json")
+    assert "error" in result
+    assert not (tmp_path / "out.json").exists()
+
+    result = parser.convert_stream(tmp_path / "in.csv", tmp_path / "out.json", "csv", "json")
+    assert result["records"] == 1
+    assert (tmp_path / "out.json").read_text().startswith('[{"a"')
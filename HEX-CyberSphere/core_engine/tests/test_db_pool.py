@@ -0,0 +1,116 @@
+import json
+import threading
+
+import db_pool
+import migrate
+from db_pool import SCHEMA_PATHS, SCHEMA_VERSION, SQLitePool, format_paramstyle, init_schema, schema_version
+
+
+def test_format_paramstyle_only_rewrites_bare_placeholders():
+    query = "SELECT '?', \"a?\" FROM t WHERE x = ? AND y LIKE 'a%' -- why?\n AND z = ?"
+    assert format_paramstyle(query) == (
+        "SELECT '?', \"a?\" FROM t WHERE x = %s AND y LIKE 'a%%' -- why?\n AND z = %s")
+
+
+def test_init_schema_upgrades_an_old_database(tmp_path):
+    pool = SQLitePool(str(tmp_path / "old.db"))
+    with pool.write() as cursor:
+        cursor.execute("""CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL, source TEXT NOT NULL, data TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)""")
+        cursor.execute("INSERT INTO events (event_type, source, data) VALUES ('boot', 'test', 'x')")
+
+    assert init_schema(pool)
+    assert not init_schema(pool)  # already at SCHEMA_VERSION
+
+    with pool.read() as cursor:
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(events)")}
+        indexes = {row[1] for row in cursor.execute("PRAGMA index_list(events)")}
+        tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        events = cursor.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    assert {"task_name", "status"} <= columns
+    assert {"idx_events_task_name", "idx_events_status"} <= indexes
+    assert {"tasks", "scans", "scan_results", "event_payloads"} <= tables
+    assert events == 1
+    pool.close()
+
+
+def test_write_rolls_back_on_error(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"))
+    init_schema(pool)
+    try:
+        with pool.write() as cursor:
+            cursor.execute("INSERT INTO tasks (name) VALUES (?)", ("doomed",))
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    with pool.read() as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 0
+    pool.close()
+
+
+def test_concurrent_writers_and_readers(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"), readers=2)
+    init_schema(pool)
+    errors = []
+
+    def writer(index):
+        try:
+            for n in range(50):
+                with pool.write() as cursor:
+                    cursor.execute("INSERT INTO tasks (name) VALUES (?)", (f"w{index}-{n}",))
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(50):
+                with pool.read() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM tasks").fetchone()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with pool.read() as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 200
+    pool.close()
+
+
+def test_migrations_run_again_only_for_a_newer_version(tmp_path, monkeypatch):
+    pool = SQLitePool(str(tmp_path / "pool.db"))
+    assert init_schema(pool)
+    with pool.read() as cursor:
+        assert schema_version(cursor) == SCHEMA_VERSION
+
+    monkeypatch.setattr(db_pool, "SCHEMA_VERSION", SCHEMA_VERSION + 1)
+    assert init_schema(pool)
+    with pool.read() as cursor:
+        assert schema_version(cursor) == SCHEMA_VERSION + 1
+    pool.close()
+
+
+def test_migrate_command_uses_the_configured_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrate, "DATABASE_PATH", str(tmp_path / "hex.db"))
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"database": {"type": "sqlite", "readers": 1}}))
+    assert migrate.migrate(str(config))
+    assert not migrate.migrate(str(config))
+
+
+def test_postgres_indexes_are_split_out_of_the_schema_script():
+    with open(SCHEMA_PATHS["postgres"]) as f:
+        script = f.read()
+    indexes = db_pool._CREATE_INDEX.findall(script)
+    names = [name for name, _ in indexes]
+    assert "idx_events_task_history" in names and "idx_scan_results_scan" in names
+    assert len(names) == script.count("CREATE INDEX")
+    # The partial index keeps its WHERE clause
+    assert dict(indexes)["idx_events_task_history"].endswith("'task_error')")
+    assert "CREATE INDEX" not in db_pool._CREATE_INDEX.sub("", script)
@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from online_detector import OnlineAnomalyDetector
+from trend_engine import TrendEngine, rolling_slopes
+
+
+@pytest.mark.parametrize("method", ["welford", "ewma"])
+def test_online_detector_flags_outliers_after_warmup(method):
+    detector = OnlineAnomalyDetector(threshold=3.0, warmup=5, method=method)
+    baseline = [10, 11, 9, 10, 12, 10, 9, 11, 10, 10]
+    assert detector.update({"cpu": baseline})["anomalies"] == []
+    result = detector.update({"cpu": [10.5, 100, None, float("nan")]})
+    assert result["points"] == 2
+    assert [(a["metric"], a["index"], a["value"]) for a in result["anomalies"]] == [("cpu", 1, 100.0)]
+
+
+def test_online_detector_matches_batch_statistics():
+    detector = OnlineAnomalyDetector()
+    values = [3.0, 1.5, 4.0, 1.0, 5.5, 9.0, 2.5]
+    for value in values:
+        detector.update({"m": value})
+    summary = detector.summary()["m"]
+    assert summary["count"] == len(values)
+    assert summary["mean"] == pytest.approx(np.mean(values))
+    assert summary["std"] == pytest.approx(np.std(values, ddof=1))
+
+
+def test_online_detector_state_survives_a_restart(tmp_path):
+    detector = OnlineAnomalyDetector(warmup=3, method="ewma")
+    detector.update({"a": [1, 2, 3, 4], "b": [5]})
+    path = str(tmp_path / "state" / "detector.json")
+    detector.save(path)
+    restored = OnlineAnomalyDetector.load(path)
+    assert restored.to_dict() == detector.to_dict()
+    assert restored.update({"a": [50]}) == detector.update({"a": [50]})
+
+
+def test_rolling_slopes_match_polyfit_and_skip_gaps():
+    matrix = np.array([[1.0, 3.0, 2.0, 5.0, 4.0, 7.0],
+                       [2.0, np.nan, 6.0, 8.0, np.nan, np.nan]])
+    slopes, _ = rolling_slopes(matrix, 3)
+    for start in range(4):
+        expected = np.polyfit(np.arange(3), matrix[0, start:start + 3], 1)[0]
+        assert slopes[0, start] == pytest.approx(expected)
+    assert slopes[1, 0] == pytest.approx(2.0)  # fitted on the two points present
+    assert math.isnan(slopes[1, 3])  # one point only
+
+
+def test_trend_engine_reports_direction_and_forecast():
+    report = TrendEngine(window=4, horizon=2).trends(
+        ["up", "down"], [[1, 2, 3, 4, 5], [5, 4, 3, 2, 1]])
+    assert report["up"]["trend"] == "increasing" and report["up"]["forecast"] == pytest.approx(7)
+    assert report["down"]["trend"] == "decreasing" and report["down"]["change"] == -4
+
+
+def test_incremental_trends_survive_a_restart(tmp_path):
+    engine = TrendEngine(window=3)
+    engine.append({"a": [1, 2], "b": [4, 3]})
+    path = str(tmp_path / "trends.json")
+    engine.save(path)
+    restored = TrendEngine.load(path)
+    assert restored.append({"a": [3]}) == engine.append({"a": [3]})
+    # b got no new points, so its last window holds too few to fit
+    assert restored.append({"a": [4]})["b"]["trend"] is None
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from db_pool import SQLitePool, init_schema
+from event_writer import EventWriter
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / "events.db"))
+    init_schema(pool)
+    yield pool
+    pool.close()
+
+
+def _events(pool):
+    with pool.read() as cursor:
+        return cursor.execute("SELECT event_type, data, task_name, status FROM events ORDER BY id").fetchall()
+
+
+def test_flush_commits_queued_events_in_order(pool):
+    writer = EventWriter(pool, batch_size=3)
+    for index in range(10):
+        writer.write("task_result", "test", f"event {index}", task_name="t", status="completed")
+    assert writer.flush()
+    rows = _events(pool)
+    assert [row[1] for row in rows] == [f"event {index}" for index in range(10)]
+    assert writer.written == 10
+    writer.close()
+
+
+def test_payload_is_serialised_when_queued(pool):
+    writer = EventWriter(pool)
+    payload = {"open_ports": [22]}
+    writer.write("task_result", "test", "scan", payload=payload)
+    payload["open_ports"].append(80)
+    writer.close()
+    assert _events(pool)[0][1] == 'scan: {"open_ports":[22]}'
+    assert not writer.write("late", "test", "ignored")
+
+
+def test_large_data_is_stored_by_reference(pool):
+    writer = EventWriter(pool, max_data=100)
+    data = "x" * 1000
+    writer.write("task_result", "test", data)
+    writer.write("task_result", "test", data)
+    writer.flush()
+    refs = [json.loads(row[1]) for row in _events(pool)]
+    assert refs[0]["ref"] == refs[1]["ref"] and refs[0]["size"] == 1000
+    assert writer.payload(refs[0]["ref"]) == data
+    with pool.read() as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM event_payloads").fetchone()[0] == 1
+    writer.close()
+
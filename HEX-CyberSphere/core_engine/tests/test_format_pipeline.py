@@ -0,0 +1,88 @@
+import io
+import json
+import os
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+import format_pipeline
+from data_parser import DataParser
+from format_pipeline import RecordReader, RecordWriter, convert
+
+# Fields that only settle after the first batch: `user` is null at first,
+# `latency` starts as ints and turns out to hold floats, `tags` appears late
+LOG_RECORDS = [
+    {"id": 1, "user": None, "latency": 10},
+    {"id": 2, "user": None, "latency": 12},
+    {"id": 3, "user": None, "latency": 9},
+    {"id": 4, "user": "alice", "latency": 10.5},
+    {"id": 5, "user": "bob", "latency": 11, "tags": ["a", "b"]},
+    {"id": 6, "user": None, "latency": 7.25},
+]
+
+
+def _ndjson(records) -> str:
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def test_parquet_schema_settles_after_first_batch(tmp_path):
+    sink = io.BytesIO()
+    result = DataParser().convert_stream(io.StringIO(_ndjson(LOG_RECORDS)), sink, 'ndjson', 'parquet',
+                                         batch_size=3, writer_options={'spill_dir': str(tmp_path)})
+    assert result["records"] == 6, result
+
+    table = pq.read_table(io.BytesIO(sink.getvalue()))
+    assert table.schema.field("user").type == pa.string()
+    assert table.schema.field("latency").type == pa.float64()
+    assert table.column("user").to_pylist() == [None, None, None, "alice", "bob", None]
+    assert table.column("latency").to_pylist() == [10, 12, 9, 10.5, 11, 7.25]
+    assert table.column("tags").to_pylist() == [None, None, None, None, ["a", "b"], None]
+    assert os.listdir(tmp_path) == []
+
+
+def test_arrow_from_csv_with_widening_column():
+    csv_text = "port,score\n22,1\n80,2\n443,2.5\n8080,high\n"
+    sink = io.BytesIO()
+    result = convert(io.StringIO(csv_text), sink, 'csv', 'arrow', batch_size=2,
+                     reader_options={'infer_types': True, 'sample_rows': 2})
+    assert result["records"] == 4
+
+    table = pa.ipc.open_stream(sink.getvalue()).read_all()
+    assert table.column("port").to_pylist() == [22, 80, 443, 8080]
+    assert table.schema.field("score").type == pa.string()
+    assert table.column("score").to_pylist() == ["1", "2", "2.5", "high"]
+
+
+def test_empty_input_writes_no_parquet_file():
+    sink = io.BytesIO()
+    assert convert(io.StringIO(""), sink, 'ndjson', 'parquet')["records"] == 0
+    assert sink.getvalue() == b""
+
+
+def test_reader_and_writer_bases_are_abstract():
+    with pytest.raises(TypeError):
+        RecordReader("")
+    with pytest.raises(TypeError):
+        RecordWriter(io.StringIO())
+    with pytest.raises(TypeError):
+        format_pipeline.NDJSONReader("").arrow_batches(10)
+
+
+def test_pathlike_sinks_are_written(tmp_path):
+    path = tmp_path / "out.json"
+    stats = convert("a,b\n1,x\n2,y\n", path, "csv", "json")
+    assert stats["records"] == 2
+    with open(path) as f:
+        assert json.load(f) == [{"a": "1", "b": "x"}, {"a": "2", "b": "y"}]
+
+
+def test_fixed_schema_warns_about_dropped_fields(tmp_path, caplog):
+    sink = io.BytesIO()
+    with caplog.at_level("WARNING", logger="format_pipeline"):
+        convert(_ndjson([{"a": 1}, {"a": 2, "b": 3}]), sink, "ndjson", "arrow", batch_size=1,
+                writer_options={"unify_schema": False})
+    table = pa.ipc.open_stream(sink.getvalue()).read_all()
+    assert table.column_names == ["a"]
+    assert "['b']" in caplog.text
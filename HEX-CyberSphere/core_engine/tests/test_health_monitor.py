@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+import automation_manager
+from health_monitor import HealthMonitor
+
+CORE_ENGINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubService:
+    """Local /health endpoint answering `status` after `delay` seconds"""
+
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.hits = 0
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                service.hits += 1
+                time.sleep(delay)
+                self.send_response(status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def config(self):
+        return {"enabled": True, "host": "127.0.0.1", "port": self.server.server_address[1]}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(status=200, delay=0.0):
+        created.append(StubService(status, delay))
+        return created[-1]
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def test_checks_run_concurrently_and_report_status(stubs):
+    services = {"api": stubs(delay=0.3).config, "worker": stubs(delay=0.3).config,
+                "broken": stubs(status=503).config, "off": {"enabled": False}}
+    monitor = HealthMonitor(services, deadline=2.0)
+    try:
+        started = time.perf_counter()
+        report = monitor.check()
+        assert time.perf_counter() - started < 0.55
+    finally:
+        monitor.stop()
+
+    assert set(report["components"]) == {"api", "worker", "broken"}
+    assert report["components"]["api"]["status"] == "healthy"
+    assert report["components"]["broken"]["status"] == "unhealthy"
+    assert report["status"] == "degraded"
+    assert report["components"]["api"]["latency"]["samples"] == 1
+
+
+def test_slow_component_is_cut_off_at_the_deadline(stubs):
+    monitor = HealthMonitor({"fast": stubs().config, "slow": stubs(delay=2.0).config},
+                            timeout=5.0, deadline=0.3)
+    try:
+        started = time.perf_counter()
+        report = monitor.check()
+        assert time.perf_counter() - started < 1.0
+    finally:
+        monitor.stop()
+
+    assert report["components"]["fast"]["status"] == "healthy"
+    assert "deadline" in report["components"]["slow"]["error"]
+    assert monitor.latency_history("slow")[0]["response_time"] is None
+
+
+def test_reports_are_cached_for_ttl_and_returned_as_copies(stubs):
+    stub = stubs()
+    monitor = HealthMonitor({"api": stub.config}, ttl=60)
+    try:
+        first = monitor.check()
+        first["components"]["api"]["status"] = "mutated"
+        second = monitor.check()
+        assert stub.hits == 1
+        assert second["components"]["api"]["status"] == "healthy"
+        assert second["cache_age"] >= 0
+
+        monitor.check(force=True)
+        assert stub.hits == 2
+    finally:
+        monitor.stop()
+
+
+def test_concurrent_polls_of_an_expired_report_run_the_checks_once(stubs):
+    stub = stubs(delay=0.2)
+    monitor = HealthMonitor({"api": stub.config}, ttl=60)
+    try:
+        threads = [threading.Thread(target=monitor.check) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert stub.hits == 1
+    finally:
+        monitor.stop()
+
+
+def test_custom_check_exceptions_are_unhealthy():
+    def failing():
+        raise RuntimeError("database unreachable")
+
+    monitor = HealthMonitor({}, checks={"db": failing, "cache": lambda: {"status": "healthy"}})
+    try:
+        report = monitor.run_checks()
+    finally:
+        monitor.stop()
+    assert report["components"]["db"] == {
+        "status": "unhealthy", "error": "database unreachable",
+        "response_time": report["components"]["db"]["response_time"], "latency": {"samples": 0}}
+    assert report["components"]["cache"]["status"] == "healthy"
+
+
+def test_monitor_from_the_shipped_config_does_not_check_itself(tmp_path, monkeypatch):
+    config = os.path.join(CORE_ENGINE, "..", "config", "config.json")
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "engine").mkdir()
+    monkeypatch.chdir(tmp_path / "engine")
+    monkeypatch.setattr(automation_manager, "DATABASE_PATH", str(tmp_path / "hex.db"))
+    manager = automation_manager.AutomationManager(config)
+    try:
+        assert automation_manager.SELF_SERVICE in manager.config["services"]
+        assert automation_manager.SELF_SERVICE not in manager.health_monitor.checks
+        assert "java_api" in manager.health_monitor.checks
+    finally:
+        manager.shutdown()
+
+
+def test_excluded_services_are_not_checked(stubs):
+    monitor = HealthMonitor({"self": stubs().config, "api": stubs().config}, exclude=("self",))
+    try:
+        assert set(monitor.check()["components"]) == {"api"}
+    finally:
+        monitor.stop()
@@ -0,0 +1,79 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+import http_client
+from http_client import HTTPClient
+
+
+@pytest.fixture
+def server():
+    """Local HTTP/1.1 server answering with the queued statuses, then 200"""
+    state = {"connections": 0, "requests": 0, "statuses": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            state["connections"] += 1
+
+        def do_GET(self):
+            state["requests"] += 1
+            status = state["statuses"].pop(0) if state["statuses"] else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_requests_reuse_one_keep_alive_connection(server):
+    client = HTTPClient()
+    try:
+        for _ in range(5):
+            assert client.get(server["url"]).status_code == 200
+    finally:
+        client.close()
+    assert server["requests"] == 5
+    assert server["connections"] == 1
+
+
+def test_transient_errors_are_retried_except_for_probes(server):
+    client = HTTPClient(retries=2, backoff_factor=0)
+    try:
+        server["statuses"] = [503, 503]
+        assert client.get(server["url"]).status_code == 200
+        assert server["requests"] == 3
+
+        server["statuses"] = [503]
+        assert client.get(server["url"], retry=False).status_code == 503
+        assert server["requests"] == 4
+    finally:
+        client.close()
+
+
+def test_configure_replaces_the_shared_client(monkeypatch):
+    monkeypatch.setattr(http_client, "_settings", dict(http_client.DEFAULT_SETTINGS))
+    monkeypatch.setattr(http_client, "_client", None)
+    first = http_client.get_client()
+    assert http_client.get_client() is first
+
+    http_client.configure({"read_timeout": 7, "unknown": 1})
+    second = http_client.get_client()
+    assert second is not first
+    assert second.timeout == (http_client.DEFAULT_SETTINGS["connect_timeout"], 7)
+    second.close()
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+import json_codec
+
+
+@pytest.fixture(autouse=True)
+def automatic_backend():
+    yield
+    json_codec.set_backend(None)
+
+
+@pytest.mark.parametrize("name", json_codec.available_backends())
+def test_backends_agree(name):
+    codec = json_codec.get_codec(name)
+    record = {"id": 1, "tags": ["a", "é"], "nested": {"x": 1.5, "none": None}}
+    assert codec.loads(codec.dumpb(record)) == record
+    assert json.loads(codec.dumps(record)) == record
+    assert codec.loads("NaN") != codec.loads("NaN")  # only json accepts NaN literals
+    assert codec.loads_lines(b'{"a": 1}\n  \n{"a": 2}\n') == [{"a": 1}, {"a": 2}]
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads("{not json")
+
+
+def test_set_backend_selects_the_default():
+    assert json_codec.set_backend("json").name == "json"
+    assert json_codec.get_codec().name == "json"
+    assert json_codec.dumps({"a": 1}) == '{"a":1}'
+    assert json_codec.set_backend(None) is None
+    assert json_codec.get_codec().name == json_codec.available_backends()[0]
+    with pytest.raises(KeyError):
+        json_codec.set_backend("yaml")
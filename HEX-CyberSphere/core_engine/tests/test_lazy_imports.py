@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from lazy_imports import lazy_import, load
+
+CORE_ENGINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_core_engine_starts_without_heavy_libraries():
+    # A fresh interpreter: this test process may have imported them already
+    code = ("import sys, automation_manager, ai_controller, data_parser, security_scanner\n"
+            "from lazy_imports import loaded_heavy_modules\n"
+            "print(loaded_heavy_modules() + [m for m in ('numpy',) if m in sys.modules])")
+    output = subprocess.run([sys.executable, "-c", code], cwd=CORE_ENGINE,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+
+def test_lazy_module_imports_on_first_use():
+    json_module = lazy_import("json")
+    assert json_module.__dict__["_module"] is None
+    assert json_module.loads("[1]") == [1]
+    assert load(json_module, os) == [sys.modules["json"], os]
+
+
+def test_missing_modules_fail_when_used_not_when_declared():
+    missing = lazy_import("hex_cybersphere_no_such_module")
+    with pytest.raises(ImportError):
+        missing.anything
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from payload_schemas import SCHEMAS, SchemaError, get_schema, register_schema
+
+BACKENDS = ["generated", "msgspec"]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    if request.param == "msgspec":
+        pytest.importorskip("msgspec")
+    return request.param
+
+
+@pytest.fixture
+def schemas(backend):
+    registered = []
+
+    def register(name, fields):
+        registered.append(name)
+        return register_schema(name, fields, backend=backend)
+
+    yield register
+    for name in registered:
+        SCHEMAS.pop(name, None)
+
+
+def test_nested_and_optional_fields(schemas):
+    schemas("t_port", {"port": "int", "service": "str?"})
+    host = schemas("t_host", {"target": "str", "ports": "list[t_port]",
+                              "scores": "dict[float]?", "note": "str?"})
+
+    record = host.decode(json.dumps({"target": "10.0.0.1", "extra": True,
+                                     "ports": [{"port": 22, "service": "ssh"}, {"port": 80}],
+                                     "scores": {"cpu": 1, "mem": 0.5}}))
+    assert record.target == "10.0.0.1"
+    assert [port.port for port in record.ports] == [22, 80]
+    assert record.ports[1].service is None
+    assert record.note is None
+    assert host.to_builtins(record)["scores"] == {"cpu": 1.0, "mem": 0.5}
+    assert isinstance(record.scores["cpu"], float)
+
+
+def test_arrays_decode_to_lists(schemas):
+    point = schemas("t_point", {"x": "int", "y": "int"})
+    assert [p.x for p in point.decode(b'[{"x": 1, "y": 2}, {"x": 3, "y": 4}]')] == [1, 3]
+    assert [p.y for p in point.convert([{"x": 1, "y": 2}])] == [2]
+    assert point.loads('{"x": 5, "y": 6}').x == 5
+
+
+@pytest.mark.parametrize("payload, path", [
+    ({"target": "a"}, "ports"),
+    ({"target": 1, "ports": []}, "$.target"),
+    ({"target": "a", "ports": [{"port": "22"}]}, "$.ports[0].port"),
+    ({"target": "a", "ports": {}}, "$.ports"),
+])
+def test_mismatches_raise_schema_error_with_path(schemas, payload, path):
+    schemas("t_port", {"port": "int", "service": "str?"})
+    host = schemas("t_host", {"target": "str", "ports": "list[t_port]"})
+    with pytest.raises(SchemaError) as excinfo:
+        host.convert(payload)
+    assert path in str(excinfo.value)
+    assert str(excinfo.value).startswith("t_host")
+
+
+def test_keyword_field_names(schemas):
+    hop = schemas("t_hop", {"from": "str", "class": "int?"})
+    record = hop.decode('{"from": "gw", "class": 3}')
+    assert getattr(record, "from") == "gw"
+    assert getattr(record, "class") == 3
+    assert hop.to_builtins(record) == {"from": "gw", "class": 3}
+
+
+def test_invalid_schemas_are_rejected():
+    with pytest.raises(SchemaError):
+        register_schema("t_bad", {"x": "complex"}, backend="generated")
+    with pytest.raises(SchemaError):
+        register_schema("t_bad", {"not a name": "int"}, backend="generated")
+    with pytest.raises(SchemaError):
+        register_schema("t bad", {"x": "int"}, backend="generated")
+    with pytest.raises(SchemaError):
+        register_schema("t_bad", {"x": "int"}, backend="nope")
+    with pytest.raises(SchemaError):
+        get_schema("t_missing")
+    assert "t_bad" not in SCHEMAS
+
+
+def test_builtin_scan_result_schema():
+    result = get_schema("scan_result").decode(
+        '{"target": "10.0.0.1", "scan_type": "port_scan", "open_ports": [{"port": 22}]}')
+    assert result.open_ports[0].port == 22
@@ -0,0 +1,84 @@
+import pickle
+import threading
+import time
+
+from result_cache import ResultCache, cache_key
+
+
+def test_cache_key_ignores_parameter_order_and_rejects_unstable_values():
+    assert cache_key("t", {"a": 1, "b": [1, 2]}) == cache_key("t", {"b": [1, 2], "a": 1})
+    assert cache_key("t", {"a": 1}) != cache_key("u", {"a": 1})
+    assert cache_key("t", {"gen": (x for x in [])}) is None
+
+
+def test_hits_are_copies_and_errors_are_not_stored():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"ports": [22]}
+
+    result, cached = cache.get_or_compute("scan", {"target": "a"}, 60, compute)
+    assert not cached
+    hit, cached = cache.get_or_compute("scan", {"target": "a"}, 60, compute)
+    assert cached and hit == {"ports": [22]}
+    hit["ports"].append(80)
+    assert cache.get_or_compute("scan", {"target": "a"}, 60, compute)[0] == {"ports": [22]}
+    assert len(calls) == 1
+
+    cache.get_or_compute("scan", {"target": "b"}, 60, lambda: {"error": "down"})
+    assert not cache.get_or_compute("scan", {"target": "b"}, 60, compute)[1]
+
+
+def test_entries_expire_and_lru_is_bounded():
+    cache = ResultCache(max_entries=2)
+    cache.put("k1", "t", 1, ttl=60)
+    cache.put("k2", "t", 2, ttl=60)
+    assert cache.get("k1") == 1
+    cache.put("k3", "t", 3, ttl=60)
+    assert cache.get("k2") is None  # least recently used
+    cache.put("short", "t", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    calls = []
+    gate = threading.Event()
+
+    def compute():
+        calls.append(1)
+        gate.wait(5)
+        return {"value": 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        cache.get_or_compute("t", {"p": 1}, 60, compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result == {"value": 1} for result, _ in results)
+
+
+def test_disk_tier_is_shared_and_never_unpickled(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer, reader = ResultCache(disk_path=path), ResultCache(disk_path=path)
+    writer.put("k", "scan", {"ports": [22]}, ttl=60)
+    assert reader.get("k") == {"ports": [22]}
+    assert reader.stats()["disk_hits"] == 1
+
+    class Exploit:
+        def __reduce__(self):
+            return (exec, ("raise SystemExit('unpickled')",))
+
+    with writer.disk.write() as cursor:
+        cursor.execute("UPDATE result_cache SET value = ? WHERE key = 'k'", (pickle.dumps(Exploit()),))
+    assert ResultCache(disk_path=path).get("k") is None
+    writer.close()
+    reader.close()
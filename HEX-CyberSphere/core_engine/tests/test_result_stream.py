@@ -0,0 +1,68 @@
+import asyncio
+import io
+import json
+import time
+
+import pytest
+
+from result_stream import iterate_async, write_ndjson
+
+
+def test_iterate_async_yields_every_item_in_order():
+    async def source():
+        for i in range(50):
+            yield i
+            await asyncio.sleep(0)
+
+    assert list(iterate_async(source, maxsize=4)) == list(range(50))
+
+
+def test_iterate_async_reraises_producer_errors():
+    async def source():
+        yield 1
+        raise ValueError("boom")
+
+    stream = iterate_async(source)
+    assert next(stream) == 1
+    with pytest.raises(ValueError):
+        next(stream)
+
+
+def test_closing_early_cancels_a_slow_source():
+    finished = []
+
+    async def source():
+        try:
+            yield "first"
+            await asyncio.sleep(5)
+            yield "second"
+        finally:
+            finished.append(True)
+
+    stream = iterate_async(source)
+    assert next(stream) == "first"
+    started = time.monotonic()
+    stream.close()
+    assert time.monotonic() - started < 1
+    assert finished == [True]
+
+
+def test_closing_early_stops_a_fast_source():
+    produced = []
+
+    async def source():
+        for i in range(100000):
+            produced.append(i)
+            yield i
+            await asyncio.sleep(0)
+
+    stream = iterate_async(source, maxsize=10)
+    assert next(stream) == 0
+    stream.close()
+    assert len(produced) < 100000
+
+
+def test_write_ndjson_writes_one_line_per_record():
+    out = io.StringIO()
+    assert write_ndjson([{"port": 22}, {"port": 80}], out) == 2
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [{"port": 22}, {"port": 80}]
@@ -0,0 +1,131 @@
+import socket
+
+import pytest
+
+import scan_engine
+from scan_engine import MAX_NETWORK_HOSTS, expand_targets, parse_port_range
+from security_scanner import SecurityScanner
+
+# Loopback answers on the whole of 127.0.0.0/8 on Linux, so a fleet of
+# hosts is a set of listeners bound to different loopback addresses
+FLEET = "127.0.0.0/29"
+LISTENING = ["127.0.0.1", "127.0.0.3", "127.0.0.6"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def fleet():
+    port = _free_port()
+    listeners = []
+    try:
+        for host in LISTENING:
+            sock = socket.socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.bind((host, port))
+            except OSError:
+                sock.close()
+                pytest.skip("loopback addresses beyond 127.0.0.1 are not routable here")
+            sock.listen(16)
+            listeners.append(sock)
+        yield port
+    finally:
+        for sock in listeners:
+            sock.close()
+
+
+def test_expand_targets_is_lazy_and_deduplicated():
+    hosts = expand_targets(["10.0.0.0/30", "10.0.0.1", "example.internal", "10.0.0.0/29",
+                            "example.internal"])
+    assert not isinstance(hosts, list)
+    assert list(hosts) == ["10.0.0.1", "10.0.0.2", "example.internal",
+                           "10.0.0.3", "10.0.0.4", "10.0.0.5", "10.0.0.6"]
+
+
+def test_expand_targets_rejects_oversized_networks():
+    with pytest.raises(ValueError):
+        expand_targets("10.0.0.0/8")
+    assert sum(1 for _ in expand_targets("10.1.0.0/16")) == MAX_NETWORK_HOSTS - 2
+
+
+def test_sweep_finds_listeners_across_host_blocks(fleet, monkeypatch):
+    # Several blocks, so hosts are taken from the iterator in more than one go
+    monkeypatch.setattr(scan_engine, "SWEEP_BLOCK_HOSTS", 2)
+    closed_port = _free_port()
+    progress = []
+
+    result = SecurityScanner(concurrency=16).sweep(
+        FLEET, f"{fleet},{closed_port}", on_progress=progress.append)
+
+    assert "error" not in result
+    assert sorted(result["hosts"]) == [f"127.0.0.{index}" for index in range(1, 7)]
+    for host, host_result in result["hosts"].items():
+        expected = [fleet] if host in LISTENING else []
+        assert [entry["port"] for entry in host_result["open_ports"]] == expected
+    assert result["total_scanned"] == 12
+    assert progress[-1] == {"completed": 12, "total": 12, "open_found": 3}
+
+
+def test_timeout_trackers_are_bounded(monkeypatch):
+    monkeypatch.setattr(scan_engine, "MAX_TIMEOUT_TRACKERS", 3)
+    engine = scan_engine.PortScanEngine()
+    first = engine.timeout_for("10.0.0.1")
+    for index in range(2, 5):
+        engine.timeout_for(f"10.0.0.{index}")
+        # Recently used trackers survive eviction
+        assert engine.timeout_for("10.0.0.1") is first
+    assert len(engine.timeouts) == 3
+    assert "10.0.0.2" not in engine.timeouts
+
+
+def test_parse_port_range_expands_lists_and_ranges():
+    assert parse_port_range("22, 80,8000-8002,80") == [22, 80, 8000, 8001, 8002]
+    for bad in ("0-10", "10-5", "65536"):
+        with pytest.raises(ValueError):
+            parse_port_range(bad)
+
+
+def test_scan_ports_reports_listeners_as_they_are_found():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    open_port = listener.getsockname()[1]
+    closed_port = _free_port()
+    found = []
+    try:
+        result = SecurityScanner(concurrency=8).scan_ports(
+            "127.0.0.1", f"{closed_port},{open_port}", on_open=found.append)
+    finally:
+        listener.close()
+
+    assert result["total_scanned"] == 2
+    assert [entry["port"] for entry in result["open_ports"]] == [open_port]
+    assert found == result["open_ports"]
+    assert "error" in SecurityScanner().scan_ports("127.0.0.1", "70000")
+
+
+def test_session_reuses_port_scan_probes():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    open_port = listener.getsockname()[1]
+    closed_port = _free_port()
+    scanner = SecurityScanner(concurrency=8)
+    session = scanner.new_session("127.0.0.1")
+    try:
+        scanner.scan_ports("127.0.0.1", f"{open_port},{closed_port}", session=session)
+        assert session.connections == 2
+        assert session.port_status(open_port) == "open"
+
+        # Cached outcomes are not probed again, and closed ports are never dialled
+        assert session.probe_ports([open_port, closed_port]) == {
+            open_port: "open", closed_port: session.port_status(closed_port)}
+        assert session.banner(closed_port) is None
+        assert session.connections == 2
+    finally:
+        listener.close()
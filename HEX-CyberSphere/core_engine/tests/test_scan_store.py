@@ -0,0 +1,79 @@
+import pytest
+
+from db_pool import SQLitePool, init_schema
+from scan_store import ScanResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    pool = SQLitePool(str(tmp_path / "scans.db"))
+    init_schema(pool)
+    yield ScanResultStore(pool)
+    pool.close()
+
+
+def _port_scan(*ports, service="ssh"):
+    return {"target": "10.0.0.1", "scan_type": "port_scan",
+            "open_ports": [{"port": port, "service": service, "status": "open"} for port in ports]}
+
+
+def test_first_scan_reports_everything_as_new(store):
+    scan_id = store.record_scan(_port_scan(22, 80))
+    delta = store.diff("10.0.0.1", scan_id)
+    assert delta["previous_scan_id"] is None
+    assert [finding["port"] for finding in delta["new"]] == [22, 80]
+    assert delta["resolved"] == [] and delta["unchanged"] == 0
+
+
+def test_diff_against_previous_scan_of_the_same_type(store):
+    first = store.record_scan(_port_scan(22, 80))
+    store.record_scan({"target": "10.0.0.1", "scan_type": "vulnerability_scan",
+                       "vulnerabilities": [{"type": "weak_tls_protocol", "port": 443, "risk": "high"}]})
+    second = store.record_scan(_port_scan(22, 443))
+
+    delta = store.diff("10.0.0.1", second)
+    assert delta["previous_scan_id"] == first
+    assert [finding["port"] for finding in delta["new"]] == [443]
+    assert [finding["port"] for finding in delta["resolved"]] == [80]
+    assert delta["unchanged"] == 1
+
+
+def test_changed_findings_carry_the_previous_detail(store):
+    store.record_scan(_port_scan(22, service="ssh"))
+    store.record_scan(_port_scan(22, service="openssh"))
+    delta = store.diff("10.0.0.1")
+    assert delta["changed"][0]["detail"]["service"] == "openssh"
+    assert delta["changed"][0]["previous"]["service"] == "ssh"
+
+
+def _ciphers(*names):
+    return {"target": "10.0.0.1", "scan_type": "vulnerability_scan",
+            "vulnerabilities": [{"check": "weak_cipher", "port": 443, "risk": "medium", "cipher": name}
+                                for name in names]}
+
+
+def test_several_findings_of_one_check_are_stored_and_diffed_apart(store):
+    store.record_scan(_ciphers("RC4", "DES", "DES"))
+    delta = store.diff("10.0.0.1")
+    assert sorted(finding["detail"]["cipher"] for finding in delta["new"]) == ["DES", "RC4"]
+    assert all(finding["check"].startswith("weak_cipher#") for finding in delta["new"])
+
+    store.record_scan(_ciphers("DES", "3DES"))
+    delta = store.diff("10.0.0.1")
+    assert [finding["detail"]["cipher"] for finding in delta["new"]] == ["3DES"]
+    assert [finding["detail"]["cipher"] for finding in delta["resolved"]] == ["RC4"]
+    assert delta["changed"] == [] and delta["unchanged"] == 1
+
+
+def test_sweeps_store_only_hosts_with_ports_or_history(store):
+    def sweep(open_hosts):
+        hosts = {f"10.0.1.{index}": {"open_ports": []} for index in range(1, 100)}
+        for host in open_hosts:
+            hosts[host] = {"open_ports": [{"port": 22, "service": "ssh", "status": "open"}]}
+        return {"scan_type": "sweep", "hosts": hosts}
+
+    assert list(store.record_sweep(sweep(["10.0.1.5"]))) == ["10.0.1.5"]
+    # A host whose ports closed is stored again so the diff reports them resolved
+    scan_ids = store.record_sweep(sweep(["10.0.1.7"]))
+    assert sorted(scan_ids) == ["10.0.1.5", "10.0.1.7"]
+    assert [finding["port"] for finding in store.diff("10.0.1.5")["resolved"]] == [22]
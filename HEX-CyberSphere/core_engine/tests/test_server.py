@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("flask")
+
+import server
+
+
+class FakeManager:
+    def __init__(self, config_path):
+        self.submitted = []
+
+    def submit_task(self, task_name, params, priority=0):
+        self.submitted.append((task_name, params, priority))
+        return {"task_id": len(self.submitted), "status": "pending", "lane": "io"}
+
+    def get_task_history(self, **query):
+        self.history_query = query
+        return {"history": [], "next_cursor": None}
+
+    def task_result(self, task_id, timeout=None):
+        return {"task_id": task_id, "status": "completed", "result": {"ok": True}}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "AutomationManager", FakeManager)
+    return server.create_app().test_client()
+
+
+def test_execute_returns_the_result(client):
+    response = client.post("/execute", json={"task_name": "data_parse", "priority": "3"})
+    assert response.status_code == 200
+    assert response.get_json()["result"] == {"ok": True}
+    assert server.get_manager().submitted == [("data_parse", {}, 3)]
+
+
+def test_async_execute_returns_the_task_id(client):
+    response = client.post("/execute", json={"task_name": "data_parse", "async": True})
+    assert response.status_code == 202
+    assert response.get_json()["task_id"] == 1
+
+
+@pytest.mark.parametrize("body", [{}, {"task_name": "data_parse", "priority": "high"},
+                                  {"task_name": "data_parse", "priority": [1]}])
+def test_bad_input_is_rejected(client, body):
+    response = client.post("/execute", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert server.get_manager().submitted == []
+
+
+@pytest.mark.parametrize("query", ["since=yesterday", "until=2024-13-01", "before_id=abc",
+                                   "before_id=0", f"before_id={2 ** 64}", "limit=ten"])
+def test_bad_history_queries_are_rejected(client, query):
+    response = client.get(f"/history?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert not hasattr(server.get_manager(), "history_query")
+
+
+def test_history_times_are_normalised_to_utc(client):
+    response = client.get("/history?since=2024-05-01&until=2024-05-02T02:30:00%2B02:00&before_id=7")
+    assert response.status_code == 200
+    query = server.get_manager().history_query
+    assert query["since"] == "2024-05-01 00:00:00"
+    assert query["until"] == "2024-05-02 00:30:00"
+    assert query["before_id"] == 7
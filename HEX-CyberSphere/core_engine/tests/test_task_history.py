@@ -0,0 +1,54 @@
+import pytest
+
+import automation_manager
+from automation_manager import AutomationManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # The manager logs to ../logs and reads ../config relative to its working directory
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "engine").mkdir()
+    monkeypatch.chdir(tmp_path / "engine")
+    monkeypatch.setattr(automation_manager, "DATABASE_PATH", str(tmp_path / "hex.db"))
+    manager = AutomationManager(str(tmp_path / "missing.json"))
+    yield manager
+    manager.shutdown()
+
+
+def _log(manager, count, task_name="scan", status="completed"):
+    for index in range(count):
+        manager._log_event("task_result", "test", f"{task_name} {index}",
+                           task_name=task_name, status=status)
+
+
+def test_history_pages_are_keyed_on_event_id(manager):
+    _log(manager, 5)
+    manager._log_event("notification", "test", "not a task event")
+
+    first = manager.get_task_history(limit=2)
+    assert [entry["data"] for entry in first["history"]] == ["scan 4", "scan 3"]
+    second = manager.get_task_history(limit=2, before_id=first["next_cursor"])
+    assert [entry["data"] for entry in second["history"]] == ["scan 2", "scan 1"]
+    last = manager.get_task_history(limit=2, before_id=second["next_cursor"])
+    assert [entry["data"] for entry in last["history"]] == ["scan 0"]
+    assert last["next_cursor"] is None
+
+
+def test_history_filters_by_task_status_and_time(manager):
+    _log(manager, 2, task_name="scan")
+    _log(manager, 3, task_name="parse", status="failed")
+
+    failed = manager.get_task_history(status="failed")["history"]
+    assert {entry["task_name"] for entry in failed} == {"parse"} and len(failed) == 3
+    assert len(manager.get_task_history(task_name="scan")["history"]) == 2
+
+    assert len(manager.get_task_history(since="2000-01-01T00:00:00")["history"]) == 5
+    assert manager.get_task_history(since="2999-01-01 00:00:00") == {"history": [], "next_cursor": None}
+    assert manager.get_task_history(until="2000-01-01 00:00:00") == {"history": [], "next_cursor": None}
+
+
+def test_history_page_size_is_capped(manager):
+    _log(manager, 3)
+    assert len(manager.get_task_history(limit=0)["history"]) == 1
+    assert len(manager.get_task_history(limit=10 ** 9)["history"]) == 3
@@ -0,0 +1,114 @@
+import os
+import threading
+
+import pytest
+
+from db_pool import SQLitePool, init_schema
+from task_queue import CANCELLED, COMPLETED, FAILED, LOCAL_ID_BITS, TaskQueue, TaskStore
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / "tasks.db"))
+    init_schema(pool)
+    yield pool
+    pool.close()
+
+
+def _blocked_queue(**options):
+    """Queue with one io worker held busy until the returned event is set"""
+    queue = TaskQueue({"io": 1}, **options)
+    release, started = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+        return {"blocked": True}
+
+    queue.submit("block", block)
+    started.wait(5)
+    return queue, release
+
+
+def test_lower_priority_numbers_run_first():
+    queue, release = _blocked_queue()
+    order = []
+    ids = [queue.submit(name, lambda name=name: order.append(name), priority=priority)
+           for name, priority in [("late", 5), ("first", 0), ("second", 0)]]
+    release.set()
+    for task_id in ids:
+        queue.result(task_id, timeout=5)
+    assert order == ["first", "second", "late"]
+    queue.shutdown()
+
+
+def test_results_errors_and_cancellation():
+    queue, release = _blocked_queue()
+    ok = queue.submit("ok", lambda: {"value": 1})
+    reported = queue.submit("reported", lambda: {"error": "bad input"})
+    raised = queue.submit("raised", lambda: 1 / 0)
+    cancelled = queue.submit("cancelled", lambda: pytest.fail("cancelled task ran"))
+    assert queue.cancel(cancelled)
+    release.set()
+
+    assert queue.result(ok, timeout=5)["result"] == {"value": 1}
+    assert queue.result(reported, timeout=5)["status"] == FAILED
+    assert "division" in queue.result(raised, timeout=5)["error"]
+    assert queue.status(cancelled)["status"] == CANCELLED
+    assert not queue.cancel(ok)
+    queue.shutdown()
+
+
+def test_full_queue_rejects_submissions():
+    queue, release = _blocked_queue(max_pending=2)
+    queue.submit("a", lambda: None)
+    queue.submit("b", lambda: None)
+    with pytest.raises(OverflowError):
+        queue.submit("c", lambda: None)
+    release.set()
+    queue.shutdown()
+
+
+def test_shutdown_cancels_pending_tasks_without_running_them():
+    queue, release = _blocked_queue()
+    ran = []
+    pending = [queue.submit(f"t{i}", lambda i=i: ran.append(i)) for i in range(20)]
+    release.set()
+    queue.shutdown()
+    statuses = {queue.status(task_id)["status"] for task_id in pending}
+    assert statuses <= {COMPLETED, CANCELLED}
+    assert len(ran) == sum(queue.status(task_id)["status"] == COMPLETED for task_id in pending)
+    with pytest.raises(RuntimeError):
+        queue.submit("late", lambda: None)
+
+
+def test_store_answers_for_finished_tasks(pool):
+    queue = TaskQueue({"io": 2}, TaskStore(pool), max_results=1)
+    first = queue.submit("first", lambda: {"value": 1})
+    queue.result(first, timeout=5)
+    second = queue.submit("second", lambda: {"value": 2})
+    queue.result(second, timeout=5)
+    queue.shutdown()
+
+    # Evicted from memory, so answered from the tasks table
+    assert first not in queue.tasks
+    info = TaskStore(pool).get(first)
+    assert info["status"] == COMPLETED and info["result"] == {"value": 1}
+
+
+def test_store_interrupts_tasks_of_exited_processes(pool):
+    with pool.write() as cursor:
+        cursor.execute("INSERT INTO tasks (name, status, owner) VALUES ('gone', 'running', ?)",
+                       ("unknown-host-name-xyz:1:1",))
+        cursor.execute("INSERT INTO tasks (name, status) VALUES ('legacy', 'pending')")
+    store = TaskStore(pool)
+    assert store.get(1)["status"] == "running"  # other hosts count as alive
+    assert store.get(2)["status"] == "interrupted"
+
+
+def test_ids_without_a_database_are_namespaced_by_process():
+    store = TaskStore()
+    first, second = store.create("t", {}), store.create("t", {})
+    assert second == first + 1
+    assert first >> LOCAL_ID_BITS == second >> LOCAL_ID_BITS == os.getpid()
+    assert second < 2 ** 53
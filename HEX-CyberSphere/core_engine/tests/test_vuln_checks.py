@@ -0,0 +1,109 @@
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scan_session import ScanSession, certificate_not_after
+from vuln_checks import (check_certificate_expiring, check_untrusted_certificate,
+                         check_weak_tls_protocol)
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    if not shutil.which("openssl"):
+        pytest.skip("openssl is needed to make a test certificate")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                    "-keyout", str(key), "-out", str(cert), "-days", "10",
+                    "-subj", "/CN=localhost"], check=True, capture_output=True)
+    return cert, key
+
+
+def _serve_tls(certificate, maximum_version=None):
+    cert, key = certificate
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    if maximum_version is not None:
+        context.minimum_version = ssl.TLSVersion.MINIMUM_SUPPORTED
+        context.maximum_version = maximum_version
+        context.set_ciphers("ALL:@SECLEVEL=0")
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    listener.settimeout(0.2)
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                continue
+            try:
+                with context.wrap_socket(conn, server_side=True) as tls:
+                    tls.recv(1)
+            except (OSError, ssl.SSLError):
+                conn.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+
+    def close():
+        stop.set()
+        thread.join()
+        listener.close()
+    return listener.getsockname()[1], close
+
+
+def test_untrusted_and_expiring_certificate_is_reported(certificate):
+    port, close = _serve_tls(certificate)
+    try:
+        tls = ScanSession("127.0.0.1", tls_timeout=2).tls_info(port)
+    finally:
+        close()
+
+    assert tls is not None and not tls["verified"]
+    assert tls["not_after"] - datetime.now(timezone.utc) < timedelta(days=11)
+    assert check_untrusted_certificate(None, {"tls": tls})["type"] == "untrusted_certificate"
+    assert check_certificate_expiring(None, {"tls": tls})["type"] == "certificate_expiring"
+    assert check_weak_tls_protocol(None, {"tls": tls}) is None
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_deprecated_protocol_is_negotiated_and_reported(certificate):
+    try:
+        port, close = _serve_tls(certificate, maximum_version=ssl.TLSVersion.TLSv1)
+    except (ValueError, ssl.SSLError):
+        pytest.skip("this OpenSSL build cannot serve TLS 1.0")
+    try:
+        tls = ScanSession("127.0.0.1", tls_timeout=2).tls_info(port)
+    finally:
+        close()
+
+    if tls is None:
+        pytest.skip("this OpenSSL build refuses to negotiate TLS 1.0")
+    assert tls["protocol"] == "TLSv1"
+    finding = check_weak_tls_protocol(None, {"tls": tls})
+    assert finding["type"] == "weak_tls_protocol" and finding["risk"] == "high"
+
+
+def test_certificate_not_after_reads_der(certificate):
+    cert, _ = certificate
+    der = ssl.PEM_cert_to_DER_cert(cert.read_text())
+    expires = certificate_not_after(der)
+    assert timedelta(days=9) < expires - datetime.now(timezone.utc) < timedelta(days=11)
+    with pytest.raises(ValueError):
+        certificate_not_after(der[:40])
+
+
+def test_fresh_trusted_certificate_is_not_flagged():
+    tls = {"verified": True, "verify_error": None, "protocol": "TLSv1.3",
+           "not_after": datetime.now(timezone.utc) + timedelta(days=365)}
+    assert check_untrusted_certificate(None, {"tls": tls}) is None
+    assert check_certificate_expiring(None, {"tls": tls}) is None
+    assert check_weak_tls_protocol(None, {"tls": tls}) is None
@@ -0,0 +1,214 @@
+"""
+HEX-CyberSphere Trend Engine
+Vectorized rolling-window trend estimation and forecasting for many series
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+from lazy_imports import lazy_import
+from state_file import load_state, save_state
+
+np = lazy_import('numpy')
+
+
+def rolling_slopes(matrix, window: int):
+    """Least-squares slope and mean of every length-`window` window of every row.
+
+    matrix has one series per row. Window sums come from cumulative sums, so
+    the cost is O(points) per series regardless of the window length.
+    Missing points (NaN) only affect the windows that contain them: those
+    are fitted on the points they do have, and stay NaN with fewer than two.
+    The mean is that of the fitted line at the window centre. Returns two
+    arrays of shape (n_series, n_points - window + 1).
+    """
+    n_series, n_points = matrix.shape
+    valid = ~np.isnan(matrix)
+    filled = np.where(valid, matrix, 0.0)
+    positions = np.arange(n_points, dtype=np.float64)
+    zeros = np.zeros((n_series, 1))
+    sum_y = np.concatenate([zeros, np.cumsum(filled, axis=1)], axis=1)
+    sum_jy = np.concatenate([zeros, np.cumsum(filled * positions, axis=1)], axis=1)
+    count = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+
+    starts = np.arange(n_points - window + 1)
+    window_y = sum_y[:, starts + window] - sum_y[:, starts]
+    # sum over the window of (offset within window) * y
+    window_ky = sum_jy[:, starts + window] - sum_jy[:, starts] - starts * window_y
+
+    center = (window - 1) / 2
+    sxx = window * (window * window - 1) / 12
+    slopes = (window_ky - center * window_y) / sxx
+    means = window_y / window
+
+    rows, cols = np.nonzero(count[:, starts + window] - count[:, starts] < window)
+    if rows.size:
+        windows = np.lib.stride_tricks.sliding_window_view(matrix, window, axis=1)[rows, cols]
+        slopes[rows, cols], means[rows, cols] = _fit_partial(windows)
+    return slopes, means
+
+
+def _fit_partial(windows):
+    """Slope and centre value of the line fitted to the non-NaN points of each row"""
+    window = windows.shape[1]
+    valid = ~np.isnan(windows)
+    offsets = np.where(valid, np.arange(window, dtype=np.float64), 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = valid.sum(axis=1)
+        mean_k = offsets.sum(axis=1) / n
+        mean_y = np.where(valid, windows, 0.0).sum(axis=1) / n
+        dk = np.where(valid, np.arange(window) - mean_k[:, None], 0.0)
+        dy = np.where(valid, windows - mean_y[:, None], 0.0)
+        sxx = (dk * dk).sum(axis=1)
+        slopes = np.where((n >= 2) & (sxx > 0), (dk * dy).sum(axis=1) / sxx, np.nan)
+    return slopes, mean_y + slopes * ((window - 1) / 2 - mean_k)
+
+
+class TrendEngine:
+    """Trend slopes, seasonal deltas and forecasts for a 2-D block of series.
+
+    window  - number of most recent points the slope is fitted on
+              (all points when None)
+    season  - seasonal period in points; enables same-phase deltas and a
+              seasonal-naive-with-drift forecast
+    horizon - how many points ahead to forecast
+
+    The engine can also keep a bounded buffer of the latest points per
+    series (see append), so appending new data only costs the buffer size.
+    """
+
+    def __init__(self, window: Optional[int] = None, season: Optional[int] = None,
+                 horizon: int = 1):
+        if window is not None and window < 2:
+            raise ValueError("Trend window must be at least 2 points")
+        self.window = window
+        self.season = season
+        self.horizon = horizon
+        self.names: List[str] = []
+        self.buffer = None
+        self.first = None
+
+    def analyze(self, matrix, first=None) -> Dict[str, Any]:
+        """Compute trend statistics for every row of matrix.
+
+        Returns arrays keyed by statistic; `first` overrides the values the
+        overall change is measured from (used by the incremental buffer).
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        n_series, n_points = matrix.shape
+        window = min(self.window or n_points, n_points)
+        first = matrix[:, 0] if first is None else first
+        last = matrix[:, -1]
+
+        stats = {'change': last - first}
+        if window < 2:
+            nan = np.full(n_series, np.nan)
+            stats.update(slope=nan, previous_slope=nan, forecast=nan)
+            return stats
+
+        slopes, means = rolling_slopes(matrix[:, -(window + 1):], window)
+        slope = slopes[:, -1]
+        stats['slope'] = slope
+        stats['previous_slope'] = slopes[:, -2] if slopes.shape[1] > 1 else np.full(n_series, np.nan)
+
+        # Value of the fitted line `horizon` points past the window
+        stats['forecast'] = means[:, -1] + slope * ((window - 1) / 2 + self.horizon)
+
+        season = self.season
+        if season and n_points > season:
+            stats['seasonal_delta'] = last - matrix[:, -1 - season]
+            cycles = math.ceil(self.horizon / season)
+            base = matrix[:, n_points - 1 + self.horizon - season * cycles]
+            stats['forecast'] = base + slope * season * cycles
+        return stats
+
+    def trends(self, names: List[str], matrix, first=None) -> Dict[str, Dict[str, Any]]:
+        """Per-series trend report keyed by series name"""
+        stats = self.analyze(matrix, first)
+        report = {}
+        for row, name in enumerate(names):
+            slope = float(stats['slope'][row])
+            if math.isnan(slope):
+                trend = None
+            else:
+                trend = 'increasing' if slope > 0 else 'decreasing' if slope < 0 else 'flat'
+            entry = {
+                'trend': trend,
+                'change': float(stats['change'][row])
+            }
+            for key, values in stats.items():
+                if key != 'change':
+                    entry[key] = float(values[row])
+            report[name] = {key: (None if isinstance(value, float) and math.isnan(value) else value)
+                            for key, value in entry.items()}
+        return report
+
+    def capacity(self) -> int:
+        """Points kept per series by the incremental buffer"""
+        if self.window is None:
+            raise ValueError("Incremental trends need a fixed window")
+        return max(self.window + 1, (self.season or 0) + self.horizon + 1)
+
+    def append(self, data: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+        """Append new points per series and return the updated trend report.
+
+        Every call must give the same number of new points for each series
+        it mentions. Series not mentioned are padded with NaN; a window with
+        gaps is fitted on the points it has, so a series' slope is known
+        once two of its points fall in the window.
+        """
+        capacity = self.capacity()
+        lengths = {len(values) for values in data.values()}
+        if len(lengths) > 1:
+            raise ValueError("All series must append the same number of points")
+        added = lengths.pop() if lengths else 0
+
+        new_names = [name for name in data if name not in self.names]
+        if self.buffer is None:
+            self.buffer = np.full((0, capacity), np.nan)
+            self.first = np.empty(0)
+        if new_names:
+            self.names.extend(new_names)
+            self.buffer = np.vstack([self.buffer, np.full((len(new_names), capacity), np.nan)])
+            self.first = np.concatenate([self.first, np.full(len(new_names), np.nan)])
+
+        incoming = np.full((len(self.names), added), np.nan)
+        for row, name in enumerate(self.names):
+            if name in data:
+                incoming[row] = np.asarray(data[name], dtype=np.float64)
+        self.buffer = np.concatenate([self.buffer, incoming], axis=1)[:, -capacity:]
+
+        if added:
+            for row in np.flatnonzero(np.isnan(self.first)):
+                if self.names[row] in data:
+                    self.first[row] = incoming[row, 0]
+
+        return self.trends(self.names, self.buffer, self.first)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'window': self.window,
+            'season': self.season,
+            'horizon': self.horizon,
+            'names': self.names,
+            'buffer': None if self.buffer is None else
+            [[None if math.isnan(v) else v for v in row] for row in self.buffer.tolist()],
+            'first': None if self.first is None else
+            [None if math.isnan(v) else v for v in self.first.tolist()]
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "TrendEngine":
+        engine = cls(state.get('window'), state.get('season'), state.get('horizon', 1))
+        engine.names = list(state.get('names', []))
+        if state.get('buffer') is not None:
+            engine.buffer = np.array(state['buffer'], dtype=np.float64).reshape(len(engine.names), -1)
+            engine.first = np.array(state['first'], dtype=np.float64)
+        return engine
+
+    def save(self, path: str):
+        """Write the engine state atomically"""
+        save_state(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path: str) -> "TrendEngine":
+        return cls.from_dict(load_state(path))
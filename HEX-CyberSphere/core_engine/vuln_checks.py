@@ -0,0 +1,278 @@
+"""
+HEX-CyberSphere Vulnerability Checks
+Registry of pluggable security checks and the scheduler that runs them
+"""
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from scan_session import ScanSession
+
+# Registered checks in registration order, keyed by name
+CHECKS: Dict[str, "VulnerabilityCheck"] = {}
+
+
+class VulnerabilityCheck:
+    """A single check and the probes it depends on.
+
+    Requirements are strings resolved through the scan session:
+      "port:<n>"   - port n must be open
+      "banner:<n>" - the service greeting read from port n
+      "http"       - the HTTP response of the session's base URL
+      "tls:<n>"    - a TLS handshake on port n ("tls" means port 443)
+    A check only runs when all of its requirements are available, and
+    receives the session plus the resolved values keyed by requirement.
+    """
+
+    def __init__(self, name: str, func: Callable[..., Any], requires: Iterable[str] = (),
+                 scope: str = "host"):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.scope = scope
+
+    def ports(self) -> List[int]:
+        """Ports whose connect outcome this check depends on"""
+        ports = []
+        for requirement in self.requires:
+            kind, _, arg = requirement.partition(':')
+            if kind in ("port", "banner"):
+                ports.append(int(arg))
+            elif kind == "tls":
+                ports.append(int(arg or 443))
+        return ports
+
+
+def register_check(name: str, requires: Iterable[str] = (), scope: str = "host"):
+    """Decorator registering a check function under a unique name"""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        CHECKS[name] = VulnerabilityCheck(name, func, requires, scope)
+        return func
+    return decorator
+
+
+def resolve_requirement(session: ScanSession, requirement: str) -> Any:
+    """Look up one requirement through the session, None when unavailable"""
+    kind, _, arg = requirement.partition(':')
+    if kind == "port":
+        return True if session.is_open(int(arg)) else None
+    if kind == "banner":
+        return session.banner(int(arg))
+    if kind == "http":
+        return session.http_response()
+    if kind == "tls":
+        return session.tls_info(int(arg or 443))
+    raise ValueError(f"Unknown check requirement: {requirement}")
+
+
+class CheckScheduler:
+    """Runs registered checks concurrently against a scan session.
+
+    Port requirements of every selected check are probed together in one
+    asynchronous batch first. Each check then runs on the thread pool,
+    resolving its remaining requirements through the session, which performs
+    each shared probe (HTTP fetch, TLS handshake, banner) only once.
+    """
+
+    def __init__(self, max_workers: int = 16):
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+
+    def select(self, scope: str, names: Optional[Iterable[str]] = None) -> List[VulnerabilityCheck]:
+        """Return the registered checks of a scope, optionally filtered by name"""
+        wanted = set(names) if names is not None else None
+        return [check for check in CHECKS.values()
+                if check.scope == scope and (wanted is None or check.name in wanted)]
+
+    def run(self, session: ScanSession, scope: str = "host",
+            names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Run the selected checks and return their findings in registry order"""
+        checks = self.select(scope, names)
+        ports = sorted({port for check in checks for port in check.ports()})
+        if ports:
+            session.probe_ports(ports)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(checks)))) as pool:
+            futures = [pool.submit(self._run_check, check, session) for check in checks]
+            findings = []
+            for future in futures:
+                findings.extend(future.result())
+        return findings
+
+    def iter_run(self, session: ScanSession, scope: str = "host",
+                 names: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Run the selected checks and yield findings as each check completes"""
+        checks = self.select(scope, names)
+        ports = sorted({port for check in checks for port in check.ports()})
+        if ports:
+            session.probe_ports(ports)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(checks)))) as pool:
+            futures = [pool.submit(self._run_check, check, session) for check in checks]
+            for future in as_completed(futures):
+                yield from future.result()
+
+    def _run_check(self, check: VulnerabilityCheck, session: ScanSession) -> List[Dict[str, Any]]:
+        try:
+            resolved = {}
+            for requirement in check.requires:
+                value = resolve_requirement(session, requirement)
+                if value is None:
+                    return []
+                resolved[requirement] = value
+
+            result = check.func(session, resolved)
+            if not result:
+                return []
+            findings = result if isinstance(result, list) else [result]
+            for finding in findings:
+                finding.setdefault("check", check.name)
+            return findings
+        except Exception as e:
+            self.logger.error(f"Check {check.name} failed: {e}")
+            return []
+
+
+# Host checks
+
+COMMON_PORTS = [
+    (21, "FTP"), (22, "SSH"), (23, "Telnet"),
+    (80, "HTTP"), (443, "HTTPS"), (3389, "RDP")
+]
+
+
+def _register_open_port_check(port: int, service_name: str):
+    @register_check(f"open_port_{service_name.lower()}", requires=[f"port:{port}"])
+    def check(session, resolved):
+        return {
+            "type": "open_port",
+            "port": port,
+            "service": service_name,
+            "risk": "info" if port in [80, 443] else "medium",
+            "description": f"{service_name} service running on port {port}"
+        }
+
+
+for _port, _service_name in COMMON_PORTS:
+    _register_open_port_check(_port, _service_name)
+
+
+SECURITY_HEADERS = [
+    "X-Content-Type-Options",
+    "X-Frame-Options",
+    "X-XSS-Protection",
+    "Strict-Transport-Security"
+]
+
+
+@register_check("missing_security_headers", requires=["http"])
+def check_missing_security_headers(session, resolved):
+    headers = resolved["http"]["headers"]
+    missing_headers = [header for header in SECURITY_HEADERS if header not in headers]
+    if missing_headers:
+        return {
+            "type": "missing_security_headers",
+            "risk": "medium",
+            "description": f"Missing security headers: {', '.join(missing_headers)}",
+            "headers": missing_headers
+        }
+
+
+VERSION_PATTERN = re.compile(r'\d+\.\d+')
+
+
+@register_check("server_version_disclosure", requires=["http"])
+def check_server_version_disclosure(session, resolved):
+    headers = resolved["http"]["headers"]
+    disclosed = {name: headers[name] for name in ("Server", "X-Powered-By")
+                 if name in headers and VERSION_PATTERN.search(headers[name])}
+    if disclosed:
+        return {
+            "type": "version_disclosure",
+            "risk": "low",
+            "description": f"HTTP headers disclose software versions: {disclosed}",
+            "headers": disclosed
+        }
+
+
+def _register_banner_check(port: int, service_name: str):
+    @register_check(f"banner_version_{service_name.lower()}", requires=[f"banner:{port}"])
+    def check(session, resolved):
+        banner = resolved[f"banner:{port}"]
+        if VERSION_PATTERN.search(banner):
+            return {
+                "type": "version_disclosure",
+                "port": port,
+                "service": service_name,
+                "risk": "low",
+                "description": f"{service_name} banner discloses version: {banner[:120]}",
+                "banner": banner[:256]
+            }
+
+
+for _port, _service_name in [(21, "FTP"), (22, "SSH")]:
+    _register_banner_check(_port, _service_name)
+
+
+WEAK_TLS_PROTOCOLS = {"SSLv2", "SSLv3", "TLSv1", "TLSv1.1"}
+
+
+@register_check("weak_tls_protocol", requires=["tls"])
+def check_weak_tls_protocol(session, resolved):
+    protocol = resolved["tls"].get("protocol")
+    if protocol in WEAK_TLS_PROTOCOLS:
+        return {
+            "type": "weak_tls_protocol",
+            "port": 443,
+            "risk": "high",
+            "description": f"Server negotiated deprecated protocol {protocol}"
+        }
+
+
+@register_check("untrusted_certificate", requires=["tls"])
+def check_untrusted_certificate(session, resolved):
+    tls = resolved["tls"]
+    if not tls["verified"]:
+        return {
+            "type": "untrusted_certificate",
+            "port": 443,
+            "risk": "medium",
+            "description": f"TLS certificate failed verification: {tls['verify_error']}"
+        }
+
+
+@register_check("certificate_expiring", requires=["tls"])
+def check_certificate_expiring(session, resolved):
+    not_after = resolved["tls"].get("not_after")
+    if not_after and not_after - datetime.now(timezone.utc) < timedelta(days=30):
+        return {
+            "type": "certificate_expiring",
+            "port": 443,
+            "risk": "medium",
+            "description": f"TLS certificate expires on {not_after.isoformat()}"
+        }
+
+
+# API checks
+
+@register_check("unauthenticated_access", requires=["http"], scope="api")
+def check_unauthenticated_access(session, resolved):
+    # If we can access without auth, it's a potential issue
+    if resolved["http"]["status_code"] == 200:
+        return {
+            "type": "unauthenticated_access",
+            "risk": "high",
+            "description": "API endpoint accessible without authentication"
+        }
+
+
+@register_check("permissive_cors", requires=["http"], scope="api")
+def check_permissive_cors(session, resolved):
+    if resolved["http"]["headers"].get("Access-Control-Allow-Origin") == "*":
+        return {
+            "type": "permissive_cors",
+            "risk": "medium",
+            "description": "API allows cross-origin requests from any origin"
+        }
@@ -1,4 +1,6 @@
 -- HEX-CyberSphere Database Initialization
+-- Safe to rerun; the core engine applies it on startup after upgrading
+-- columns of existing tables (db_pool.init_schema)
 
 -- Create logs table
 CREATE TABLE IF NOT EXISTS logs (
@@ -16,7 +18,9 @@ CREATE TABLE IF NOT EXISTS tasks (
     description TEXT,
     status VARCHAR(20) DEFAULT 'pending',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    result TEXT,
+    owner VARCHAR(255)
 );
 
 -- Create configs table
@@ -32,8 +36,23 @@ CREATE TABLE IF NOT EXISTS events (
     id SERIAL PRIMARY KEY,
     event_type VARCHAR(50) NOT NULL,
     source VARCHAR(50) NOT NULL,
-    data JSONB,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    data TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    task_name VARCHAR(100),
+    status VARCHAR(20)
+);
+
+-- Task history: newest-first pages keyed on id, optionally by task or status
+CREATE INDEX IF NOT EXISTS idx_events_task_history ON events (id)
+    WHERE event_type IN ('task_execution', 'task_result', 'task_error');
+CREATE INDEX IF NOT EXISTS idx_events_task_name ON events (task_name, id);
+CREATE INDEX IF NOT EXISTS idx_events_status ON events (status, id);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp);
+
+-- Create event payloads table (large event data stored by reference)
+CREATE TABLE IF NOT EXISTS event_payloads (
+    ref VARCHAR(40) PRIMARY KEY,
+    payload TEXT NOT NULL
 );
 
 -- Create API endpoints table
@@ -46,6 +65,31 @@ CREATE TABLE IF NOT EXISTS api_endpoints (
     enabled BOOLEAN DEFAULT true
 );
 
+-- Create scans table
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id SERIAL PRIMARY KEY,
+    target VARCHAR(255) NOT NULL,
+    scan_type VARCHAR(50) NOT NULL,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_scans_target ON scans (target, scan_id);
+CREATE INDEX IF NOT EXISTS idx_scans_target_type ON scans (target, scan_type, scan_id);
+
+-- Create scan results table
+CREATE TABLE IF NOT EXISTS scan_results (
+    target VARCHAR(255) NOT NULL,
+    port INTEGER NOT NULL DEFAULT 0,
+    check_name VARCHAR(100) NOT NULL,
+    scan_id INTEGER NOT NULL REFERENCES scans (scan_id),
+    risk VARCHAR(20),
+    fingerprint CHAR(40) NOT NULL,
+    detail JSONB,
+    PRIMARY KEY (target, port, check_name, scan_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_scan_results_scan ON scan_results (scan_id);
+
 -- Insert default configurations
 INSERT INTO configs (key, value, description) VALUES 
 ('system_name', 'HEX-CyberSphere', 'System name'),
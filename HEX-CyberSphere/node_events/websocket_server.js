@@ -129,6 +129,37 @@ server.on('request', (req, res) => {
       clients: clients.size,
       timestamp: new Date().toISOString()
     }));
+  } else if (req.url === '/stream' && req.method === 'POST') {
+    // Relay an NDJSON body (e.g. streamed scan findings) to clients line by line
+    let buffer = '';
+    let received = 0;
+
+    const relayLine = (line) => {
+      if (!line.trim()) return;
+      try {
+        broadcastMessage({
+          type: 'stream_record',
+          data: JSON.parse(line),
+          timestamp: new Date().toISOString()
+        });
+        received++;
+      } catch (error) {
+        console.error('Invalid NDJSON line:', error);
+      }
+    };
+
+    req.setEncoding('utf8');
+    req.on('data', (chunk) => {
+      buffer += chunk;
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      lines.forEach(relayLine);
+    });
+    req.on('end', () => {
+      relayLine(buffer);
+      res.writeHead(200, { 'Content-Type': 'application/json' });
+      res.end(JSON.stringify({ status: 'ok', received: received }));
+    });
   } else if (req.url === '/') {
     res.writeHead(200, { 'Content-Type': 'application/json' });
     res.end(JSON.stringify({
@@ -21,7 +21,7 @@ fi
 # Start all services
 echo "Starting services..."
 echo "1. Starting Python Core Engine..."
-python3 ../core_engine/automation_manager.py & PYTHON_PID=$!
+(cd ../core_engine && exec gunicorn -c gunicorn.conf.py "server:create_app()") & PYTHON_PID=$!
 echo "2. Starting Java REST API Service..."
 cd ../java_service && mvn spring-boot:run & JAVA_PID=$!
 echo "3. Starting Node.js Event System..."
@@ -1,4 +1,6 @@
 -- HEX-CyberSphere Database Schema
+-- Safe to rerun; the core engine applies it on startup after upgrading
+-- columns of existing tables (db_pool.init_schema)
 
 -- Create logs table
 CREATE TABLE IF NOT EXISTS logs (
@@ -16,7 +18,9 @@ CREATE TABLE IF NOT EXISTS tasks (
     description TEXT,
     status TEXT DEFAULT 'pending',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    result TEXT,
+    owner TEXT
 );
 
 -- Create configs table
@@ -33,7 +37,22 @@ CREATE TABLE IF NOT EXISTS events (
     event_type TEXT NOT NULL,
     source TEXT NOT NULL,
     data TEXT,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    task_name TEXT,
+    status TEXT
+);
+
+-- Task history: newest-first pages keyed on id, optionally by task or status
+CREATE INDEX IF NOT EXISTS idx_events_task_history ON events (id)
+    WHERE event_type IN ('task_execution', 'task_result', 'task_error');
+CREATE INDEX IF NOT EXISTS idx_events_task_name ON events (task_name, id);
+CREATE INDEX IF NOT EXISTS idx_events_status ON events (status, id);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp);
+
+-- Create event payloads table (large event data stored by reference)
+CREATE TABLE IF NOT EXISTS event_payloads (
+    ref TEXT PRIMARY KEY,
+    payload TEXT NOT NULL
 );
 
 -- Create API endpoints table
@@ -46,6 +65,31 @@ CREATE TABLE IF NOT EXISTS api_endpoints (
     enabled INTEGER DEFAULT 1
 );
 
+-- Create scans table
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    scan_type TEXT NOT NULL,
+    started_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_scans_target ON scans (target, scan_id);
+CREATE INDEX IF NOT EXISTS idx_scans_target_type ON scans (target, scan_type, scan_id);
+
+-- Create scan results table
+CREATE TABLE IF NOT EXISTS scan_results (
+    target TEXT NOT NULL,
+    port INTEGER NOT NULL DEFAULT 0,
+    check_name TEXT NOT NULL,
+    scan_id INTEGER NOT NULL REFERENCES scans (scan_id),
+    risk TEXT,
+    fingerprint TEXT NOT NULL,
+    detail TEXT,
+    PRIMARY KEY (target, port, check_name, scan_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_scan_results_scan ON scan_results (scan_id);
+
 -- Insert default configurations
 INSERT OR IGNORE INTO configs (key, value, description) VALUES 
 ('system_name', 'HEX-CyberSphere', 'System name'),